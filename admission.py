@@ -0,0 +1,234 @@
+"""Admission control: per-route-class concurrency limits with bounded queues.
+
+Requests are sorted into classes by method and path template, so that
+one kind of heavy request cannot take every worker thread and pooled
+connection from the rest:
+
+- ``bulk_write``: batch creates/updates, imports, mark sheets;
+- ``listing``: full listings and table-wide reads;
+- ``export``: the streamed exports, which hold their slot until the last
+  byte is sent and so are kept away from the dashboards' listing reads;
+- ``point_read``: one student, one leaderboard, a search.
+
+Each class admits up to ADMISSION_<CLASS>_CONCURRENCY requests at a time.
+Requests past that wait in a FIFO queue of at most ADMISSION_<CLASS>_QUEUE.
+A request that finds the queue full, or waits longer than
+ADMISSION_QUEUE_TIMEOUT_MS, is shed with a 503 and Retry-After.  Routes in
+no class (metrics, jobs, /live, single writes) are never held back.  The
+limits are per process and shared by every app mounted in it, like the
+connection pool they protect.
+
+Queue depth, waits and rejections per class are at ``/metrics/admission``;
+the time a request spent queued is the ``queue`` entry of its
+Server-Timing header.
+"""
+import asyncio
+import logging
+import re
+import time
+from collections import deque
+
+from starlette.responses import JSONResponse
+
+import config
+from instrumentation import current_stats
+
+logger = logging.getLogger("admission")
+
+# What a 503 asks clients to wait before retrying
+RETRY_AFTER_SECONDS = 2
+
+# backend.py's per-table routes, by the name of their id parameter
+_LEGACY = {
+    "student_data": "student_id",
+    "student_info": "student_info_id",
+    "student_sem_info": "sem_info_id",
+    "student_record": "student_record_id",
+}
+
+ROUTE_CLASSES = {
+    "bulk_write": [
+        "POST /students/bulk/",
+        "POST /students/import",
+        "PATCH /semesters/{semester}/marks",
+        "POST /grades/recompute",
+        *(f"{method} /{table}/batch" for method in ("POST", "PUT", "DELETE") for table in _LEGACY),
+    ],
+    "listing": [
+        "GET /students_full/",
+        "GET /student_full/batch",
+        *(f"GET /{table}/" for table in _LEGACY),
+        *(f"GET /{table}/batch" for table in _LEGACY),
+        "GET /graph/all-charts",
+        "GET /analytics/summary",
+        "GET /analytics/histogram",
+        "GET /analytics/pass-rates",
+    ],
+    "export": [
+        "GET /students_full/export",
+    ],
+    "point_read": [
+        "GET /student_full/{student_id}",
+        "GET /students/search",
+        "GET /students/{student_id}/gpa",
+        "GET /students/{student_id}/rank",
+        "GET /rankings/{department}/{semester}",
+        *(f"GET /{table}/{{{id_name}}}" for table, id_name in _LEGACY.items()),
+    ],
+}
+
+
+def _compile(template):
+    method, path = template.split(" ", 1)
+    # Literal text and {parameters} alternate; a parameter is one path segment
+    parts = re.split(r"\{[^}]+\}", path)
+    pattern = "[^/]+".join(re.escape(part) for part in parts)
+    return method, re.compile(pattern.rstrip("/") + "/?"), template
+
+
+_PATTERNS = [
+    (route_class, *_compile(template))
+    for route_class, templates in ROUTE_CLASSES.items()
+    for template in templates
+]
+
+
+def classify(method, path):
+    """(route class, matched template) for a request; (None, None) if unlimited."""
+    for route_class, route_method, pattern, template in _PATTERNS:
+        if method == route_method and pattern.fullmatch(path):
+            return route_class, template
+    return None, None
+
+
+class Rejected(Exception):
+    pass
+
+
+class _Gate:
+    """A concurrency limit with a bounded FIFO queue in front of it.
+
+    Only touched from the event loop, so it needs no lock.  A released slot
+    is handed straight to the first waiter, so nothing can overtake the
+    queue.
+    """
+
+    def __init__(self, name, concurrency, queue):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.active = 0
+        self._waiters = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.max_queue_depth = 0
+        # Over the requests admitted after queueing
+        self.waits = 0
+        self.wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    async def acquire(self, timeout):
+        """Wait for a slot; the seconds spent waiting.  Raises Rejected."""
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return 0.0
+        if len(self._waiters) >= self.queue:
+            self.rejected += 1
+            raise Rejected(f"{self.name} queue is full ({self.queue} waiting)")
+
+        started = time.perf_counter()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot arrived just as we gave up: pass it on
+                self.release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.timed_out += 1
+            raise Rejected(f"waited {timeout * 1000:.0f} ms for a {self.name} slot")
+        waited = time.perf_counter() - started
+        self.admitted += 1
+        self.waits += 1
+        self.wait_ms += waited * 1000
+        self.max_wait_ms = max(self.max_wait_ms, waited * 1000)
+        return waited
+
+    def release(self):
+        if self._waiters:
+            # The slot changes hands; active stays the same
+            self._waiters.popleft().set_result(None)
+        else:
+            self.active -= 1
+
+    def stats(self):
+        return {
+            "concurrency": self.concurrency,
+            "queue_limit": self.queue,
+            "active": self.active,
+            "queue_depth": len(self._waiters),
+            "max_queue_depth": self.max_queue_depth,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait_ms": round(self.wait_ms / self.waits, 3) if self.waits else 0.0,
+            "max_wait_ms": round(self.max_wait_ms, 3),
+        }
+
+
+gates = {
+    "bulk_write": _Gate("bulk_write", config.ADMISSION_BULK_CONCURRENCY, config.ADMISSION_BULK_QUEUE),
+    "listing": _Gate("listing", config.ADMISSION_LISTING_CONCURRENCY, config.ADMISSION_LISTING_QUEUE),
+    "export": _Gate("export", config.ADMISSION_EXPORT_CONCURRENCY, config.ADMISSION_EXPORT_QUEUE),
+    "point_read": _Gate("point_read", config.ADMISSION_READ_CONCURRENCY, config.ADMISSION_READ_QUEUE),
+}
+
+
+def stats():
+    return {"enabled": config.ADMISSION_ENABLED, "classes": {name: gate.stats() for name, gate in gates.items()}}
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware; the slot is held until the response is fully sent."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not config.ADMISSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        route_class, template = classify(scope["method"], scope["path"])
+        gate = gates.get(route_class)
+        if gate is None:
+            await self.app(scope, receive, send)
+            return
+
+        request_stats = current_stats()
+        try:
+            waited = await gate.acquire(config.ADMISSION_QUEUE_TIMEOUT_MS / 1000)
+        except Rejected as e:
+            logger.warning("shed %s %s: %s", scope["method"], scope["path"], e)
+            if request_stats is not None:
+                request_stats.route = template
+            response = JSONResponse({"detail": f"Server busy: {e}"}, status_code=503,
+                                    headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+            await response(scope, receive, send)
+            return
+        if request_stats is not None:
+            request_stats.queue_time = waited
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
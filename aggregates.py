@@ -0,0 +1,403 @@
+"""Incrementally maintained dashboard aggregates.
+
+Every write route calls ``retract`` with the ids of the students it is about
+to change and ``apply`` once the change is flushed.  Both only read the sem
+rows of those students, so the summary tables stay correct without ever
+scanning the whole ``student_sem_info`` table.  Summaries missing from an
+older database are built once at startup (``ensure_built``).  ``rebuild``
+recomputes everything from scratch and is meant for recovery:
+
+    python aggregates.py rebuild
+"""
+import sys
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Iterable
+
+from sqlalchemy import bindparam, case, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from jobs import job
+from models import DepartmentSemesterStats, DepartmentStats, StudentData, StudentSemInfo
+
+# Summary rows are keyed by department/semester, so NULLs are folded into
+# placeholder keys instead of being dropped.
+UNKNOWN_DEPARTMENT = ""
+UNKNOWN_SEMESTER = 0
+
+ID_CHUNK_SIZE = 1000
+
+# Columns the summaries are computed from; writes that touch none of them
+# can skip retract/apply altogether.
+TRACKED_COLUMNS = {
+    StudentData.__tablename__: {"student_id", "department"},
+    StudentSemInfo.__tablename__: {"student_id", "semester", "pass_fail", "cgpa"},
+}
+
+
+def _pass_fail_bucket(value):
+    value = (value or "").strip().lower()
+    if value.startswith("p"):
+        return "passed"
+    if value.startswith("f"):
+        return "failed"
+    return None
+
+
+def _add_sem_rows(sem_totals, rows):
+    for department, semester, pass_fail, cgpa in rows:
+        totals = sem_totals[(department or UNKNOWN_DEPARTMENT, semester or UNKNOWN_SEMESTER)]
+        bucket = _pass_fail_bucket(pass_fail)
+        if bucket:
+            totals[bucket] += 1
+        if cgpa is not None:
+            totals["cgpa_sum"] += cgpa
+            totals["cgpa_count"] += 1
+
+
+def _sem_totals():
+    return defaultdict(lambda: {"passed": 0, "failed": 0, "cgpa_sum": 0.0, "cgpa_count": 0})
+
+
+def _contributions(db: Session, student_ids: Iterable[int]):
+    sem_totals = _sem_totals()
+    dept_totals = defaultdict(int)
+
+    ids = list(set(student_ids))
+    for start in range(0, len(ids), ID_CHUNK_SIZE):
+        chunk = ids[start:start + ID_CHUNK_SIZE]
+
+        for (department,) in db.query(StudentData.department).filter(StudentData.student_id.in_(chunk)):
+            dept_totals[department or UNKNOWN_DEPARTMENT] += 1
+
+        _add_sem_rows(sem_totals, (
+            db.query(StudentData.department, StudentSemInfo.semester, StudentSemInfo.pass_fail, StudentSemInfo.cgpa)
+            .join(StudentSemInfo, StudentSemInfo.student_id == StudentData.student_id)
+            .filter(StudentData.student_id.in_(chunk))
+        ))
+
+    return sem_totals, dept_totals
+
+
+def _sem_row_contributions(db: Session, sem_info_ids):
+    sem_totals = _sem_totals()
+    for start in range(0, len(sem_info_ids), ID_CHUNK_SIZE):
+        _add_sem_rows(sem_totals, db.execute(
+            select(StudentData.department, StudentSemInfo.semester, StudentSemInfo.pass_fail, StudentSemInfo.cgpa)
+            .join(StudentData, StudentSemInfo.student_id == StudentData.student_id)
+            .where(StudentSemInfo.sem_info_id.in_(sem_info_ids[start:start + ID_CHUNK_SIZE]))
+        ))
+    return sem_totals, {}
+
+
+def _bump(db: Session, model, key: dict, deltas: dict):
+    """Add ``deltas`` to one summary row, creating it if needed.
+
+    The increment is done in SQL so concurrent writers never overwrite each
+    other's counts.
+    """
+    if not any(deltas.values()):
+        return
+
+    columns = model.__table__.c
+    stmt = update(model).values({name: columns[name] + delta for name, delta in deltas.items()})
+    for name, value in key.items():
+        stmt = stmt.where(columns[name] == value)
+
+    if db.execute(stmt).rowcount:
+        return
+    try:
+        with db.begin_nested():
+            db.add(model(**key, **deltas))
+    except IntegrityError:
+        # Another transaction created the row first
+        db.execute(stmt)
+
+
+def _bump_many(db: Session, model, key_names, deltas_by_key: dict):
+    """``_bump`` for many summary rows of one table at once.
+
+    One read finds the rows that exist, one executemany UPDATE adds to them
+    and one multi-row INSERT creates the rest, instead of an UPDATE (and a
+    savepointed INSERT) per row.
+    """
+    deltas_by_key = {key: deltas for key, deltas in deltas_by_key.items() if any(deltas.values())}
+    if len(deltas_by_key) <= 1:
+        # A single write's usual case: its one UPDATE is cheaper than the read
+        for key, deltas in deltas_by_key.items():
+            _bump(db, model, dict(zip(key_names, key)), deltas)
+        return
+
+    table = model.__table__
+    key_columns = [table.c[name] for name in key_names]
+    existing = {
+        tuple(row) for row in
+        db.execute(select(*key_columns).where(key_columns[0].in_({key[0] for key in deltas_by_key})))
+    }
+
+    rows = [
+        {**dict(zip(key_names, key)), **deltas}
+        for key, deltas in deltas_by_key.items()
+        if key in existing
+    ]
+    if rows:
+        delta_names = [name for name in rows[0] if name not in key_names]
+        db.execute(
+            update(table)
+            .where(*(column == bindparam(f"key_{column.name}") for column in key_columns))
+            .values({name: table.c[name] + bindparam(f"delta_{name}") for name in delta_names}),
+            [{f"key_{name}" if name in key_names else f"delta_{name}": value for name, value in row.items()}
+             for row in rows],
+        )
+
+    new_rows = [
+        {**dict(zip(key_names, key)), **deltas}
+        for key, deltas in deltas_by_key.items()
+        if key not in existing
+    ]
+    if not new_rows:
+        return
+    try:
+        with db.begin_nested():
+            db.execute(table.insert(), new_rows)
+    except IntegrityError:
+        # Another transaction created some of them first
+        for row in new_rows:
+            _bump(
+                db, model,
+                {name: row[name] for name in key_names},
+                {name: value for name, value in row.items() if name not in key_names},
+            )
+
+
+def _write(db: Session, sem_totals, dept_totals, sign: int = 1):
+    _bump_many(db, DepartmentSemesterStats, ("department", "semester"), {
+        key: {name: sign * value for name, value in totals.items()}
+        for key, totals in sem_totals.items()
+    })
+    _bump_many(db, DepartmentStats, ("department",), {
+        (department,): {"student_count": sign * count}
+        for department, count in dept_totals.items()
+    })
+
+
+def _merge(db: Session, student_ids: Iterable[int], sign: int):
+    db.flush()
+    _write(db, *_contributions(db, student_ids), sign)
+
+
+def affects(table, columns: Iterable[str]) -> bool:
+    """Whether writing ``columns`` of ``table`` can change the summaries."""
+    return not TRACKED_COLUMNS.get(table.name, set()).isdisjoint(columns)
+
+
+def retract(db: Session, student_ids: Iterable[int]):
+    """Remove the current contribution of these students from the summary."""
+    _merge(db, student_ids, -1)
+
+
+def apply(db: Session, student_ids: Iterable[int]):
+    """Add the current contribution of these students to the summary."""
+    _merge(db, student_ids, 1)
+
+
+def _sem_deltas(before, after):
+    return {
+        key: {name: after[key][name] - before[key][name] for name in after[key]}
+        for key in set(before) | set(after)
+    }
+
+
+@contextmanager
+def _netted(db: Session, measure):
+    db.flush()
+    sem_before, dept_before = measure()
+    yield
+    db.flush()
+    sem_after, dept_after = measure()
+
+    sem_deltas = _sem_deltas(sem_before, sem_after)
+    dept_deltas = {key: dept_after.get(key, 0) - dept_before.get(key, 0) for key in set(dept_before) | set(dept_after)}
+    _write(db, sem_deltas, dept_deltas)
+
+
+def tracking(db: Session, student_ids: Iterable[int]):
+    """``retract`` before the block and ``apply`` after it, netted out.
+
+    Only summary rows whose totals actually moved are written, so a batch
+    touching many students costs one UPDATE per changed department/semester
+    instead of two per department/semester it reads.
+    """
+    student_ids = list(set(student_ids))
+    return _netted(db, lambda: _contributions(db, student_ids))
+
+
+def tracking_sem_rows(db: Session, sem_info_ids: Iterable[int]):
+    """Like ``tracking``, but reads only the given sem rows.
+
+    For blocks that change those rows' marks, pass/fail or CGPA in place:
+    no rows added or removed, no student or department moved.
+    """
+    sem_info_ids = list(set(sem_info_ids))
+    return _netted(db, lambda: _sem_row_contributions(db, sem_info_ids))
+
+
+def replace_sem_rows(db: Session, before, after):
+    """Net out sem rows the caller already holds, old and new values.
+
+    ``before`` and ``after`` are (department, semester, pass_fail, cgpa)
+    tuples; saves the two reads of ``tracking_sem_rows`` when the caller
+    has just loaded the rows anyway.
+    """
+    sem_before, sem_after = _sem_totals(), _sem_totals()
+    _add_sem_rows(sem_before, before)
+    _add_sem_rows(sem_after, after)
+    _write(db, _sem_deltas(sem_before, sem_after), {})
+
+
+def rebuild(db: Session):
+    """Recompute both summary tables from the base tables."""
+    db.query(DepartmentSemesterStats).delete()
+    db.query(DepartmentStats).delete()
+
+    department = func.coalesce(StudentData.department, UNKNOWN_DEPARTMENT)
+    semester = func.coalesce(StudentSemInfo.semester, UNKNOWN_SEMESTER)
+    pass_fail = func.lower(func.trim(StudentSemInfo.pass_fail))
+    sem_rows = (
+        db.query(
+            department,
+            semester,
+            func.sum(case((pass_fail.like("p%"), 1), else_=0)),
+            func.sum(case((pass_fail.like("f%"), 1), else_=0)),
+            func.coalesce(func.sum(StudentSemInfo.cgpa), 0),
+            func.count(StudentSemInfo.cgpa),
+        )
+        .join(StudentSemInfo, StudentSemInfo.student_id == StudentData.student_id)
+        .group_by(department, semester)
+    )
+    db.add_all(
+        DepartmentSemesterStats(
+            department=dept, semester=sem, passed=passed or 0, failed=failed or 0,
+            cgpa_sum=cgpa_sum, cgpa_count=cgpa_count,
+        )
+        for dept, sem, passed, failed, cgpa_sum, cgpa_count in sem_rows
+    )
+
+    dept_rows = db.query(department, func.count(StudentData.student_id)).group_by(department)
+    db.add_all(DepartmentStats(department=dept, student_count=count) for dept, count in dept_rows)
+    db.commit()
+
+
+@job("rebuild_aggregates", process=True)
+def rebuild_job():
+    """``rebuild`` as a background job, in a worker process of its own."""
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        rebuild(db)
+        return {
+            "departments": db.query(func.count(DepartmentStats.department)).scalar(),
+            "department_semesters": db.query(func.count(DepartmentSemesterStats.department)).scalar(),
+        }
+    finally:
+        db.close()
+
+
+def ensure_built(db: Session):
+    """``rebuild`` if the summary tables are empty but the students are not.
+
+    Databases that predate the summary tables start out that way.  Run once
+    at startup by ``database.init_db``, never from a read: two first
+    requests would both rebuild, and one of them fail on the other's rows.
+    """
+    if db.query(DepartmentStats.department).first() is not None or db.query(StudentData.student_id).first() is None:
+        return
+    try:
+        rebuild(db)
+    except IntegrityError:
+        # Another process starting up built them first
+        db.rollback()
+
+
+def chart_data(db: Session):
+    per_department = defaultdict(lambda: {"passed": 0, "failed": 0})
+    per_semester = defaultdict(lambda: [0.0, 0])
+    for row in db.query(DepartmentSemesterStats).order_by(DepartmentSemesterStats.department):
+        per_department[row.department]["passed"] += row.passed
+        per_department[row.department]["failed"] += row.failed
+        per_semester[row.semester][0] += row.cgpa_sum
+        per_semester[row.semester][1] += row.cgpa_count
+
+    bar_chart_data = [
+        {"department": dept or "Unknown", "passed": counts["passed"], "failed": counts["failed"]}
+        for dept, counts in per_department.items()
+        if counts["passed"] or counts["failed"]
+    ]
+
+    pie_chart_data = {
+        "passed": sum(counts["passed"] for counts in per_department.values()),
+        "failed": sum(counts["failed"] for counts in per_department.values()),
+    }
+
+    semesters = sorted(sem for sem, (_, count) in per_semester.items() if count and sem != UNKNOWN_SEMESTER)
+    line_chart_data = {
+        "semesters": [f"Sem {sem}" for sem in semesters],
+        "average_cgpa": [round(per_semester[sem][0] / per_semester[sem][1], 2) for sem in semesters],
+    }
+
+    dept_rows = (
+        db.query(DepartmentStats)
+        .filter(DepartmentStats.student_count > 0)
+        .order_by(DepartmentStats.department)
+        .all()
+    )
+    horizontal_bar_chart_data = {
+        "departments": [row.department or "Unknown" for row in dept_rows],
+        "student_counts": [row.student_count for row in dept_rows],
+    }
+
+    return {
+        "bar_chart": bar_chart_data,
+        "pie_chart": pie_chart_data,
+        "line_chart": line_chart_data,
+        "horizontal_bar_chart": horizontal_bar_chart_data,
+    }
+
+
+def counters(db: Session):
+    """The dashboard's numbers, keyed for diffing: per department and per semester."""
+    departments = defaultdict(lambda: {"students": 0, "passed": 0, "failed": 0})
+    per_semester = defaultdict(lambda: [0.0, 0])
+    for row in db.query(DepartmentSemesterStats):
+        totals = departments[row.department or "Unknown"]
+        totals["passed"] += row.passed
+        totals["failed"] += row.failed
+        per_semester[row.semester][0] += row.cgpa_sum
+        per_semester[row.semester][1] += row.cgpa_count
+    for row in db.query(DepartmentStats):
+        departments[row.department or "Unknown"]["students"] = row.student_count
+
+    return {
+        "departments": {department: totals for department, totals in departments.items() if any(totals.values())},
+        "semesters": {
+            str(semester): {"average_cgpa": round(total / count, 2)}
+            for semester, (total, count) in sorted(per_semester.items())
+            if count and semester != UNKNOWN_SEMESTER
+        },
+    }
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["rebuild"]:
+        sys.exit("usage: python aggregates.py rebuild")
+
+    from database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        rebuild(session)
+        print("Dashboard aggregates rebuilt")
+    finally:
+        session.close()
@@ -0,0 +1,284 @@
+"""Vectorized cohort statistics over ``student_sem_info``.
+
+The sem table is loaded once into columnar NumPy arrays (one array per
+column, string columns factorized into integer codes) and kept until a
+write commits, at which point the next request reloads it.  Grouped
+statistics are computed with ``bincount``/``lexsort`` over the group codes,
+so the cost is a few passes over the arrays no matter how many groups there
+are.
+"""
+import threading
+import time
+from operator import itemgetter
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import select
+
+import config
+from aggregates import _pass_fail_bucket
+from changes import on_all_students_changed, on_students_changed
+from jobs import job
+from models import StudentData, StudentInfo, StudentSemInfo
+from schemas import ReportJobParams
+from synced import primary_sessions
+
+DIMENSIONS = ("department", "subject", "semester", "year")
+METRICS = ("mark", "cgpa")
+DEFAULT_PERCENTILES = (25, 50, 75, 90)
+# Histogram range per metric when the caller does not pass one
+DEFAULT_RANGES = {"mark": (0.0, 100.0), "cgpa": (0.0, 10.0)}
+DEFAULT_BINS = 10
+
+
+def _factorize(values, size):
+    """Integer codes into sorted labels, with None (NULL) sorted last."""
+    labels = sorted(set(values), key=lambda label: (label is None, label))
+    code_of = {label: code for code, label in enumerate(labels)}
+    return np.fromiter(map(code_of.__getitem__, values), dtype=np.intp, count=size), labels
+
+
+class Cohort:
+    """The sem table as arrays; row i of every array is one sem row."""
+
+    def __init__(self, rows):
+        self.size = len(rows)
+        student_id, department, year, semester, subject, mark, cgpa, pass_fail = (
+            list(map(itemgetter(i), rows)) for i in range(8)
+        )
+        self.student_id = np.array(student_id, dtype=np.int64)
+        self.mark = np.array(mark, dtype=float)
+        self.cgpa = np.array(cgpa, dtype=float)
+
+        outcome_codes, outcomes = _factorize(pass_fail, self.size)
+        buckets = [_pass_fail_bucket(outcome) for outcome in outcomes]
+        self.passed = np.array([bucket == "passed" for bucket in buckets], dtype=bool)[outcome_codes]
+        self.graded = np.array([bucket is not None for bucket in buckets], dtype=bool)[outcome_codes]
+
+        self.codes = {}
+        self.labels = {}
+        for name, values in (
+            ("department", department), ("subject", subject), ("semester", semester), ("year", year)
+        ):
+            self.codes[name], self.labels[name] = _factorize(values, self.size)
+
+    def mask(self, filters: Dict[str, object]):
+        """Boolean row mask for equality filters on the dimensions."""
+        keep = np.ones(self.size, dtype=bool)
+        for name, value in filters.items():
+            if value is None:
+                continue
+            try:
+                code = self.labels[name].index(value)
+            except ValueError:
+                return np.zeros(self.size, dtype=bool)
+            keep &= self.codes[name] == code
+        return keep
+
+    def groups(self, by: Sequence[str], keep):
+        """Dense group index per kept row, and the label tuple of each group."""
+        if not by:
+            return np.zeros(int(keep.sum()), dtype=np.intp), [()]
+        codes = [self.codes[name][keep] for name in by]
+        shape = [len(self.labels[name]) for name in by]
+        combined = np.ravel_multi_index(codes, shape) if codes[0].size else np.zeros(0, dtype=np.intp)
+        keys, group = np.unique(combined, return_inverse=True)
+        unravelled = np.unravel_index(keys, shape)
+        labels = [
+            tuple(self.labels[name][unravelled[i][g]] for i, name in enumerate(by))
+            for g in range(len(keys))
+        ]
+        return group.astype(np.intp), labels
+
+
+def _grouped_stats(values, group, n_groups, percentiles):
+    valid = ~np.isnan(values)
+    v, g = values[valid], group[valid]
+
+    count = np.bincount(g, minlength=n_groups)
+    total = np.bincount(g, weights=v, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+        # Two passes, so the variance does not suffer from cancellation
+        std = np.sqrt(np.bincount(g, weights=(v - mean[g]) ** 2, minlength=n_groups) / count)
+
+    names = ["min", "max"] + [f"p{q:g}" for q in percentiles]
+    stats = {"count": count, "mean": mean, "std": std}
+    if not v.size:
+        stats.update((name, np.full(n_groups, np.nan)) for name in names)
+        return stats
+
+    # Values sorted within each group; group g occupies ordered[starts[g]:starts[g] + count[g]]
+    by_value = np.argsort(v, kind="stable")
+    ordered = v[by_value[np.argsort(g[by_value], kind="stable")]]
+    starts = np.concatenate(([0], np.cumsum(count)[:-1]))
+    present = count > 0
+
+    def at(offset):
+        return ordered[np.minimum(starts + offset, v.size - 1)]
+
+    stats["min"] = np.where(present, at(0), np.nan)
+    stats["max"] = np.where(present, at(np.maximum(count - 1, 0)), np.nan)
+    for q in percentiles:
+        # Linear interpolation between closest ranks, as np.percentile does
+        pos = np.maximum(count - 1, 0) * (q / 100.0)
+        lo = np.floor(pos).astype(np.intp)
+        low, high = at(lo), at(np.ceil(pos).astype(np.intp))
+        stats[f"p{q:g}"] = np.where(present, low + (high - low) * (pos - lo), np.nan)
+    return stats
+
+
+def _number(value, digits=3):
+    if isinstance(value, (np.integer, int)):
+        return int(value)
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+class CohortAnalytics:
+    """Holds the current ``Cohort`` and reloads it after writes."""
+
+    def __init__(self, session_factory, max_age: float):
+        self.session_factory = session_factory
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._cohort: Optional[Cohort] = None
+        self._loaded_at = 0.0
+        self._load_ms = 0.0
+        # Bumped by invalidate(); a load that started before a bump is still
+        # served to its caller but not kept.
+        self._epoch = 0
+        self.loads = 0
+
+    def invalidate(self, student_ids=None):
+        with self._lock:
+            self._epoch += 1
+            self._cohort = None
+
+    def _query(self):
+        return (
+            select(
+                StudentSemInfo.student_id,
+                StudentData.department,
+                StudentInfo.year,
+                StudentSemInfo.semester,
+                StudentSemInfo.subject,
+                StudentSemInfo.mark,
+                StudentSemInfo.cgpa,
+                StudentSemInfo.pass_fail,
+            )
+            .select_from(StudentSemInfo)
+            .outerjoin(StudentData, StudentData.student_id == StudentSemInfo.student_id)
+            .outerjoin(StudentInfo, StudentInfo.student_info_id == StudentSemInfo.student_info_id)
+        )
+
+    def _current(self):
+        with self._lock:
+            if self._cohort is not None and time.monotonic() - self._loaded_at < self.max_age:
+                return self._cohort
+            return None
+
+    def cohort(self) -> Cohort:
+        cohort = self._current()
+        if cohort is not None:
+            return cohort
+
+        # One reload at a time; requests that queue behind it reuse its result
+        with self._load_lock:
+            cohort = self._current()
+            if cohort is not None:
+                return cohort
+            with self._lock:
+                epoch = self._epoch
+
+            started = time.perf_counter()
+            db = self.session_factory()
+            try:
+                cohort = Cohort(db.execute(self._query()).all())
+            finally:
+                db.close()
+
+            with self._lock:
+                self.loads += 1
+                self._load_ms = (time.perf_counter() - started) * 1000
+                if epoch == self._epoch:
+                    self._cohort = cohort
+                    self._loaded_at = time.monotonic()
+            return cohort
+
+    def summary(self, metric: str, by: Sequence[str], filters, percentiles=DEFAULT_PERCENTILES) -> List[dict]:
+        cohort = self.cohort()
+        keep = cohort.mask(filters)
+        group, labels = cohort.groups(by, keep)
+        values = getattr(cohort, metric)[keep]
+        stats = _grouped_stats(values, group, len(labels), percentiles)
+
+        graded = np.bincount(group, weights=cohort.graded[keep], minlength=len(labels))
+        passed = np.bincount(group, weights=cohort.passed[keep], minlength=len(labels))
+        rows = np.bincount(group, minlength=len(labels))
+
+        result = []
+        for g, label in enumerate(labels):
+            if not rows[g]:
+                continue
+            entry = dict(zip(by, label))
+            entry.update({name: _number(column[g]) for name, column in stats.items()})
+            entry["rows"] = int(rows[g])
+            entry["pass_rate"] = round(float(passed[g] / graded[g]), 4) if graded[g] else None
+            result.append(entry)
+        return result
+
+    def histogram(self, metric: str, by: Sequence[str], filters, bins: int, value_range=None) -> dict:
+        cohort = self.cohort()
+        keep = cohort.mask(filters)
+        group, labels = cohort.groups(by, keep)
+        values = getattr(cohort, metric)[keep]
+
+        low, high = value_range or DEFAULT_RANGES[metric]
+        edges = np.linspace(low, high, bins + 1)
+        valid = ~np.isnan(values) & (values >= low) & (values <= high)
+        # Right edge is inclusive for the last bin, like np.histogram
+        slot = np.clip(np.searchsorted(edges, values[valid], side="right") - 1, 0, bins - 1)
+        counts = np.bincount(group[valid] * bins + slot, minlength=len(labels) * bins).reshape(len(labels), bins)
+
+        return {
+            "metric": metric,
+            "edges": [round(float(edge), 4) for edge in edges],
+            "groups": [
+                {**dict(zip(by, label)), "counts": counts[g].tolist()}
+                for g, label in enumerate(labels)
+                if counts[g].any()
+            ],
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rows": self._cohort.size if self._cohort is not None else None,
+                "loads": self.loads,
+                "last_load_ms": round(self._load_ms, 3),
+                "age_seconds": round(time.monotonic() - self._loaded_at, 3) if self._cohort is not None else None,
+            }
+
+
+# From the primary: a reload right after a write's invalidation must see it,
+# or a lagging replica's arrays are kept for up to ANALYTICS_MAX_AGE
+cohort_analytics = CohortAnalytics(primary_sessions(), max_age=config.ANALYTICS_MAX_AGE)
+
+
+@job("analytics_report", ReportJobParams, process=True)
+def report(metrics=("mark", "cgpa"), by=("department", "semester")):
+    """Summaries and histograms of every metric, computed in a worker process."""
+    # A worker process hears of no writes, so it always starts from a fresh load
+    cohort_analytics.invalidate()
+    return {
+        metric: {
+            "summary": cohort_analytics.summary(metric, by, {}),
+            "histogram": cohort_analytics.histogram(metric, by, {}, bins=DEFAULT_BINS),
+        }
+        for metric in metrics
+    }
+# Writes through the API invalidate immediately; max_age covers anything
+# written to the database behind the API's back.
+on_students_changed(cohort_analytics.invalidate)
+on_all_students_changed(cohort_analytics.invalidate)
@@ -0,0 +1,98 @@
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from analytics import DEFAULT_BINS, DEFAULT_PERCENTILES, cohort_analytics
+from instrumentation import TimedRoute
+
+router = APIRouter(prefix="/analytics", tags=["analytics"], route_class=TimedRoute)
+
+Metric = Literal["mark", "cgpa"]
+Dimension = Literal["department", "subject", "semester", "year"]
+
+MAX_BINS = 200
+
+
+def _filters(department, subject, semester, year):
+    return {"department": department, "subject": subject, "semester": semester, "year": year}
+
+
+def _group_by(by: List[str]):
+    if len(set(by)) != len(by):
+        raise HTTPException(status_code=400, detail="Duplicate group-by dimension")
+    return by
+
+
+@router.get("/summary")
+def get_summary(
+    metric: Metric = "mark",
+    by: List[Dimension] = Query(default=["department"]),
+    percentiles: Optional[str] = Query(None, description="Comma-separated, e.g. 10,50,90"),
+    department: Optional[str] = None,
+    subject: Optional[str] = None,
+    semester: Optional[int] = None,
+    year: Optional[int] = None,
+):
+    """Count, mean, std, min/max, percentiles and pass rate of ``metric`` per group."""
+    if percentiles:
+        try:
+            qs = tuple(float(q) for q in percentiles.split(","))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid percentiles")
+        if not all(0 <= q <= 100 for q in qs):
+            raise HTTPException(status_code=400, detail="Percentiles must be between 0 and 100")
+    else:
+        qs = DEFAULT_PERCENTILES
+
+    return {
+        "metric": metric,
+        "by": by,
+        "groups": cohort_analytics.summary(
+            metric, _group_by(by), _filters(department, subject, semester, year), qs
+        ),
+    }
+
+
+@router.get("/histogram")
+def get_histogram(
+    metric: Metric = "mark",
+    by: List[Dimension] = Query(default=[]),
+    bins: int = Query(DEFAULT_BINS, ge=1, le=MAX_BINS),
+    low: Optional[float] = None,
+    high: Optional[float] = None,
+    department: Optional[str] = None,
+    subject: Optional[str] = None,
+    semester: Optional[int] = None,
+    year: Optional[int] = None,
+):
+    """Histogram of ``metric`` per group; defaults to 0-100 for marks and 0-10 for CGPA."""
+    value_range = None
+    if low is not None or high is not None:
+        if low is None or high is None or low >= high:
+            raise HTTPException(status_code=400, detail="low and high must both be set, with low < high")
+        value_range = (low, high)
+
+    return cohort_analytics.histogram(
+        metric, _group_by(by), _filters(department, subject, semester, year), bins, value_range
+    )
+
+
+@router.get("/pass-rates")
+def get_pass_rates(
+    by: List[Dimension] = Query(default=["department"]),
+    department: Optional[str] = None,
+    subject: Optional[str] = None,
+    semester: Optional[int] = None,
+    year: Optional[int] = None,
+):
+    """Pass rate per group, shaped for the dashboard charts."""
+    groups = cohort_analytics.summary("mark", _group_by(by), _filters(department, subject, semester, year), ())
+    return [
+        {**{name: group[name] for name in by}, "rows": group["rows"], "pass_rate": group["pass_rate"]}
+        for group in groups
+    ]
+
+
+@router.get("/status")
+def get_status():
+    return cohort_analytics.stats()
@@ -0,0 +1,159 @@
+"""Async versions of the full-student CRUD routes in routes.py.
+
+Mounted instead of their sync counterparts when DB_MODE=async.  The
+aggregate bookkeeping is shared with the sync routes through
+``AsyncSession.run_sync``.  GET /student_full/{student_id} answers from the
+same profile cache as the sync route, with the batched loader behind it.
+"""
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import delete, or_, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from starlette.concurrency import run_in_threadpool
+
+import aggregates
+from cache import profile_cache
+from changes import mark_changed
+from database import get_async_db
+from instrumentation import TimedRoute
+from models import StudentData, StudentInfo, StudentRecord, StudentSemInfo
+from repository import full_response, load_cached_profile
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, filter_students, keyset_window, split_page
+from schemas import FullStudentCreate, FullStudentPage, FullStudentResponse, FullStudentUpdate
+
+router = APIRouter(route_class=TimedRoute)
+
+
+def _with_relations(stmt):
+    # Lazy loads cannot run under an AsyncSession, so everything is eager
+    return stmt.options(
+        selectinload(StudentData.info),
+        selectinload(StudentData.sem_infos),
+        selectinload(StudentData.record),
+    )
+
+
+async def _load_student(db: AsyncSession, student_id: int):
+    stmt = _with_relations(select(StudentData).where(StudentData.student_id == student_id))
+    return (await db.execute(stmt)).scalars().first()
+
+
+@router.post("/student_full/", response_model=dict)
+async def create_full_student(payload: FullStudentCreate, db: AsyncSession = Depends(get_async_db)):
+    try:
+        existing_student = (await db.execute(
+            select(StudentData).where(or_(
+                StudentData.register_num == payload.student.register_num,
+                StudentData.university_num == payload.student.university_num,
+            )).limit(1)
+        )).scalars().first()
+
+        if existing_student:
+            return {
+                "student_id": existing_student.student_id,
+                "message": "Student already exists, using existing student_id"
+            }
+
+        new_student = StudentData(**payload.student.model_dump())
+        db.add(new_student)
+        await db.flush()
+
+        new_info = StudentInfo(student_id=new_student.student_id, **payload.info.model_dump())
+        db.add(new_info)
+        await db.flush()
+
+        db.add(StudentSemInfo(
+            student_id=new_student.student_id,
+            student_info_id=new_info.student_info_id,
+            **payload.sem_info.model_dump(),
+        ))
+        db.add(StudentRecord(student_id=new_student.student_id, **payload.record.model_dump()))
+
+        await db.run_sync(aggregates.apply, [new_student.student_id])
+        mark_changed(db, [new_student.student_id], created=True)
+        await db.commit()
+
+        return {
+            "student_id": new_student.student_id,
+            "student_info_id": new_info.student_info_id,
+            "message": "All records created successfully"
+        }
+
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+@router.get("/student_full/{student_id}", response_model=FullStudentResponse)
+async def get_full_student(student_id: int, request: Request):
+    # The sync route's cache, ETag and loader; only a miss leaves the event loop
+    cached = profile_cache.get(student_id) or await run_in_threadpool(load_cached_profile, student_id)
+    if cached is None:
+        raise HTTPException(status_code=404, detail="Student not found")
+    return cached.response(request.headers.get("if-none-match"))
+
+
+@router.get("/students_full/", response_model=FullStudentPage)
+async def get_all_students(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    department: Optional[str] = None,
+    year: Optional[int] = None,
+    semester: Optional[int] = None,
+    order: Literal["asc", "desc"] = "asc",
+    db: AsyncSession = Depends(get_async_db)
+):
+    stmt = filter_students(_with_relations(select(StudentData)), department, year, semester)
+    stmt = keyset_window(stmt, cursor, limit, order)
+    students, next_cursor = split_page((await db.execute(stmt)).scalars().all(), limit, order)
+    return {"items": [full_response(s) for s in students], "next_cursor": next_cursor}
+
+
+@router.put("/students/{student_id}", response_model=FullStudentResponse)
+async def update_full_student(
+    student_id: int,
+    payload: FullStudentUpdate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    db_student = await _load_student(db, student_id)
+    if not db_student or not db_student.info or not db_student.sem_infos or not db_student.record:
+        raise HTTPException(status_code=404, detail="Student not found")
+
+    await db.run_sync(aggregates.retract, [student_id])
+
+    sections = [
+        (db_student, payload.student),
+        (db_student.info, payload.info),
+        (db_student.sem_infos[0], payload.sem_info),
+        (db_student.record, payload.record),
+    ]
+    for row, section in sections:
+        for key, value in section.model_dump(exclude_unset=True).items():
+            setattr(row, key, value)
+
+    await db.run_sync(aggregates.apply, [student_id])
+    mark_changed(db, [student_id])
+    await db.commit()
+    return full_response(db_student)
+
+
+@router.delete("/students/{student_id}", response_model=dict)
+async def delete_full_student(student_id: int, db: AsyncSession = Depends(get_async_db)):
+    # The info, sem and record rows go with the student (ON DELETE CASCADE)
+    try:
+        await db.run_sync(aggregates.retract, [student_id])
+        result = await db.execute(delete(StudentData).where(StudentData.student_id == student_id))
+        if not result.rowcount:
+            await db.rollback()
+            raise HTTPException(status_code=404, detail="Student not found")
+        mark_changed(db, [student_id])
+        await db.commit()
+
+        return {"message": f"Student with ID {student_id} and related records deleted successfully."}
+
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Deletion failed: {str(e)}")
@@ -1,185 +1,96 @@
-from fastapi import FastAPI, HTTPException, Depends, Request
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from sqlalchemy import create_engine, Column, Integer, String, Date, Float, ForeignKey, BigInteger, text
-from sqlalchemy.orm import declarative_base, sessionmaker, relationship, Session
-from urllib.parse import quote_plus
+"""The per-table CRUD routes: one row of student_data, student_info,
+student_sem_info or student_record at a time, plus their batch variants.
+Mounted next to the full-student routes by server.create_app().
+"""
 from typing import List
-from datetime import date
-from fastapi import Depends
-import openai
-from dotenv import load_dotenv
-load_dotenv()
-
-# OpenAI API Key
-import os
-openai.api_key = os.getenv("OPENAI_API_KEY")
-
-
-app = FastAPI()
-
-# CORS middleware for frontend localhost:5173
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:5173"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# =====================
-# Database config - your student_data DB (fixed connection)
-# =====================
 
-DB_USER = "root"
-DB_PASSWORD = quote_plus("Cinthiya@30")
-DB_HOST = "localhost"
-DB_NAME = "college"
-
-DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+import aggregates
+import batch
+import grading  # noqa: F401 (derives grades/CGPA before each commit)
+import models
+import patch
+from changes import mark_changed
+from database import get_db, get_read_db
+from fastjson import json_response, rows_to_dicts, schema_columns
+from instrumentation import TimedRoute
+from models import StudentData, StudentInfo, StudentRecord, StudentSemInfo
+from schemas import (
+    BatchItems,
+    StudentDataRow,
+    StudentDataRowPatch,
+    StudentInfoRow,
+    StudentInfoRowPatch,
+    StudentRecordRow,
+    StudentRecordRowPatch,
+    StudentSemInfoRow,
+    StudentSemInfoRowPatch,
+)
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
-Base = declarative_base()
+router = APIRouter(tags=["tables"], route_class=TimedRoute)
 
 # =====================
-# SQLAlchemy Models
+# Batch variants of the CRUD routes (batch.py)
 # =====================
 
-class StudentData(Base):
-    __tablename__ = "student_data"
-    student_id = Column(Integer, primary_key=True, index=True)
-    student_name = Column(String(100))
-    dob = Column(Date)
-    department = Column(String(100))
-    register_num = Column(String(50))
-    university_num = Column(Integer)
-    student_infos = relationship("StudentInfo", back_populates="student_data")
-    student_sem_infos = relationship("StudentSemInfo", back_populates="student_data")
-    student_records = relationship("StudentRecord", back_populates="student_data")
-
-class StudentInfo(Base):
-    __tablename__ = "student_info"
-    student_info_id = Column(Integer, primary_key=True, index=True)
-    student_id = Column(Integer, ForeignKey("student_data.student_id"))
-    address = Column(String(255))
-    blood_grp = Column(String(10))
-    mail_id = Column(String(100))
-    phone_no = Column(BigInteger)
-    year = Column(Integer)
-    student_data = relationship("StudentData", back_populates="student_infos")
-    student_sem_infos = relationship("StudentSemInfo", back_populates="student_info")
-
-class StudentSemInfo(Base):
-    __tablename__ = "student_sem_info"
-    sem_info_id = Column(Integer, primary_key=True, index=True)
-    student_id = Column(Integer, ForeignKey("student_data.student_id"))
-    student_info_id = Column(Integer, ForeignKey("student_info.student_info_id"))
-    cgpa = Column(Float)
-    semester = Column(Integer)
-    pass_fail = Column(String(10))
-    grade = Column(String(5))
-    mark = Column(Integer)
-    subject = Column(String(100))
-    student_data = relationship("StudentData", back_populates="student_sem_infos")
-    student_info = relationship("StudentInfo", back_populates="student_sem_infos")
-
-class StudentRecord(Base):
-    __tablename__ = "student_record"
-    
-    student_record_id = Column(Integer, primary_key=True, index=True)
-    student_id = Column(Integer, ForeignKey("student_data.student_id"))
-    father_name = Column(String(100))
-    mother_name = Column(String(100))
-    father_occupation = Column(String(100))
-    aadhar_num = Column(BigInteger)
-    tenth_mark = Column(Integer)
-    twelfth_mark = Column(Integer)
-    account_num = Column(BigInteger)
-    community = Column(String(50))
-    religion = Column(String(50))
-    nationality = Column(String(50))
-    
-    student_data = relationship("StudentData", back_populates="student_records")
+student_data_batch = batch.TableBatch(
+    models.StudentData, StudentDataRow, "Student",
+    unique=[models.StudentData.register_num, models.StudentData.university_num],
+    aggregated=True,
+)
+student_info_batch = batch.TableBatch(
+    models.StudentInfo, StudentInfoRow, "Student info",
+    parents={"student_id": models.StudentData.student_id},
+)
+student_sem_info_batch = batch.TableBatch(
+    models.StudentSemInfo, StudentSemInfoRow, "Student semester info",
+    parents={"student_id": models.StudentData.student_id, "student_info_id": models.StudentInfo.student_info_id},
+    aggregated=True,
+)
+student_record_batch = batch.TableBatch(
+    models.StudentRecord, StudentRecordRow, "Student record",
+    parents={"student_id": models.StudentData.student_id},
+)
 
 
-# =====================
-# Pydantic Schemas
-# =====================
+def batch_ids(ids: List[str] = Query(..., description="Comma separated, or repeated")):
+    try:
+        return batch.parse_ids(ids)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
-class StudentDataBase(BaseModel):
-    student_id: int
-    student_name: str
-    dob: date
-    department: str
-    register_num: str
-    university_num: int
-
-    class Config:
-        orm_mode = True
-
-class StudentInfoBase(BaseModel):
-    student_info_id: int
-    student_id: int
-    address: str
-    blood_grp: str
-    mail_id: str
-    phone_no: int
-    year: int
-
-    class Config:
-        orm_mode = True
-
-class StudentSemInfoBase(BaseModel):
-    student_id: int
-    student_info_id: int
-    cgpa: float
-    semester: int
-    pass_fail: str
-    grade: str
-    mark: int
-    subject: str
-
-    class Config:
-        orm_mode = True
-
-class StudentRecordBase(BaseModel):
-    student_id: int
-    father_name: str
-    mother_name: str
-    father_occupation: str
-    aadhar_num: int
-    tenth_mark: int
-    twelfth_mark: int
-    account_num: int
-    community: str
-    religion: str
-    nationality: str
-
-    class Config:
-        orm_mode = True
 
-# =====================
-# Dependency - DB session for student_data DB
-# =====================
+def batch_items(payload: BatchItems):
+    if len(payload.root) > batch.MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=422, detail=f"At most {batch.MAX_BATCH_ITEMS} items per request")
+    return payload.root
+
 
-def get_db():
-    db = SessionLocal()
+def commit_batch(db: Session, outcome, created=False):
+    result, student_ids = outcome
+    mark_changed(db, student_ids, created)
     try:
-        yield db
-    finally:
-        db.close()
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    return result
 
 # =====================
 # CRUD routes for student_data tables
 # =====================
 
 # student_data
-@app.post("/student_data/", response_model=StudentDataBase)
-def create_student_data(data: StudentDataBase, db: Session = Depends(get_db)):
-    student = StudentData(**data.dict())
+@router.post("/student_data/", response_model=StudentDataRow)
+def create_student_data(data: StudentDataRow, db: Session = Depends(get_db)):
+    student = StudentData(**data.model_dump())
     try:
         db.add(student)
+        aggregates.apply(db, [data.student_id])
+        mark_changed(db, [data.student_id], created=True)
         db.commit()
         db.refresh(student)
         return student
@@ -187,44 +98,74 @@ def create_student_data(data: StudentDataBase, db: Session = Depends(get_db)):
         db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/student_data/", response_model=List[StudentDataBase])
-def read_all_student_data(db: Session = Depends(get_db)):
-    return db.query(StudentData).all()
+@router.get("/student_data/batch")
+def read_student_data_batch(ids: List[int] = Depends(batch_ids), db: Session = Depends(get_read_db)):
+    return json_response(student_data_batch.get(db, ids))
 
-@app.get("/student_data/{student_id}", response_model=StudentDataBase)
-def read_student_data_by_id(student_id: int, db: Session = Depends(get_db)):
+@router.post("/student_data/batch")
+def create_student_data_batch(items: list = Depends(batch_items), db: Session = Depends(get_db)):
+    return commit_batch(db, student_data_batch.create(db, items), created=True)
+
+@router.put("/student_data/batch")
+def update_student_data_batch(items: list = Depends(batch_items), db: Session = Depends(get_db)):
+    return commit_batch(db, student_data_batch.update(db, items))
+
+@router.delete("/student_data/batch")
+def delete_student_data_batch(ids: List[int] = Depends(batch_ids), db: Session = Depends(get_db)):
+    return commit_batch(db, student_data_batch.delete(db, ids))
+
+@router.get("/student_data/{student_id}", response_model=StudentDataRow)
+def read_student_data_by_id(student_id: int, db: Session = Depends(get_read_db)):
     student = db.query(StudentData).filter(StudentData.student_id == student_id).first()
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     return student
 
-@app.put("/student_data/{student_id}")
-def update_student_data(student_id: int, data: StudentDataBase, db: Session = Depends(get_db)):
+@router.put("/student_data/{student_id}")
+def update_student_data(student_id: int, data: StudentDataRow, db: Session = Depends(get_db)):
     student = db.query(StudentData).filter(StudentData.student_id == student_id).first()
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
-    for field, value in data.dict().items():
+    aggregates.retract(db, {student_id, data.student_id})
+    for field, value in data.model_dump().items():
         setattr(student, field, value)
+    aggregates.apply(db, {student_id, data.student_id})
+    mark_changed(db, {student_id, data.student_id})
     db.commit()
-    db.refresh(student)
     return {"message": "Student data updated", "student_data": data}
 
 
-@app.delete("/student_data/{student_id}")
+@router.patch("/student_data/{student_id}")
+def patch_student_data(student_id: int, data: StudentDataRowPatch, db: Session = Depends(get_db)):
+    values = data.model_dump(exclude_unset=True)
+    try:
+        found = patch.patch_rows(db, models.StudentData, models.StudentData.student_id == student_id, values, [student_id])
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    if not found:
+        raise HTTPException(status_code=404, detail="Student not found")
+    return {"message": "Student data updated", "updated": sorted(values)}
+
+@router.delete("/student_data/{student_id}")
 def delete_student_data(student_id: int, db: Session = Depends(get_db)):
-    student = db.query(StudentData).filter(StudentData.student_id == student_id).first()
-    if not student:
+    # One DELETE; the database removes the student's info, sem and record rows
+    aggregates.retract(db, [student_id])
+    if not db.query(StudentData).filter(StudentData.student_id == student_id).delete(synchronize_session=False):
+        db.rollback()
         raise HTTPException(status_code=404, detail="Student not found")
-    db.delete(student)
+    mark_changed(db, [student_id])
     db.commit()
     return {"message": f"Student data with id {student_id} deleted"}
 
 # student_info
-@app.post("/student_info/", response_model=StudentInfoBase)
-def create_student_info(data: StudentInfoBase, db: Session = Depends(get_db)):
-    info = StudentInfo(**data.dict())
+@router.post("/student_info/", response_model=StudentInfoRow)
+def create_student_info(data: StudentInfoRow, db: Session = Depends(get_db)):
+    info = StudentInfo(**data.model_dump())
     try:
         db.add(info)
+        mark_changed(db, [data.student_id])
         db.commit()
         db.refresh(info)
         return info
@@ -232,43 +173,77 @@ def create_student_info(data: StudentInfoBase, db: Session = Depends(get_db)):
         db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/student_info/", response_model=List[StudentInfoBase])
-def read_all_student_info(db: Session = Depends(get_db)):
-    return db.query(StudentInfo).all()
+@router.get("/student_info/batch")
+def read_student_info_batch(ids: List[int] = Depends(batch_ids), db: Session = Depends(get_read_db)):
+    return json_response(student_info_batch.get(db, ids))
 
-@app.get("/student_info/{student_info_id}", response_model=StudentInfoBase)
-def read_student_info_by_id(student_info_id: int, db: Session = Depends(get_db)):
+@router.post("/student_info/batch")
+def create_student_info_batch(items: list = Depends(batch_items), db: Session = Depends(get_db)):
+    return commit_batch(db, student_info_batch.create(db, items))
+
+@router.put("/student_info/batch")
+def update_student_info_batch(items: list = Depends(batch_items), db: Session = Depends(get_db)):
+    return commit_batch(db, student_info_batch.update(db, items))
+
+@router.delete("/student_info/batch")
+def delete_student_info_batch(ids: List[int] = Depends(batch_ids), db: Session = Depends(get_db)):
+    return commit_batch(db, student_info_batch.delete(db, ids))
+
+@router.get("/student_info/", response_model=List[StudentInfoRow])
+def read_all_student_info(db: Session = Depends(get_read_db)):
+    return json_response(rows_to_dicts(db.query(*schema_columns(StudentInfo, StudentInfoRow)).all()))
+
+@router.get("/student_info/{student_info_id}", response_model=StudentInfoRow)
+def read_student_info_by_id(student_info_id: int, db: Session = Depends(get_read_db)):
     info = db.query(StudentInfo).filter(StudentInfo.student_info_id == student_info_id).first()
     if not info:
         raise HTTPException(status_code=404, detail="Student info not found")
     return info
 
-@app.put("/student_info/{student_info_id}")
-def update_student_info(student_info_id: int, data: StudentInfoBase, db: Session = Depends(get_db)):
+@router.put("/student_info/{student_info_id}")
+def update_student_info(student_info_id: int, data: StudentInfoRow, db: Session = Depends(get_db)):
     info = db.query(StudentInfo).filter(StudentInfo.student_info_id == student_info_id).first()
     if not info:
         raise HTTPException(status_code=404, detail="Student info not found")
-    for field, value in data.dict().items():
+    mark_changed(db, {info.student_id, data.student_id})
+    for field, value in data.model_dump().items():
         setattr(info, field, value)
     db.commit()
-    db.refresh(info)
     return {"message": "Student info updated", "student_info": data}
 
-@app.delete("/student_info/{student_info_id}")
+@router.patch("/student_info/{student_info_id}")
+def patch_student_info(student_info_id: int, data: StudentInfoRowPatch, db: Session = Depends(get_db)):
+    values = data.model_dump(exclude_unset=True)
+    owner = db.query(models.StudentInfo.student_id).filter(models.StudentInfo.student_info_id == student_info_id).scalar()
+    if owner is None:
+        raise HTTPException(status_code=404, detail="Student info not found")
+    try:
+        patch.patch_rows(db, models.StudentInfo, models.StudentInfo.student_info_id == student_info_id, values, {owner, values.get("student_id", owner)})
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": "Student info updated", "updated": sorted(values)}
+
+@router.delete("/student_info/{student_info_id}")
 def delete_student_info(student_info_id: int, db: Session = Depends(get_db)):
     info = db.query(StudentInfo).filter(StudentInfo.student_info_id == student_info_id).first()
     if not info:
         raise HTTPException(status_code=404, detail="Student info not found")
+    mark_changed(db, [info.student_id])
     db.delete(info)
     db.commit()
     return {"message": f"Student info with id {student_info_id} deleted"}
 
 # student_sem_info
-@app.post("/student_sem_info/", response_model=StudentSemInfoBase)
-def create_student_sem_info(data: StudentSemInfoBase, db: Session = Depends(get_db)):
-    sem_info = StudentSemInfo(**data.dict())
+@router.post("/student_sem_info/", response_model=StudentSemInfoRow)
+def create_student_sem_info(data: StudentSemInfoRow, db: Session = Depends(get_db)):
+    sem_info = StudentSemInfo(**data.model_dump())
     try:
+        aggregates.retract(db, [data.student_id])
         db.add(sem_info)
+        aggregates.apply(db, [data.student_id])
+        mark_changed(db, [data.student_id])
         db.commit()
         db.refresh(sem_info)
         return sem_info
@@ -276,79 +251,148 @@ def create_student_sem_info(data: StudentSemInfoBase, db: Session = Depends(get_
         db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/student_sem_info/", response_model=List[StudentSemInfoBase])
-def read_all_student_sem_info(db: Session = Depends(get_db)):
-    return db.query(StudentSemInfo).all()
+@router.get("/student_sem_info/batch")
+def read_student_sem_info_batch(ids: List[int] = Depends(batch_ids), db: Session = Depends(get_read_db)):
+    return json_response(student_sem_info_batch.get(db, ids))
+
+@router.post("/student_sem_info/batch")
+def create_student_sem_info_batch(items: list = Depends(batch_items), db: Session = Depends(get_db)):
+    return commit_batch(db, student_sem_info_batch.create(db, items))
+
+@router.put("/student_sem_info/batch")
+def update_student_sem_info_batch(items: list = Depends(batch_items), db: Session = Depends(get_db)):
+    return commit_batch(db, student_sem_info_batch.update(db, items))
 
-@app.get("/student_sem_info/{sem_info_id}", response_model=StudentSemInfoBase)
-def read_student_sem_info_by_id(sem_info_id: int, db: Session = Depends(get_db)):
+@router.delete("/student_sem_info/batch")
+def delete_student_sem_info_batch(ids: List[int] = Depends(batch_ids), db: Session = Depends(get_db)):
+    return commit_batch(db, student_sem_info_batch.delete(db, ids))
+
+@router.get("/student_sem_info/", response_model=List[StudentSemInfoRow])
+def read_all_student_sem_info(db: Session = Depends(get_read_db)):
+    return json_response(rows_to_dicts(db.query(*schema_columns(StudentSemInfo, StudentSemInfoRow)).all()))
+
+@router.get("/student_sem_info/{sem_info_id}", response_model=StudentSemInfoRow)
+def read_student_sem_info_by_id(sem_info_id: int, db: Session = Depends(get_read_db)):
     sem_info = db.query(StudentSemInfo).filter(StudentSemInfo.sem_info_id == sem_info_id).first()
     if not sem_info:
         raise HTTPException(status_code=404, detail="Student semester info not found")
     return sem_info
 
-@app.put("/student_sem_info/{sem_info_id}")
-def update_student_sem_info(sem_info_id: int, data: StudentSemInfoBase, db: Session = Depends(get_db)):
+@router.put("/student_sem_info/{sem_info_id}")
+def update_student_sem_info(sem_info_id: int, data: StudentSemInfoRow, db: Session = Depends(get_db)):
     sem_info = db.query(StudentSemInfo).filter(StudentSemInfo.sem_info_id == sem_info_id).first()
     if not sem_info:
         raise HTTPException(status_code=404, detail="Student sem info not found")
-    
-    for field, value in data.dict().items():
+
+    affected = {sem_info.student_id, data.student_id}
+    aggregates.retract(db, affected)
+    for field, value in data.model_dump().items():
         setattr(sem_info, field, value)
 
+    aggregates.apply(db, affected)
+    mark_changed(db, affected)
     db.commit()
-    db.refresh(sem_info)
     return {"message": "Student semester info updated", "student_sem_info": data}
 
 
-@app.delete("/student_sem_info/{sem_info_id}")
+@router.patch("/student_sem_info/{sem_info_id}")
+def patch_student_sem_info(sem_info_id: int, data: StudentSemInfoRowPatch, db: Session = Depends(get_db)):
+    values = data.model_dump(exclude_unset=True)
+    owner = db.query(models.StudentSemInfo.student_id).filter(models.StudentSemInfo.sem_info_id == sem_info_id).scalar()
+    if owner is None:
+        raise HTTPException(status_code=404, detail="Student semester info not found")
+    try:
+        patch.patch_rows(db, models.StudentSemInfo, models.StudentSemInfo.sem_info_id == sem_info_id, values, {owner, values.get("student_id", owner)})
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": "Student semester info updated", "updated": sorted(values)}
+
+@router.delete("/student_sem_info/{sem_info_id}")
 def delete_student_sem_info(sem_info_id: int, db: Session = Depends(get_db)):
     sem_info = db.query(StudentSemInfo).filter(StudentSemInfo.sem_info_id == sem_info_id).first()
     if not sem_info:
         raise HTTPException(status_code=404, detail="Student semester info not found")
+    aggregates.retract(db, [sem_info.student_id])
     db.delete(sem_info)
+    aggregates.apply(db, [sem_info.student_id])
+    mark_changed(db, [sem_info.student_id])
     db.commit()
     return {"message": f"Student semester info with id {sem_info_id} deleted"}
 
 # student_record
-@app.post("/student_record")
-def create_student_record(data: StudentRecordBase, db: Session = Depends(get_db)):
-    new_record = StudentRecord(**data.dict())
+@router.post("/student_record")
+def create_student_record(data: StudentRecordRow, db: Session = Depends(get_db)):
+    new_record = StudentRecord(**data.model_dump())
     db.add(new_record)
+    mark_changed(db, [data.student_id])
     db.commit()
     db.refresh(new_record)
     return {"message": "Student record created", "student_record": new_record}
 
 
-@app.get("/student_record/", response_model=List[StudentRecordBase])
-def read_all_student_record(db: Session = Depends(get_db)):
-    return db.query(StudentRecord).all()
+@router.get("/student_record/batch")
+def read_student_record_batch(ids: List[int] = Depends(batch_ids), db: Session = Depends(get_read_db)):
+    return json_response(student_record_batch.get(db, ids))
+
+@router.post("/student_record/batch")
+def create_student_record_batch(items: list = Depends(batch_items), db: Session = Depends(get_db)):
+    return commit_batch(db, student_record_batch.create(db, items))
+
+@router.put("/student_record/batch")
+def update_student_record_batch(items: list = Depends(batch_items), db: Session = Depends(get_db)):
+    return commit_batch(db, student_record_batch.update(db, items))
 
-@app.get("/student_record/{student_record_id}", response_model=StudentRecordBase)
-def read_student_record_by_id(student_record_id: int, db: Session = Depends(get_db)):
+@router.delete("/student_record/batch")
+def delete_student_record_batch(ids: List[int] = Depends(batch_ids), db: Session = Depends(get_db)):
+    return commit_batch(db, student_record_batch.delete(db, ids))
+
+@router.get("/student_record/", response_model=List[StudentRecordRow])
+def read_all_student_record(db: Session = Depends(get_read_db)):
+    return json_response(rows_to_dicts(db.query(*schema_columns(StudentRecord, StudentRecordRow)).all()))
+
+@router.get("/student_record/{student_record_id}", response_model=StudentRecordRow)
+def read_student_record_by_id(student_record_id: int, db: Session = Depends(get_read_db)):
     record = db.query(StudentRecord).filter(StudentRecord.student_record_id == student_record_id).first()
     if not record:
         raise HTTPException(status_code=404, detail="Student record not found")
     return record
 
-@app.put("/student_record/{student_record_id}")
-def update_student_record(student_record_id: int, data: StudentRecordBase, db: Session = Depends(get_db)):
+@router.put("/student_record/{student_record_id}")
+def update_student_record(student_record_id: int, data: StudentRecordRow, db: Session = Depends(get_db)):
     record = db.query(StudentRecord).filter(StudentRecord.student_record_id == student_record_id).first()
     if not record:
         raise HTTPException(status_code=404, detail="Student record not found")
     
-    for field, value in data.dict().items():
+    mark_changed(db, {record.student_id, data.student_id})
+    for field, value in data.model_dump().items():
         setattr(record, field, value)
     
     db.commit()
     db.refresh(record)
     return {"message": "Student record updated", "student_record": record}
 
-@app.delete("/student_record/{student_record_id}")
+@router.patch("/student_record/{student_record_id}")
+def patch_student_record(student_record_id: int, data: StudentRecordRowPatch, db: Session = Depends(get_db)):
+    values = data.model_dump(exclude_unset=True)
+    owner = db.query(models.StudentRecord.student_id).filter(models.StudentRecord.student_record_id == student_record_id).scalar()
+    if owner is None:
+        raise HTTPException(status_code=404, detail="Student record not found")
+    try:
+        patch.patch_rows(db, models.StudentRecord, models.StudentRecord.student_record_id == student_record_id, values, {owner, values.get("student_id", owner)})
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": "Student record updated", "updated": sorted(values)}
+
+@router.delete("/student_record/{student_record_id}")
 def delete_student_record(student_record_id: int, db: Session = Depends(get_db)):
     record = db.query(StudentRecord).filter(StudentRecord.student_record_id == student_record_id).first()
     if not record:
         raise HTTPException(status_code=404, detail="Student record not found")
+    mark_changed(db, [record.student_id])
     db.delete(record)
     db.commit()
     return {"message": f"Student record with id {student_record_id} deleted"}
@@ -0,0 +1,300 @@
+"""Set-based batch variants of the per-table CRUD routes in backend.py.
+
+A batch is validated and checked up front with one query per concern
+(existing keys, unique columns, parent rows), then written
+with one statement per chunk: a multi-row INSERT, an ``UPDATE .. SET col =
+CASE key WHEN .. END`` or a ``DELETE .. WHERE key IN (..)``.  Everything runs
+in the caller's transaction, and every item gets its own entry in the
+result instead of one bad row failing the batch:
+
+    {"index": 0, "id": 12, "status": "updated"}
+    {"index": 1, "id": 99, "status": "not_found", "detail": "..."}
+"""
+from contextlib import nullcontext
+from typing import Any, Dict, Iterable, List, Sequence
+
+from pydantic import ValidationError, create_model
+from sqlalchemy import case, delete, literal, or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+import aggregates
+
+MAX_BATCH_ITEMS = 1000
+ID_CHUNK_SIZE = 500
+# Every row of a CASE update binds two parameters per column
+UPDATE_CHUNK_SIZE = 200
+
+
+def parse_ids(values: Iterable[str], limit: int = MAX_BATCH_ITEMS) -> List[int]:
+    """``?ids=1,2,3`` and ``?ids=1&ids=2`` as a de-duplicated list; raises ValueError."""
+    ids = list(dict.fromkeys(int(part) for value in values for part in value.split(",") if part.strip()))
+    if len(ids) > limit:
+        raise ValueError(f"At most {limit} ids per request")
+    return ids
+
+
+def _chunks(items: Sequence, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _result(index, status, item_id=None, detail=None):
+    result = {"index": index, "id": item_id, "status": status}
+    if detail is not None:
+        result["detail"] = detail
+    return result
+
+
+def summary(results: List[dict], ok: str):
+    results.sort(key=lambda result: result["index"])
+    succeeded = sum(result["status"] == ok for result in results)
+    return {"results": results, "succeeded": succeeded, "failed": len(results) - succeeded}
+
+
+def case_update(db: Session, key, columns, rows: List[dict]) -> int:
+    """One ``UPDATE .. SET col = CASE WHEN key IN (..) THEN value .. END`` for ``rows``.
+
+    Keys are grouped by the value they get, so a column that takes a handful
+    of distinct values (marks, grades) costs a handful of WHENs however many
+    rows there are.  A column is only set for the rows that carry it, so
+    callers can mix partial rows.
+    """
+    values = {}
+    for column in columns:
+        groups = {}
+        for row in rows:
+            if column.name in row:
+                groups.setdefault(row[column.name], []).append(row[key.name])
+        if groups:
+            values[column.name] = case(
+                *((key.in_(ids), literal(value, column.type)) for value, ids in groups.items()),
+                else_=column,
+            )
+    if not values:
+        return 0
+    ids = [row[key.name] for row in rows]
+    return db.execute(update(key.table).where(key.in_(ids)).values(values)).rowcount
+
+
+class TableBatch:
+    """Batch get/create/update/delete for one table.
+
+    ``schema`` is the pydantic model the single-row routes accept; items for
+    ``update`` must carry the primary key as well.  ``parents`` maps a
+    foreign key column name to the parent's key column; rows that reference
+    a deleted row are left to the foreign keys' ON DELETE actions.
+    """
+
+    def __init__(self, model, schema, label, parents=None, unique=(), aggregated=False):
+        self.model = model
+        self.table = model.__table__
+        self.key = self.table.primary_key.columns[0]
+        self.schema = schema
+        self.label = label
+        self.parents = parents or {}
+        self.unique = list(unique)
+        self.aggregated = aggregated
+
+        fields = list(schema.model_fields)
+        self.columns = [self.table.c[name] for name in fields]
+        if self.key.name not in fields:
+            self.update_schema = create_model(f"{schema.__name__}BatchUpdate", __base__=schema, **{self.key.name: (int, ...)})
+        else:
+            self.update_schema = schema
+
+    # --- helpers ---
+
+    def _validate(self, raw_items, schema):
+        valid, results = [], []
+        for index, raw in enumerate(raw_items):
+            try:
+                valid.append((index, schema.model_validate(raw).model_dump()))
+            except ValidationError as e:
+                item_id = raw.get(self.key.name) if isinstance(raw, dict) else None
+                results.append(_result(index, "invalid", item_id, e.errors(
+                    include_url=False, include_context=False, include_input=False)))
+        return valid, results
+
+    def _existing(self, db: Session, column, values) -> set:
+        found = set()
+        for chunk in _chunks(list(set(values)), ID_CHUNK_SIZE):
+            found.update(db.execute(select(column).where(column.in_(chunk)).distinct()).scalars())
+        return found
+
+    def _student_ids(self, db: Session, ids) -> Dict[int, Any]:
+        """key -> student_id of the rows currently stored under ``ids``."""
+        student_column = self.table.c.student_id
+        owners = {}
+        for chunk in _chunks(list(ids), ID_CHUNK_SIZE):
+            owners.update(db.execute(select(self.key, student_column).where(self.key.in_(chunk))).all())
+        return owners
+
+    def _check_parents(self, db: Session, items, results):
+        """Drop items that reference a parent row that does not exist."""
+        for name, parent_key in self.parents.items():
+            if not items:
+                break
+            present = self._existing(db, parent_key, [row[name] for _, row in items if row[name] is not None])
+            kept = []
+            for index, row in items:
+                if row[name] is not None and row[name] not in present:
+                    results.append(_result(index, "invalid", row.get(self.key.name), f"{name} {row[name]} does not exist"))
+                else:
+                    kept.append((index, row))
+            items = kept
+        return items
+
+    def _check_unique(self, db: Session, items, results):
+        """Drop items whose unique columns repeat in the batch or belong to another row."""
+        if not self.unique or not items:
+            return items
+
+        taken = {column.name: {} for column in self.unique}
+        for chunk in _chunks([row for _, row in items], ID_CHUNK_SIZE):
+            rows = db.execute(select(self.key, *self.unique).where(or_(*(
+                column.in_([row[column.name] for row in chunk]) for column in self.unique
+            )))).all()
+            for row in rows:
+                for column in self.unique:
+                    taken[column.name][getattr(row, column.name)] = row[0]
+
+        kept, seen = [], {column.name: set() for column in self.unique}
+        for index, row in items:
+            item_id = row.get(self.key.name)
+            clash = next((
+                column.name for column in self.unique
+                if row[column.name] in seen[column.name]
+                or taken[column.name].get(row[column.name], item_id) != item_id
+            ), None)
+            if clash:
+                results.append(_result(index, "conflict", item_id, f"{clash} {row[clash]} is already in use"))
+                continue
+            for column in self.unique:
+                seen[column.name].add(row[column.name])
+            kept.append((index, row))
+        return kept
+
+    def _drop_repeated_keys(self, items, results):
+        kept, seen = [], set()
+        for index, row in items:
+            item_id = row.get(self.key.name)
+            if item_id is not None and item_id in seen:
+                results.append(_result(index, "conflict", item_id, f"{self.key.name} {item_id} repeats in the batch"))
+                continue
+            seen.add(item_id)
+            kept.append((index, row))
+        return kept
+
+    def _insert(self, db: Session, rows) -> List[int]:
+        """Insert ``rows`` and return their keys in order."""
+        if all(row.get(self.key.name) is not None for row in rows):
+            db.execute(self.table.insert(), rows)
+            return [row[self.key.name] for row in rows]
+        # Generated keys come back in one statement only where the dialect
+        # can order RETURNING rows (PostgreSQL); SQLAlchemy sends SQLite a
+        # statement per row, and MySQL has no INSERT .. RETURNING at all.
+        if db.get_bind().dialect.insert_executemany_returning:
+            stmt = self.table.insert().returning(self.key, sort_by_parameter_order=True)
+            return list(db.execute(stmt, rows).scalars())
+        return [db.execute(self.table.insert(), row).inserted_primary_key[0] for row in rows]
+
+    def _tracking(self, db: Session, student_ids):
+        return aggregates.tracking(db, student_ids) if self.aggregated else nullcontext()
+
+    # --- operations ---
+
+    def get(self, db: Session, ids: List[int]):
+        columns = [self.key, *(column for column in self.columns if column is not self.key)]
+        found = {}
+        for chunk in _chunks(ids, ID_CHUNK_SIZE):
+            for row in db.execute(select(*columns).where(self.key.in_(chunk))):
+                found[row[0]] = row._asdict()
+        return {
+            "items": [found[item_id] for item_id in ids if item_id in found],
+            "missing": [item_id for item_id in ids if item_id not in found],
+        }
+
+    def create(self, db: Session, raw_items: List[Dict[str, Any]]):
+        items, results = self._validate(raw_items, self.schema)
+        items = self._drop_repeated_keys(items, results)
+
+        explicit = [row[self.key.name] for _, row in items if row.get(self.key.name) is not None]
+        if explicit:
+            existing = self._existing(db, self.key, explicit)
+            kept = []
+            for index, row in items:
+                if row.get(self.key.name) in existing:
+                    results.append(_result(index, "conflict", row[self.key.name], f"{self.label} already exists"))
+                else:
+                    kept.append((index, row))
+            items = kept
+        items = self._check_unique(db, items, results)
+        items = self._check_parents(db, items, results)
+        if not items:
+            return summary(results, "created"), set()
+
+        student_ids = {row["student_id"] for _, row in items}
+        with self._tracking(db, student_ids):
+            for chunk in _chunks(items, ID_CHUNK_SIZE):
+                try:
+                    with db.begin_nested():
+                        keys = self._insert(db, [row for _, row in chunk])
+                    results.extend(_result(index, "created", key) for (index, _), key in zip(chunk, keys))
+                    continue
+                except SQLAlchemyError:
+                    pass
+                # Something the checks above could not see (a concurrent writer,
+                # a database constraint): retry row by row to isolate it.
+                for index, row in chunk:
+                    try:
+                        with db.begin_nested():
+                            key, = self._insert(db, [row])
+                        results.append(_result(index, "created", key))
+                    except SQLAlchemyError as e:
+                        results.append(_result(index, "error", row.get(self.key.name), f"Database error: {getattr(e, 'orig', e)}"))
+        return summary(results, "created"), student_ids
+
+    def update(self, db: Session, raw_items: List[Dict[str, Any]]):
+        items, results = self._validate(raw_items, self.update_schema)
+        items = self._drop_repeated_keys(items, results)
+
+        owners = self._student_ids(db, [row[self.key.name] for _, row in items])
+        kept = []
+        for index, row in items:
+            if row[self.key.name] in owners:
+                kept.append((index, row))
+            else:
+                results.append(_result(index, "not_found", row[self.key.name], f"{self.label} not found"))
+        items = self._check_unique(db, kept, results)
+        items = self._check_parents(db, items, results)
+        if not items:
+            return summary(results, "updated"), set()
+
+        student_ids = {owners[row[self.key.name]] for _, row in items} | {row["student_id"] for _, row in items}
+        columns = [column for column in self.columns if column is not self.key]
+        with self._tracking(db, student_ids):
+            for chunk in _chunks(items, UPDATE_CHUNK_SIZE):
+                case_update(db, self.key, columns, [row for _, row in chunk])
+                results.extend(_result(index, "updated", row[self.key.name]) for index, row in chunk)
+        return summary(results, "updated"), student_ids
+
+    def delete(self, db: Session, ids: List[int]):
+        results: List[dict] = []
+        owners = self._student_ids(db, ids)
+        doomed = []
+        for index, item_id in enumerate(ids):
+            if item_id not in owners:
+                results.append(_result(index, "not_found", item_id, f"{self.label} not found"))
+            else:
+                doomed.append((index, item_id))
+        if not doomed:
+            return summary(results, "deleted"), set()
+
+        student_ids = {owners[item_id] for _, item_id in doomed}
+        with self._tracking(db, student_ids):
+            for chunk in _chunks(doomed, ID_CHUNK_SIZE):
+                db.execute(delete(self.table).where(self.key.in_([item_id for _, item_id in chunk])))
+                results.extend(_result(index, "deleted", item_id) for index, item_id in chunk)
+        return summary(results, "deleted"), student_ids
+
@@ -0,0 +1,88 @@
+"""Cold start to first response, in fresh interpreters.
+
+    python bench/seed.py --students 10000 --reset
+    python bench/coldstart.py [--runs 5] [--path /student_full/1] [--warmup pool,schemas]
+
+Each run starts a new Python process that imports server.py, builds the
+app with create_app(), runs its startup (migrations and STARTUP_WARMUP)
+and serves one request in process over ASGI, against DATABASE_URL.
+Reports the median of each step over the runs, and the startup breakdown
+the app logged for the last one.  --warmup overrides STARTUP_WARMUP (pass
+"" for none) to see what the warm-up costs at startup and saves later.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, os, sys, time
+started = time.perf_counter()
+interpreter_ms = (time.time() - float(os.environ["COLDSTART_SPAWNED"])) * 1000
+sys.path.insert(0, {root!r})
+
+import server
+imported = time.perf_counter()
+app = server.create_app()
+created = time.perf_counter()
+
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    ready = time.perf_counter()
+    response = client.get({path!r})
+    answered = time.perf_counter()
+    startup = client.get("/metrics/startup").json()
+if response.status_code >= 400:
+    sys.exit(f"{{response.status_code}}: {{response.text[:200]}}")
+print(json.dumps({{
+    "interpreter_ms": interpreter_ms,
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "startup_ms": (ready - created) * 1000,
+    "first_response_ms": (answered - ready) * 1000,
+    "spawn_to_first_response_ms": (time.time() - float(os.environ["COLDSTART_SPAWNED"])) * 1000
+        - (time.perf_counter() - answered) * 1000,
+    "startup": startup,
+}}))
+"""
+
+
+def run_once(path, warmup):
+    env = dict(os.environ)
+    if warmup is not None:
+        env["STARTUP_WARMUP"] = warmup
+    env["COLDSTART_SPAWNED"] = repr(time.time())
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD.format(root=ROOT, path=path)],
+        capture_output=True, text=True, env=env, cwd=ROOT,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"run failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold start to first response")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/student_full/1", help="the first request")
+    parser.add_argument("--warmup", help="STARTUP_WARMUP for the runs; unset uses the environment/default")
+    args = parser.parse_args()
+
+    runs = [run_once(args.path, args.warmup) for _ in range(args.runs)]
+    steps = [key for key in runs[0] if key.endswith("_ms")]
+    report = {
+        "runs": args.runs,
+        "path": args.path,
+        "median_ms": {step: round(statistics.median(run[step] for run in runs), 1) for step in steps},
+        "startup": runs[-1]["startup"],
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
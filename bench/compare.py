@@ -0,0 +1,73 @@
+"""Compare two bench/load.py reports.
+
+    python bench/compare.py before.json after.json [--threshold 20]
+
+Prints p50/p95/p99, throughput and statement counts side by side and exits
+with status 1 when a scenario's p95 got more than --threshold percent
+slower, its statement count went up, or it started failing requests.
+"""
+import argparse
+import json
+import sys
+
+
+def _pct(before, after):
+    if not before or after is None:
+        return None
+    return (after - before) / before * 100
+
+
+def compare(before, after, threshold):
+    regressions = []
+    rows = []
+    for name, new in after["scenarios"].items():
+        old = before["scenarios"].get(name)
+        if old is None:
+            rows.append((name, "new", "", "", "", ""))
+            continue
+        p95 = _pct(old["latency_ms"]["p95"], new["latency_ms"]["p95"])
+        rows.append((
+            name,
+            f"{old['latency_ms']['p50']:.1f} -> {new['latency_ms']['p50']:.1f}",
+            f"{old['latency_ms']['p95']:.1f} -> {new['latency_ms']['p95']:.1f} ({p95:+.0f}%)",
+            f"{old['latency_ms']['p99']:.1f} -> {new['latency_ms']['p99']:.1f}",
+            f"{old['throughput_rps']:.0f} -> {new['throughput_rps']:.0f}",
+            f"{old['statements']['mean']} -> {new['statements']['mean']}",
+        ))
+        if p95 is not None and p95 > threshold:
+            regressions.append(f"{name}: p95 {p95:+.0f}%")
+        if (new["statements"]["mean"] or 0) > (old["statements"]["mean"] or 0):
+            regressions.append(f"{name}: statements {old['statements']['mean']} -> {new['statements']['mean']}")
+        if new["errors"] > old["errors"]:
+            regressions.append(f"{name}: errors {old['errors']} -> {new['errors']}")
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff two bench/load.py reports")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=20.0, help="allowed p95 slowdown, percent")
+    args = parser.parse_args()
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    print(f"{before['meta'].get('commit')} -> {after['meta'].get('commit')}")
+    rows, regressions = compare(before, after, args.threshold)
+    header = ("scenario", "p50 ms", "p95 ms", "p99 ms", "req/s", "statements")
+    widths = [max(len(str(row[i])) for row in rows + [header]) for i in range(len(header))]
+    for row in [header] + rows:
+        print("  ".join(str(cell).ljust(width) for cell, width in zip(row, widths)))
+
+    if regressions:
+        print("\nRegressions:")
+        for regression in regressions:
+            print("  " + regression)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
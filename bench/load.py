@@ -0,0 +1,500 @@
+"""Drive every route of routes.py and backend.py and report latencies as JSON.
+
+    python bench/seed.py --students 10000 --reset
+    python bench/load.py --requests 200 --concurrency 16 --output before.json
+
+By default the app (server.create_app) is served in process over ASGI
+(no sockets), against DATABASE_URL.  Pass --url to drive a running server
+instead.  Each scenario is one route; scenarios run one after another, all
+reads before any writes, each with --concurrency requests in flight.  Per
+scenario the report has throughput, p50/p95/p99 latency and the SQL
+statement counts the server reported in its Server-Timing header.
+
+The write scenarios change the dataset (students near the end of the id
+range are updated and deleted, new ones are created), so reseed with
+--reset between runs that are meant to be compared, or pass --reads-only.
+bench/compare.py diffs two reports.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx  # noqa: E402
+
+from seed import DEPARTMENTS, FIRST, LAST, SUBJECTS, UNIVERSITY_BASE, register_num, sem_info_ids  # noqa: E402
+
+STATEMENTS = re.compile(r'db;dur=[\d.]+;desc="(\d+) statements"')
+BULK_SIZE = 100
+IMPORT_SIZE = 100
+BATCH_SIZE = 50
+MARKS_SIZE = 1000
+
+
+class Context:
+    """Run-wide state shared by the scenarios: dataset shape and claimed ids."""
+
+    def __init__(self, students, sems, subjects):
+        self.students = students
+        self.sems = sems
+        self.subjects = subjects
+        self._tail = students
+        self.job_ids = []
+        self.batch_tail = []
+        self.state = None
+
+    def take_tail(self, count):
+        """Distinct existing student ids from the end of the range, for destructive scenarios."""
+        count = min(count, max(self._tail - self.students // 2, 0))
+        ids = list(range(self._tail, self._tail - count, -1))
+        self._tail -= count
+        return ids
+
+    def student_id(self, i):
+        # Spread over the first half; the tail is reserved for deletes
+        return 1 + (i * 7919) % max(self.students // 2, 1)
+
+
+def profile(n, tag="", name=None, department=None):
+    """A full profile for student n; same unique fields as the seeded row."""
+    return {
+        "student": {
+            "student_name": name or f"{FIRST[n % len(FIRST)]} {LAST[n % len(LAST)]}",
+            "dob": "2003-06-01",
+            "department": department or DEPARTMENTS[n % len(DEPARTMENTS)],
+            "register_num": f"{tag}{register_num(n)}",
+            "university_num": UNIVERSITY_BASE + n,
+        },
+        "info": {"address": "1 Bench Street", "blood_grp": "O+", "mail_id": f"bench{n}@example.com",
+                 "phone_no": 9000000000 + n, "year": 1 + n % 4},
+        "sem_info": {"cgpa": 7.2, "semester": 1, "pass_fail": "Pass", "grade": "A", "mark": 74,
+                     "subject": "Maths"},
+        "record": {"father_name": "Bench F", "mother_name": "Bench M", "father_occupation": "Teacher",
+                   "aadhar_num": 100000000000 + n, "tenth_mark": 400, "twelfth_mark": 500,
+                   "account_num": 5000000000 + n, "community": "BC", "religion": "Hindu",
+                   "nationality": "Indian"},
+    }
+
+
+def new_profile(n, tag):
+    # Ids far above the seeded range so they never collide with it
+    p = profile(n, tag=tag)
+    p["student"]["university_num"] = UNIVERSITY_BASE + {"M": 50, "K": 60, "I": 70, "B": 80, "T": 90}[tag] * 1000000 + n
+    return p
+
+
+class Scenario:
+    def __init__(self, app, method, route, build, weight=1.0, write=False, prepare=None, after=None):
+        self.app = app
+        self.method = method
+        self.route = route
+        self.build = build            # (i, ctx) -> (url, request kwargs)
+        self.weight = weight          # fraction of --requests this scenario gets
+        self.write = write
+        self.prepare = prepare        # (count, ctx) -> state passed to build as ctx.state
+        self.after = after            # (i, response, ctx) -> None
+
+    @property
+    def name(self):
+        return f"{self.app} {self.method} {self.route}"
+
+
+def _backend_student(ctx, i):
+    return ctx.students + 1000000 + i
+
+
+def _batch_students(ctx, i):
+    first = ctx.students + 2000000 + i * BATCH_SIZE
+    return range(first, first + BATCH_SIZE)
+
+
+def _batch_ids(ctx, i, ids=None):
+    return ",".join(str(n) for n in (ids or [ctx.student_id(i * BATCH_SIZE + k) for k in range(BATCH_SIZE)]))
+
+
+def _tail_batches(count, ctx):
+    # The four batch delete scenarios share these students, children first
+    ctx.batch_tail = [batch for batch in (ctx.take_tail(BATCH_SIZE) for _ in range(count)) if batch]
+    return [[sem_id for n in batch for sem_id in sem_info_ids(n, ctx.sems, ctx.subjects)] for batch in ctx.batch_tail]
+
+
+def scenarios():
+    q = lambda **params: {"params": params}  # noqa: E731
+    return [
+        # --- routes.py, reads ---
+        Scenario("main", "GET", "/student_full/{student_id}",
+                 lambda i, ctx: (f"/student_full/{ctx.student_id(i)}", {})),
+        Scenario("main", "GET", "/student_full/batch",
+                 lambda i, ctx: ("/student_full/batch",
+                                 q(ids=",".join(str(ctx.student_id(i * 10 + k)) for k in range(10))))),
+        Scenario("main", "GET", "/students_full/",
+                 lambda i, ctx: ("/students_full/", q(limit=50, department=DEPARTMENTS[i % len(DEPARTMENTS)]))),
+        Scenario("main", "GET", "/students_full/ (year+semester)",
+                 lambda i, ctx: ("/students_full/", q(limit=50, year=1 + i % 4, semester=1 + i % ctx.sems))),
+        Scenario("main", "GET", "/students_full/export",
+                 lambda i, ctx: ("/students_full/export", q(department=DEPARTMENTS[i % len(DEPARTMENTS)])),
+                 weight=0.05),
+        Scenario("main", "GET", "/student_data/",
+                 lambda i, ctx: ("/student_data/", q(limit=50, department=DEPARTMENTS[i % len(DEPARTMENTS)]))),
+        Scenario("main", "GET", "/students/search",
+                 lambda i, ctx: ("/students/search", q(q=FIRST[i % len(FIRST)][:3 + i % 3]))),
+        Scenario("main", "GET", "/graph/all-charts", lambda i, ctx: ("/graph/all-charts", {})),
+        Scenario("main", "GET", "/analytics/summary",
+                 lambda i, ctx: ("/analytics/summary", q(by=["department", "semester"]))),
+        Scenario("main", "GET", "/analytics/histogram",
+                 lambda i, ctx: ("/analytics/histogram", q(metric="cgpa", by="department"))),
+        Scenario("main", "GET", "/analytics/pass-rates", lambda i, ctx: ("/analytics/pass-rates", {})),
+        Scenario("main", "GET", "/students/{student_id}/gpa",
+                 lambda i, ctx: (f"/students/{ctx.student_id(i)}/gpa", {})),
+        Scenario("main", "GET", "/rankings/{department}/{semester}",
+                 lambda i, ctx: (f"/rankings/{DEPARTMENTS[i % len(DEPARTMENTS)]}/{1 + i % ctx.sems}", q(limit=10))),
+        Scenario("main", "GET", "/students/{student_id}/rank",
+                 lambda i, ctx: (f"/students/{ctx.student_id(i)}/rank", {})),
+        Scenario("main", "GET", "/ask/stream",
+                 lambda i, ctx: ("/ask/stream", q(q=f"top 5 in {DEPARTMENTS[i % len(DEPARTMENTS)]} semester {1 + i % ctx.sems}"))),
+
+        # --- backend.py, reads ---
+        Scenario("backend", "GET", "/student_data/{student_id}",
+                 lambda i, ctx: (f"/student_data/{ctx.student_id(i)}", {})),
+        Scenario("backend", "GET", "/student_info/{student_info_id}",
+                 lambda i, ctx: (f"/student_info/{ctx.student_id(i)}", {})),
+        Scenario("backend", "GET", "/student_sem_info/{sem_info_id}",
+                 lambda i, ctx: (f"/student_sem_info/{sem_info_ids(ctx.student_id(i), ctx.sems, ctx.subjects)[0]}", {})),
+        Scenario("backend", "GET", "/student_record/{student_record_id}",
+                 lambda i, ctx: (f"/student_record/{ctx.student_id(i)}", {})),
+        # Unpaginated dumps of whole tables
+        Scenario("backend", "GET", "/student_data/", lambda i, ctx: ("/student_data/", {}), weight=0.01),
+        Scenario("backend", "GET", "/student_info/", lambda i, ctx: ("/student_info/", {}), weight=0.01),
+        Scenario("backend", "GET", "/student_sem_info/", lambda i, ctx: ("/student_sem_info/", {}), weight=0.01),
+        Scenario("backend", "GET", "/student_record/", lambda i, ctx: ("/student_record/", {}), weight=0.01),
+        Scenario("backend", "GET", "/student_data/batch",
+                 lambda i, ctx: ("/student_data/batch", q(ids=_batch_ids(ctx, i)))),
+        Scenario("backend", "GET", "/student_info/batch",
+                 lambda i, ctx: ("/student_info/batch", q(ids=_batch_ids(ctx, i)))),
+        Scenario("backend", "GET", "/student_sem_info/batch",
+                 lambda i, ctx: ("/student_sem_info/batch", q(ids=_batch_ids(ctx, i, [
+                     sem_info_ids(ctx.student_id(i * BATCH_SIZE + k), ctx.sems, ctx.subjects)[0]
+                     for k in range(BATCH_SIZE)])))),
+        Scenario("backend", "GET", "/student_record/batch",
+                 lambda i, ctx: ("/student_record/batch", q(ids=_batch_ids(ctx, i)))),
+
+        # --- routes.py, writes ---
+        Scenario("main", "POST", "/student_full/",
+                 lambda i, ctx: ("/student_full/", {"json": new_profile(i, "M")}),
+                 write=True),
+        Scenario("main", "POST", "/students/bulk/",
+                 lambda i, ctx: ("/students/bulk/",
+                                 {"json": [new_profile(i * BULK_SIZE + k, "K") for k in range(BULK_SIZE)]}),
+                 weight=0.1, write=True),
+        Scenario("main", "POST", "/students/import",
+                 lambda i, ctx: ("/students/import", {"files": {"file": (
+                     "bench.ndjson",
+                     "\n".join(json.dumps(new_profile(i * IMPORT_SIZE + k, "I")) for k in range(IMPORT_SIZE)),
+                 )}}),
+                 weight=0.05, write=True, after=lambda i, r, ctx: ctx.job_ids.append(r.json()["job_id"])),
+        Scenario("main", "POST", "/jobs (export)",
+                 lambda i, ctx: ("/jobs", {"json": {"kind": "export", "params": {
+                     "format": "csv", "department": DEPARTMENTS[i % len(DEPARTMENTS)]}}}),
+                 weight=0.02, write=True, after=lambda i, r, ctx: ctx.job_ids.append(r.json()["job_id"])),
+        Scenario("main", "GET", "/jobs/{job_id}",
+                 lambda i, ctx: (f"/jobs/{ctx.job_ids[i % len(ctx.job_ids)]}", {}),
+                 weight=0.05, write=True),
+        Scenario("main", "PUT", "/students/{student_id}",
+                 lambda i, ctx: (f"/students/{ctx.student_id(i)}",
+                                 {"json": profile(ctx.student_id(i), name=f"Updated {i}")}),
+                 write=True),
+        Scenario("main", "PATCH", "/students/{student_id}",
+                 lambda i, ctx: (f"/students/{ctx.student_id(i)}", {"json": {"sem_info": {"mark": 40 + i % 60}}}),
+                 write=True),
+        Scenario("main", "PATCH", "/semesters/{semester}/marks",
+                 lambda i, ctx: (f"/semesters/{1 + i % ctx.sems}/marks", {"json": {"items": [
+                     {"student_id": ctx.student_id(i * MARKS_SIZE + k), "subject": SUBJECTS[(1 + i % ctx.sems) % len(SUBJECTS)],
+                      "mark": 30 + k % 70, "pass_fail": "Pass" if k % 70 >= 20 else "Fail"}
+                     for k in range(MARKS_SIZE)
+                 ]}}),
+                 weight=0.05, write=True),
+        Scenario("main", "DELETE", "/students/{student_id}",
+                 lambda i, ctx: (f"/students/{ctx.state[i]}", {}),
+                 write=True, prepare=lambda count, ctx: ctx.take_tail(count)),
+
+        # --- backend.py, writes: create a student table by table, update, then delete it again ---
+        Scenario("backend", "POST", "/student_data/",
+                 lambda i, ctx: ("/student_data/", {"json": {
+                     **new_profile(i, "B")["student"], "student_id": _backend_student(ctx, i)}}),
+                 write=True),
+        Scenario("backend", "POST", "/student_info/",
+                 lambda i, ctx: ("/student_info/", {"json": {
+                     **profile(i)["info"], "student_info_id": _backend_student(ctx, i),
+                     "student_id": _backend_student(ctx, i)}}),
+                 write=True),
+        Scenario("backend", "POST", "/student_sem_info/",
+                 lambda i, ctx: ("/student_sem_info/", {"json": {
+                     **profile(i)["sem_info"], "student_id": _backend_student(ctx, i),
+                     "student_info_id": _backend_student(ctx, i)}}),
+                 write=True),
+        Scenario("backend", "POST", "/student_record",
+                 lambda i, ctx: ("/student_record", {"json": {
+                     **profile(i)["record"], "student_id": _backend_student(ctx, i)}}),
+                 write=True),
+        Scenario("backend", "PUT", "/student_data/{student_id}",
+                 lambda i, ctx: (f"/student_data/{ctx.student_id(i)}", {"json": {
+                     **profile(ctx.student_id(i))["student"], "student_id": ctx.student_id(i)}}),
+                 write=True),
+        Scenario("backend", "PUT", "/student_info/{student_info_id}",
+                 lambda i, ctx: (f"/student_info/{ctx.student_id(i)}", {"json": {
+                     **profile(ctx.student_id(i))["info"], "student_info_id": ctx.student_id(i),
+                     "student_id": ctx.student_id(i)}}),
+                 write=True),
+        Scenario("backend", "PUT", "/student_sem_info/{sem_info_id}",
+                 lambda i, ctx: (f"/student_sem_info/{sem_info_ids(ctx.student_id(i), ctx.sems, ctx.subjects)[0]}",
+                                 {"json": {**profile(i)["sem_info"], "student_id": ctx.student_id(i),
+                                           "student_info_id": ctx.student_id(i)}}),
+                 write=True),
+        Scenario("backend", "PUT", "/student_record/{student_record_id}",
+                 lambda i, ctx: (f"/student_record/{ctx.student_id(i)}", {"json": {
+                     **profile(ctx.student_id(i))["record"], "student_id": ctx.student_id(i)}}),
+                 write=True),
+        Scenario("backend", "PATCH", "/student_data/{student_id}",
+                 lambda i, ctx: (f"/student_data/{ctx.student_id(i)}", {"json": {"student_name": f"Patched {i}"}}),
+                 write=True),
+        Scenario("backend", "PATCH", "/student_info/{student_info_id}",
+                 lambda i, ctx: (f"/student_info/{ctx.student_id(i)}", {"json": {"year": 1 + i % 4}}),
+                 write=True),
+        Scenario("backend", "PATCH", "/student_sem_info/{sem_info_id}",
+                 lambda i, ctx: (f"/student_sem_info/{sem_info_ids(ctx.student_id(i), ctx.sems, ctx.subjects)[0]}",
+                                 {"json": {"mark": 40 + i % 60}}),
+                 write=True),
+        Scenario("backend", "PATCH", "/student_record/{student_record_id}",
+                 lambda i, ctx: (f"/student_record/{ctx.student_id(i)}", {"json": {"community": "OC"}}),
+                 write=True),
+        # Batches of BATCH_SIZE rows per request
+        Scenario("backend", "POST", "/student_data/batch",
+                 lambda i, ctx: ("/student_data/batch", {"json": [
+                     {**new_profile(n, "T")["student"], "student_id": n} for n in _batch_students(ctx, i)]}),
+                 weight=0.1, write=True),
+        Scenario("backend", "POST", "/student_info/batch",
+                 lambda i, ctx: ("/student_info/batch", {"json": [
+                     {**profile(n)["info"], "student_info_id": n, "student_id": n} for n in _batch_students(ctx, i)]}),
+                 weight=0.1, write=True),
+        Scenario("backend", "POST", "/student_sem_info/batch",
+                 lambda i, ctx: ("/student_sem_info/batch", {"json": [
+                     {**profile(n)["sem_info"], "student_id": n, "student_info_id": n} for n in _batch_students(ctx, i)]}),
+                 weight=0.1, write=True),
+        Scenario("backend", "POST", "/student_record/batch",
+                 lambda i, ctx: ("/student_record/batch", {"json": [
+                     {**profile(n)["record"], "student_id": n} for n in _batch_students(ctx, i)]}),
+                 weight=0.1, write=True),
+        Scenario("backend", "PUT", "/student_data/batch",
+                 lambda i, ctx: ("/student_data/batch", {"json": [
+                     {**profile(n)["student"], "student_id": n}
+                     for n in sorted({ctx.student_id(i * BATCH_SIZE + k) for k in range(BATCH_SIZE)})]}),
+                 weight=0.1, write=True),
+        Scenario("backend", "PUT", "/student_info/batch",
+                 lambda i, ctx: ("/student_info/batch", {"json": [
+                     {**profile(n)["info"], "student_info_id": n, "student_id": n}
+                     for n in sorted({ctx.student_id(i * BATCH_SIZE + k) for k in range(BATCH_SIZE)})]}),
+                 weight=0.1, write=True),
+        Scenario("backend", "PUT", "/student_sem_info/batch",
+                 lambda i, ctx: ("/student_sem_info/batch", {"json": [
+                     {**profile(n)["sem_info"], "sem_info_id": sem_info_ids(n, ctx.sems, ctx.subjects)[0],
+                      "student_id": n, "student_info_id": n}
+                     for n in sorted({ctx.student_id(i * BATCH_SIZE + k) for k in range(BATCH_SIZE)})]}),
+                 weight=0.1, write=True),
+        Scenario("backend", "PUT", "/student_record/batch",
+                 lambda i, ctx: ("/student_record/batch", {"json": [
+                     {**profile(n)["record"], "student_record_id": n, "student_id": n}
+                     for n in sorted({ctx.student_id(i * BATCH_SIZE + k) for k in range(BATCH_SIZE)})]}),
+                 weight=0.1, write=True),
+        Scenario("backend", "DELETE", "/student_sem_info/batch",
+                 lambda i, ctx: ("/student_sem_info/batch", q(ids=_batch_ids(ctx, i, ctx.state[i]))),
+                 weight=0.1, write=True, prepare=_tail_batches),
+        Scenario("backend", "DELETE", "/student_record/batch",
+                 lambda i, ctx: ("/student_record/batch", q(ids=_batch_ids(ctx, i, ctx.state[i]))),
+                 weight=0.1, write=True, prepare=lambda count, ctx: ctx.batch_tail),
+        Scenario("backend", "DELETE", "/student_info/batch",
+                 lambda i, ctx: ("/student_info/batch", q(ids=_batch_ids(ctx, i, ctx.state[i]))),
+                 weight=0.1, write=True, prepare=lambda count, ctx: ctx.batch_tail),
+        Scenario("backend", "DELETE", "/student_data/batch",
+                 lambda i, ctx: ("/student_data/batch", q(ids=_batch_ids(ctx, i, ctx.state[i]))),
+                 weight=0.1, write=True, prepare=lambda count, ctx: ctx.batch_tail),
+        # Deletes work on seeded students from the tail, children first
+        Scenario("backend", "DELETE", "/student_sem_info/{sem_info_id}",
+                 lambda i, ctx: (f"/student_sem_info/{ctx.state[i]}", {}),
+                 write=True, prepare=lambda count, ctx: [
+                     sem_id
+                     for n in ctx.take_tail(-(-count // (ctx.sems * ctx.subjects)))
+                     for sem_id in sem_info_ids(n, ctx.sems, ctx.subjects)
+                 ][:count]),
+        Scenario("backend", "DELETE", "/student_record/{student_record_id}",
+                 lambda i, ctx: (f"/student_record/{ctx.state[i]}", {}),
+                 write=True, prepare=lambda count, ctx: ctx.take_tail(count)),
+        Scenario("backend", "DELETE", "/student_info/{student_info_id}",
+                 lambda i, ctx: (f"/student_info/{ctx.state[i]}", {}),
+                 write=True, prepare=lambda count, ctx: ctx.take_tail(count)),
+        Scenario("backend", "DELETE", "/student_data/{student_id}",
+                 lambda i, ctx: (f"/student_data/{ctx.state[i]}", {}),
+                 write=True, prepare=lambda count, ctx: ctx.take_tail(count)),
+
+        # --- purges go last: each one removes a department/year slice of the dataset ---
+        Scenario("main", "POST", "/students/purge (dry run)",
+                 lambda i, ctx: ("/students/purge", q(department=DEPARTMENTS[i % len(DEPARTMENTS)], dry_run=True)),
+                 weight=0.05, write=True),
+        Scenario("main", "POST", "/students/purge",
+                 lambda i, ctx: ("/students/purge", q(department=DEPARTMENTS[i % len(DEPARTMENTS)], year=1 + i // len(DEPARTMENTS) % 4)),
+                 weight=0.01, write=True),
+    ]
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+async def run_scenario(client, scenario, count, concurrency, ctx):
+    ctx.state = scenario.prepare(count, ctx) if scenario.prepare else None
+    if ctx.state is not None:
+        count = min(count, len(ctx.state))
+
+    latencies, statements, statuses = [], [], Counter()
+    errors = []
+    next_index = iter(range(count))
+
+    async def worker():
+        for i in next_index:
+            url, kwargs = scenario.build(i, ctx)
+            started = time.perf_counter()
+            response = await client.request(scenario.method, url, **kwargs)
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[response.status_code] += 1
+            match = STATEMENTS.search(response.headers.get("server-timing", ""))
+            if match:
+                statements.append(int(match.group(1)))
+            if response.status_code >= 400:
+                if len(errors) < 3:
+                    errors.append(f"{response.status_code}: {response.text[:200]}")
+            elif scenario.after:
+                scenario.after(i, response, ctx)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, count))))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    failed = sum(n for status, n in statuses.items() if status >= 400)
+    return {
+        "requests": count,
+        "errors": failed,
+        "statuses": {str(status): n for status, n in sorted(statuses.items())},
+        "throughput_rps": round(count / wall, 2) if wall else None,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 3) if latencies else None,
+            **{f"p{q}": round(percentile(latencies, q), 3) if latencies else None for q in (50, 95, 99)},
+            "max": round(latencies[-1], 3) if latencies else None,
+        },
+        "statements": {
+            "mean": round(sum(statements) / len(statements), 2) if statements else None,
+            "max": max(statements) if statements else None,
+        },
+        "sample_errors": errors,
+    }
+
+
+def _client(args):
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    timeout = httpx.Timeout(args.timeout)
+    if args.url:
+        return httpx.AsyncClient(base_url=args.url, limits=limits, timeout=timeout)
+
+    # In process: ASGITransport does not run lifespan handlers, so migrate here
+    from database import init_db
+    from server import create_app
+
+    init_db()
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app()), base_url="http://bench", timeout=timeout)
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args):
+    ctx = Context(args.students, args.sems, args.subjects)
+    client = _client(args)
+    only = re.compile(args.only) if args.only else None
+    results = {}
+    try:
+        for scenario in scenarios():
+            if (args.reads_only and scenario.write) or (only and not only.search(scenario.name)):
+                continue
+            if "{job_id}" in scenario.route and not ctx.job_ids:
+                continue
+            count = max(1, int(args.requests * scenario.weight))
+            result = await run_scenario(client, scenario, count, args.concurrency, ctx)
+            results[scenario.name] = result
+            p = result["latency_ms"]
+            print(f"{scenario.name:55s} {result['throughput_rps']:9.1f} req/s  p50 {p['p50']:8.2f}  "
+                  f"p95 {p['p95']:8.2f}  p99 {p['p99']:8.2f} ms  stmts {result['statements']['mean']}"
+                  + (f"  errors {result['errors']}" if result["errors"] else ""), file=sys.stderr)
+    finally:
+        await client.aclose()
+
+    return {
+        "meta": {
+            "commit": _commit(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "mode": "http" if args.url else "in-process",
+            "students": args.students,
+            "sems": args.sems,
+            "subjects": args.subjects,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+        },
+        "scenarios": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every route; JSON report")
+    parser.add_argument("--students", type=int, default=10000, help="must match bench/seed.py")
+    parser.add_argument("--sems", type=int, default=4, help="must match bench/seed.py")
+    parser.add_argument("--subjects", type=int, default=2, help="must match bench/seed.py")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario (scaled by its weight)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--only", help="regex on scenario names, e.g. 'main GET'")
+    parser.add_argument("--reads-only", action="store_true")
+    parser.add_argument("--url", help="running server, e.g. http://localhost:8000")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
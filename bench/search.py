@@ -0,0 +1,97 @@
+"""Search latency at scale.
+
+    python bench/search.py [students] [queries]
+
+Seeds a throwaway SQLite database with synthetic students (500k by
+default), builds the search index from it and reports build time and
+p50/p95/p99 latency over a mix of prefix, exact, typo and number queries.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from database import Base  # noqa: E402
+from models import StudentData  # noqa: E402
+from search import StudentSearchIndex  # noqa: E402
+
+FIRST = ["Ravi", "Priya", "Arun", "Karthik", "Divya", "Lakshmi", "Suresh", "Meena", "Vignesh", "Anitha",
+         "Sathish", "Kavya", "Harish", "Nandhini", "Gokul", "Deepa", "Ramesh", "Sowmya", "Praveen", "Janani"]
+LAST = ["Kumar", "Raja", "Bharathi", "Dharshini", "Krishnan", "Subramani", "Murugan", "Selvam", "Devi",
+        "Ganesan", "Pandian", "Sundaram", "Venkatesh", "Narayanan", "Shankar", "Rajendran"]
+DEPARTMENTS = ["CSE", "ECE", "EEE", "MECH", "CIVIL", "IT"]
+BATCH = 20000
+
+
+def seed(engine, count, rng):
+    Base.metadata.create_all(engine)
+    table = StudentData.__table__
+    with engine.begin() as conn:
+        for start in range(0, count, BATCH):
+            conn.execute(table.insert(), [
+                {
+                    "student_id": i + 1,
+                    "student_name": f"{rng.choice(FIRST)} {rng.choice(LAST)} {chr(65 + i % 26)}",
+                    "dob": date(2003, 1, 1),
+                    "department": rng.choice(DEPARTMENTS),
+                    "register_num": f"21{DEPARTMENTS[i % 6]}{i:06d}",
+                    "university_num": 710000000 + i,
+                }
+                for i in range(start, min(start + BATCH, count))
+            ])
+
+
+def _typo(word, rng):
+    i = rng.randrange(1, len(word))
+    return word[:i] + word[i + 1:]
+
+
+def queries(count, students, rng):
+    kinds = [
+        lambda: rng.choice(FIRST)[:rng.randint(2, 4)],                          # name prefix
+        lambda: f"{rng.choice(FIRST)} {rng.choice(LAST)[:3]}",                  # two words
+        lambda: _typo(rng.choice(FIRST + LAST), rng),                           # typo
+        lambda: f"21{DEPARTMENTS[0]}{rng.randrange(students):06d}",             # register number
+        lambda: str(710000000 + rng.randrange(students))[:rng.randint(6, 9)],   # university prefix
+    ]
+    return [rng.choice(kinds)() for _ in range(count)]
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(int(len(sorted_values) * q / 100), len(sorted_values) - 1)]
+
+
+def main(students=500000, n_queries=2000):
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/search.db")
+        started = time.perf_counter()
+        seed(engine, students, rng)
+        print(f"seeded {students} students in {time.perf_counter() - started:.1f}s")
+
+        index = StudentSearchIndex(sessionmaker(bind=engine))
+        index.build()
+        print(f"index built in {index.build_ms / 1000:.1f}s")
+
+        timings = []
+        for query in queries(n_queries, students, rng):
+            started = time.perf_counter()
+            index.search(query, 20)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        print(f"{n_queries} queries: p50 {percentile(timings, 50):.2f} ms, "
+              f"p95 {percentile(timings, 95):.2f} ms, p99 {percentile(timings, 99):.2f} ms, "
+              f"max {timings[-1]:.2f} ms")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    main(*args)
@@ -0,0 +1,165 @@
+"""Deterministic synthetic dataset for benchmarks.
+
+    python bench/seed.py --students 100000 [--sems 4] [--subjects 2] [--seed 42] [--reset]
+
+Writes to DATABASE_URL (see config.py), e.g.
+
+    DATABASE_URL=sqlite:///bench.db python bench/seed.py --students 10000
+
+The same arguments always produce the same rows, which bench/load.py relies
+on: student n (1-based) has register number ``register_num(n)``, university
+number ``UNIVERSITY_BASE + n``, info and record id n, and sem rows
+``sem_info_ids(n, sems, subjects)``.  Rows go in with multi-row Core
+inserts, one transaction per chunk, and the dashboard aggregates are rebuilt
+at the end.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, func, select  # noqa: E402
+
+FIRST = ["Ravi", "Priya", "Arun", "Karthik", "Divya", "Lakshmi", "Suresh", "Meena", "Vignesh", "Anitha",
+         "Sathish", "Kavya", "Harish", "Nandhini", "Gokul", "Deepa", "Ramesh", "Sowmya", "Praveen", "Janani"]
+LAST = ["Kumar", "Raja", "Bharathi", "Dharshini", "Krishnan", "Subramani", "Murugan", "Selvam", "Devi",
+        "Ganesan", "Pandian", "Sundaram", "Venkatesh", "Narayanan", "Shankar", "Rajendran"]
+DEPARTMENTS = ["CSE", "ECE", "EEE", "MECH", "CIVIL", "IT"]
+SUBJECTS = ["Maths", "Physics", "Chemistry", "English", "Programming", "Electronics", "Mechanics", "Drawing"]
+GRADES = [(91, "O"), (81, "A+"), (71, "A"), (61, "B+"), (56, "B"), (50, "C"), (0, "U")]
+BLOOD_GROUPS = ["O+", "O-", "A+", "A-", "B+", "B-", "AB+", "AB-"]
+UNIVERSITY_BASE = 710000000
+CHUNK_SIZE = 5000
+
+
+def register_num(n):
+    return f"REG{n:07d}"
+
+
+def sem_info_ids(n, sems, subjects):
+    first = (n - 1) * sems * subjects + 1
+    return range(first, first + sems * subjects)
+
+
+def _grade(mark):
+    return next(grade for floor, grade in GRADES if mark >= floor)
+
+
+def generate(start, stop, sems, subjects, rng):
+    """Rows for students start..stop-1 (1-based ids), as dicts per table."""
+    students, infos, sem_rows, records = [], [], [], []
+    born = date(2002, 1, 1)
+    for n in range(start, stop):
+        sem_ids = iter(sem_info_ids(n, sems, subjects))
+        department = DEPARTMENTS[n % len(DEPARTMENTS)]
+        students.append({
+            "student_id": n,
+            "student_name": f"{rng.choice(FIRST)} {rng.choice(LAST)}",
+            "dob": born + timedelta(days=rng.randrange(1500)),
+            "department": department,
+            "register_num": register_num(n),
+            "university_num": UNIVERSITY_BASE + n,
+        })
+        infos.append({
+            "student_info_id": n,
+            "student_id": n,
+            "address": f"{rng.randrange(1, 200)} Main Road",
+            "blood_grp": rng.choice(BLOOD_GROUPS),
+            "mail_id": f"student{n}@example.com",
+            "phone_no": 9000000000 + n,
+            "year": 1 + n % 4,
+        })
+        ability = rng.gauss(68, 12)
+        for semester in range(1, sems + 1):
+            cgpa = round(min(max(rng.gauss(ability / 10, 0.8), 0.0), 10.0), 2)
+            for k in range(subjects):
+                mark = int(min(max(rng.gauss(ability, 10), 0), 100))
+                sem_rows.append({
+                    "sem_info_id": next(sem_ids),
+                    "student_id": n,
+                    "student_info_id": n,
+                    "cgpa": cgpa,
+                    "semester": semester,
+                    "pass_fail": "Pass" if mark >= 50 else "Fail",
+                    "grade": _grade(mark),
+                    "mark": mark,
+                    "subject": SUBJECTS[(semester + k) % len(SUBJECTS)],
+                })
+        records.append({
+            "student_record_id": n,
+            "student_id": n,
+            "father_name": f"{rng.choice(FIRST)} {rng.choice(LAST)}",
+            "mother_name": f"{rng.choice(FIRST)} {rng.choice(LAST)}",
+            "father_occupation": rng.choice(["Farmer", "Teacher", "Engineer", "Business", "Driver"]),
+            "aadhar_num": 100000000000 + n,
+            "tenth_mark": rng.randrange(250, 500),
+            "twelfth_mark": rng.randrange(300, 600),
+            "account_num": 5000000000 + n,
+            "community": rng.choice(["BC", "MBC", "OC", "SC", "ST"]),
+            "religion": rng.choice(["Hindu", "Christian", "Muslim"]),
+            "nationality": "Indian",
+        })
+    return students, infos, sem_rows, records
+
+
+def seed(engine, students, sems=4, subjects=2, seed_value=42, reset=False, chunk_size=CHUNK_SIZE, log=print):
+    import aggregates
+    from database import SessionLocal, migrate
+    from models import (
+        DepartmentSemesterStats, DepartmentStats, StudentData, StudentInfo, StudentRecord, StudentSemInfo,
+    )
+
+    migrate()
+    tables = [StudentData, StudentInfo, StudentSemInfo, StudentRecord]
+    with engine.begin() as conn:
+        existing = conn.execute(select(func.count()).select_from(StudentData)).scalar()
+        if existing and not reset:
+            raise SystemExit(f"{existing} students already present; pass --reset to replace them")
+        for model in [StudentSemInfo, StudentRecord, StudentInfo, StudentData, DepartmentSemesterStats, DepartmentStats]:
+            conn.execute(delete(model))
+
+    rng = random.Random(seed_value)
+    started = time.perf_counter()
+    for start in range(1, students + 1, chunk_size):
+        stop = min(start + chunk_size, students + 1)
+        rows = generate(start, stop, sems, subjects, rng)
+        with engine.begin() as conn:
+            if conn.dialect.name == "sqlite":
+                conn.exec_driver_sql("PRAGMA synchronous=OFF")
+            for model, chunk in zip(tables, rows):
+                conn.execute(model.__table__.insert(), chunk)
+        done = stop - 1
+        if done % (chunk_size * 20) == 0 or done == students:
+            elapsed = time.perf_counter() - started
+            log(f"  {done} students ({done / elapsed:.0f}/s)")
+
+    db = SessionLocal()
+    try:
+        aggregates.rebuild(db)
+    finally:
+        db.close()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a deterministic benchmark dataset")
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--sems", type=int, default=4, help="semesters per student")
+    parser.add_argument("--subjects", type=int, default=2, help="subject rows per semester")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="delete existing students first")
+    args = parser.parse_args()
+
+    from database import engine
+
+    print(f"seeding {args.students} students x {args.sems} sems x {args.subjects} subjects into {engine.url!r}")
+    elapsed = seed(engine, args.students, args.sems, args.subjects, args.seed, args.reset)
+    print(f"done in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
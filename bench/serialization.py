@@ -0,0 +1,104 @@
+"""Serialization time per 10k full profiles, old path vs fastjson.
+
+    python bench/serialization.py [count]
+
+The old path is what get_all_students used to do: an ORM object per section,
+``FullStudentResponse.model_validate`` per row, then FastAPI re-validating the
+list against ``response_model`` and dumping it.  The fast path serializes the
+nested dicts built from flat rows once with pydantic-core.  No database is
+needed; the rows are synthetic.
+"""
+import os
+import sys
+import time
+from datetime import date
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from pydantic_core import to_json  # noqa: E402
+
+import export  # noqa: E402
+from models import StudentData, StudentInfo, StudentRecord, StudentSemInfo  # noqa: E402
+from schemas import FullStudentResponse  # noqa: E402
+
+REPEAT = 5
+
+
+def _row(i):
+    values = {
+        "student.student_id": i, "student.student_name": f"Student {i}", "student.dob": date(2003, 1, 1),
+        "student.department": "CSE", "student.register_num": f"R{i:06d}", "student.university_num": 100000 + i,
+        "info.student_info_id": i, "info.student_id": i, "info.address": "12 Main Road", "info.blood_grp": "O+",
+        "info.mail_id": f"s{i}@example.com", "info.phone_no": 9000000000 + i, "info.year": 2,
+        "sem_info.sem_info_id": i, "sem_info.student_id": i, "sem_info.student_info_id": i, "sem_info.cgpa": 7.5,
+        "sem_info.semester": 3, "sem_info.pass_fail": "Pass", "sem_info.grade": "A", "sem_info.mark": 78,
+        "sem_info.subject": "Maths",
+        "record.student_record_id": i, "record.student_id": i, "record.father_name": "F", "record.mother_name": "M",
+        "record.father_occupation": "Farmer", "record.aadhar_num": 123456789012, "record.tenth_mark": 450,
+        "record.twelfth_mark": 520, "record.account_num": 1234567890, "record.community": "BC",
+        "record.religion": "Hindu", "record.nationality": "Indian",
+    }
+    return {name: values.get(name) for name in export.CSV_HEADER}
+
+
+def _orm_objects(row):
+    models = {"student": StudentData, "info": StudentInfo, "sem_info": StudentSemInfo, "record": StudentRecord}
+    return {
+        section: models[section](**fields)
+        for section, fields in export.nest_profile(row).items()
+    }
+
+
+def old_path(objects, adapter):
+    profiles = [FullStudentResponse.model_validate(o) for o in objects]
+    # serialize_response(): validate against response_model, then encode
+    validated = adapter.validate_python(profiles, from_attributes=True)
+    return adapter.dump_json(validated)
+
+
+def old_path_encoder(objects, adapter):
+    # FastAPI < 0.100 style: jsonable_encoder then json.dumps
+    import json
+
+    profiles = [FullStudentResponse.model_validate(o) for o in objects]
+    validated = adapter.validate_python(profiles, from_attributes=True)
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+def fast_path(rows):
+    return to_json([export.nest_profile(row) for row in rows])
+
+
+def _best(fn, *args):
+    best = float("inf")
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(count=10000):
+    rows = [_row(i) for i in range(1, count + 1)]
+    objects = [_orm_objects(row) for row in rows]
+    adapter = TypeAdapter(List[FullStudentResponse])
+
+    assert old_path(objects, adapter) == fast_path(rows)
+
+    scale = 10000 / count
+    results = {
+        "old (validate + response_model)": _best(old_path, objects, adapter),
+        "old (jsonable_encoder)": _best(old_path_encoder, objects, adapter),
+        "fastjson": _best(fast_path, rows),
+    }
+    baseline = results["old (validate + response_model)"]
+    print(f"{count} profiles, best of {REPEAT}, ms per 10k profiles")
+    for name, elapsed in results.items():
+        print(f"  {name:34s} {elapsed * scale * 1000:8.1f}  ({baseline / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
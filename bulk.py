@@ -0,0 +1,141 @@
+"""Batched insert path for full student profiles.
+
+Each chunk of profiles is written with one multi-row INSERT per table, so a
+chunk costs a handful of round-trips regardless of its size.  Rows that
+cannot be written are reported back by their position in the payload
+instead of failing the whole batch.
+"""
+from typing import Any, Dict, List, Sequence, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import or_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from models import StudentData, StudentInfo, StudentRecord, StudentSemInfo
+from schemas import FullStudentCreate
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_CHUNK_SIZE = 10000
+
+
+def validate_entries(raw_entries: Sequence[Tuple[int, Any]]):
+    """Validate (index, raw) pairs, returning valid (index, entry) pairs and errors."""
+    valid, errors = [], []
+    for index, raw in raw_entries:
+        try:
+            valid.append((index, FullStudentCreate.model_validate(raw)))
+        except ValidationError as e:
+            errors.append({"index": index, "detail": e.errors(include_url=False, include_context=False, include_input=False)})
+    return valid, errors
+
+
+def _drop_duplicates(db: Session, entries, seen_register, seen_university):
+    """Reject entries whose unique keys repeat within the payload or already exist."""
+    kept, errors = [], []
+    for index, entry in entries:
+        register_num, university_num = entry.student.register_num, entry.student.university_num
+        if register_num in seen_register or university_num in seen_university:
+            errors.append({"index": index, "detail": "Duplicate register_num or university_num in payload"})
+            continue
+        seen_register.add(register_num)
+        seen_university.add(university_num)
+        kept.append((index, entry))
+
+    if not kept:
+        return kept, errors
+
+    existing = db.query(StudentData.register_num, StudentData.university_num).filter(or_(
+        StudentData.register_num.in_([entry.student.register_num for _, entry in kept]),
+        StudentData.university_num.in_([entry.student.university_num for _, entry in kept]),
+    )).all()
+    if not existing:
+        return kept, errors
+
+    taken_register = {row.register_num for row in existing}
+    taken_university = {row.university_num for row in existing}
+    fresh = []
+    for index, entry in kept:
+        if entry.student.register_num in taken_register or entry.student.university_num in taken_university:
+            errors.append({"index": index, "detail": "Student already exists"})
+        else:
+            fresh.append((index, entry))
+    return fresh, errors
+
+
+def _insert_chunk(db: Session, entries: List[FullStudentCreate]) -> List[int]:
+    """Insert profiles with one multi-row INSERT per table; returns ids in entry order."""
+    db.execute(StudentData.__table__.insert(), [entry.student.model_dump() for entry in entries])
+
+    # MySQL has no INSERT .. RETURNING, so read the generated keys back
+    # through the unique register number.
+    register_nums = [entry.student.register_num for entry in entries]
+    id_by_register = dict(
+        db.query(StudentData.register_num, StudentData.student_id)
+        .filter(StudentData.register_num.in_(register_nums))
+    )
+    student_ids = [id_by_register[register_num] for register_num in register_nums]
+
+    db.execute(StudentInfo.__table__.insert(), [
+        {**entry.info.model_dump(), "student_id": student_id}
+        for entry, student_id in zip(entries, student_ids)
+    ])
+    info_id_by_student = dict(
+        db.query(StudentInfo.student_id, StudentInfo.student_info_id)
+        .filter(StudentInfo.student_id.in_(student_ids))
+    )
+
+    db.execute(StudentSemInfo.__table__.insert(), [
+        {**entry.sem_info.model_dump(), "student_id": student_id, "student_info_id": info_id_by_student[student_id]}
+        for entry, student_id in zip(entries, student_ids)
+    ])
+    db.execute(StudentRecord.__table__.insert(), [
+        {**entry.record.model_dump(), "student_id": student_id}
+        for entry, student_id in zip(entries, student_ids)
+    ])
+    return student_ids
+
+
+def insert_entries(db: Session, entries, seen_register=None, seen_university=None):
+    """Insert validated (index, entry) pairs as one chunk inside the caller's transaction.
+
+    A failing chunk is retried row by row, each row in its own savepoint, so
+    only the offending rows are rejected.  Returns (student_ids, errors).
+    """
+    entries, errors = _drop_duplicates(
+        db, entries,
+        set() if seen_register is None else seen_register,
+        set() if seen_university is None else seen_university,
+    )
+    if not entries:
+        return [], errors
+
+    try:
+        with db.begin_nested():
+            return _insert_chunk(db, [entry for _, entry in entries]), errors
+    except SQLAlchemyError:
+        pass
+
+    student_ids = []
+    for index, entry in entries:
+        try:
+            with db.begin_nested():
+                student_ids.extend(_insert_chunk(db, [entry]))
+        except SQLAlchemyError as e:
+            errors.append({"index": index, "detail": f"Database error: {getattr(e, 'orig', e)}"})
+    return student_ids, errors
+
+
+def insert_many(db: Session, raw_entries: List[Dict[str, Any]], chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Validate and insert a whole payload in chunks; the caller commits once."""
+    valid, errors = validate_entries(list(enumerate(raw_entries)))
+
+    seen_register, seen_university = set(), set()
+    student_ids = []
+    for start in range(0, len(valid), chunk_size):
+        ids, chunk_errors = insert_entries(db, valid[start:start + chunk_size], seen_register, seen_university)
+        student_ids.extend(ids)
+        errors.extend(chunk_errors)
+
+    errors.sort(key=lambda error: error["index"])
+    return student_ids, errors
@@ -0,0 +1,125 @@
+"""Bounded LRU + TTL cache for serialized student profiles."""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from starlette.responses import Response
+
+import config
+from changes import on_all_students_changed, on_students_changed
+
+
+class LRUTTLCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation, see reserve()
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def reserve(self):
+        """Token to pass to set() for a value that is about to be loaded.
+
+        If anything is invalidated between reserve() and set(), the loaded
+        value may predate that write, so set() drops it.
+        """
+        with self._lock:
+            return self._epoch
+
+    def set(self, key, value, token=None):
+        with self._lock:
+            if token is not None and token != self._epoch:
+                return
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_many(self, keys):
+        with self._lock:
+            self._epoch += 1
+            for key in keys:
+                if self._data.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+class CachedBody:
+    """A serialized JSON response and its strong ETag."""
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+    def matches(self, if_none_match):
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        # Weak comparison, as If-None-Match requires
+        return any(tag.removeprefix("W/") == self.etag for tag in tags)
+
+    def response(self, if_none_match):
+        """The body, or a 304 if the client's copy is current."""
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache"}
+        if self.matches(if_none_match):
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+
+profile_cache = LRUTTLCache(config.PROFILE_CACHE_SIZE, config.PROFILE_CACHE_TTL)
+
+
+@on_students_changed
+def _invalidate_profiles(student_ids):
+    profile_cache.invalidate_many(student_ids)
+
+
+on_all_students_changed(profile_cache.clear)
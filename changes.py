@@ -0,0 +1,80 @@
+"""Post-commit notifications for writes that touch student profiles.
+
+Write paths call ``mark_changed(db, student_ids)`` inside their transaction
+(``created=True`` for students it inserts); once the session commits, every
+listener registered with ``on_students_changed`` is called with the
+affected ids, and every ``on_students_written`` listener with those and the
+created ones.  Rolled back transactions notify nobody.
+
+A pass over the whole table calls ``mark_all_changed(db)`` instead: its
+commit calls the ``on_all_students_changed`` listeners, which reset or
+invalidate everything at once rather than handle every id.
+"""
+import logging
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger("changes")
+
+_listeners = []
+_write_listeners = []
+_reset_listeners = []
+
+
+def on_students_changed(listener):
+    """Register ``listener(student_ids)``; usable as a decorator."""
+    _listeners.append(listener)
+    return listener
+
+
+def on_students_written(listener):
+    """Register ``listener(student_ids, created_ids)``; usable as a decorator."""
+    _write_listeners.append(listener)
+    return listener
+
+
+def on_all_students_changed(listener):
+    """Register ``listener()`` for commits of ``mark_all_changed``; usable as a decorator."""
+    _reset_listeners.append(listener)
+    return listener
+
+
+def mark_changed(db: Session, student_ids, created=False):
+    student_ids = {student_id for student_id in student_ids if student_id is not None}
+    db.info.setdefault("changed_students", set()).update(student_ids)
+    if created:
+        db.info.setdefault("created_students", set()).update(student_ids)
+
+
+def mark_all_changed(db: Session):
+    """Every student may have changed: listeners start over instead of taking ids."""
+    db.info["all_students_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _notify(session):
+    all_changed = session.info.pop("all_students_changed", False)
+    student_ids = session.info.pop("changed_students", None)
+    created_ids = session.info.pop("created_students", set())
+    if all_changed:
+        calls = [(listener, ()) for listener in _reset_listeners]
+    elif student_ids:
+        calls = [(listener, (student_ids,)) for listener in _listeners]
+        calls += [(listener, (student_ids, created_ids)) for listener in _write_listeners]
+    else:
+        return
+    for listener, args in calls:
+        try:
+            listener(*args)
+        except Exception:
+            # The write is already committed; a failing listener must not
+            # turn it into an error response.
+            logger.exception("students-changed listener %r failed", listener)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session):
+    session.info.pop("all_students_changed", None)
+    session.info.pop("changed_students", None)
+    session.info.pop("created_students", None)
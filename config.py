@@ -0,0 +1,112 @@
+"""Runtime settings, read from the environment (and a local .env file)."""
+import os
+import tempfile
+from urllib.parse import quote_plus
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+def _env_bool(name, default):
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+DB_USER = os.getenv("DB_USER", "root")
+DB_PASSWORD = quote_plus(os.getenv("DB_PASSWORD", ""))  # Escape special characters
+DB_HOST = os.getenv("DB_HOST", "localhost")
+DB_NAME = os.getenv("DB_NAME", "college")
+
+DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}",
+)
+# Optional; GET routes read from here when set
+READ_REPLICA_URL = os.getenv("READ_REPLICA_URL") or None
+
+# "sync" serves the full-student routes from routes.py on the blocking
+# engine, "async" serves them from async_routes.py instead.
+DB_MODE = os.getenv("DB_MODE", "sync")
+# Use sqlite+aiosqlite:///... for a local stand-in
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL",
+    f"mysql+aiomysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}",
+)
+
+# Connection pool, applied to every engine
+DB_POOL_SIZE = _env_int("DB_POOL_SIZE", 10)
+DB_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", 20)
+DB_POOL_TIMEOUT = _env_int("DB_POOL_TIMEOUT", 30)      # seconds to wait for a free connection
+DB_POOL_RECYCLE = _env_int("DB_POOL_RECYCLE", 1800)    # below MySQL's wait_timeout
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+# Checkouts that wait longer than this count as slow in /metrics/pool
+DB_POOL_SLOW_CHECKOUT_MS = _env_int("DB_POOL_SLOW_CHECKOUT_MS", 10)
+
+# Request instrumentation (instrumentation.py)
+SQL_STATEMENT_BUDGET = _env_int("SQL_STATEMENT_BUDGET", 20)        # statements per request
+SQL_N_PLUS_ONE_THRESHOLD = _env_int("SQL_N_PLUS_ONE_THRESHOLD", 5)  # repeats of one statement
+
+# Profile lookups arriving within this window share one batched query
+PROFILE_LOADER_WINDOW_MS = float(os.getenv("PROFILE_LOADER_WINDOW_MS", 2))
+
+# Serialized profile cache (cache.py)
+PROFILE_CACHE_SIZE = _env_int("PROFILE_CACHE_SIZE", 10000)   # entries
+PROFILE_CACHE_TTL = _env_int("PROFILE_CACHE_TTL", 300)       # seconds
+
+# Cohort analytics (analytics.py) reload after API writes right away; this
+# bounds how stale they get after writes made outside the API.
+ANALYTICS_MAX_AGE = _env_int("ANALYTICS_MAX_AGE", 600)   # seconds
+
+# Background jobs (jobs.py)
+JOB_THREAD_WORKERS = _env_int("JOB_THREAD_WORKERS", 4)      # I/O-bound jobs: imports, exports, purges
+JOB_PROCESS_WORKERS = _env_int("JOB_PROCESS_WORKERS", 2)    # CPU-bound jobs: reports, aggregate rebuilds
+JOB_MAX_QUEUED = _env_int("JOB_MAX_QUEUED", 100)            # submissions beyond this get a 503
+JOB_PROGRESS_INTERVAL = float(os.getenv("JOB_PROGRESS_INTERVAL", 0.5))  # seconds between progress writes
+JOB_RETENTION_HOURS = _env_int("JOB_RETENTION_HOURS", 7 * 24)  # finished jobs and their files
+JOB_RESULTS_DIR = os.getenv("JOB_RESULTS_DIR") or os.path.join(tempfile.gettempdir(), "student-jobs")
+# Students deleted per transaction by a purge (purge.py), by default and at most
+PURGE_CHUNK_SIZE = _env_int("PURGE_CHUNK_SIZE", 500)
+PURGE_MAX_CHUNK_SIZE = _env_int("PURGE_MAX_CHUNK_SIZE", 5000)
+
+# Grades, pass/fail and CGPA derived from marks (grading.py)
+GRADING_AUTO = _env_bool("GRADING_AUTO", True)   # re-derive the students a write touches
+GRADING_RULES = os.getenv("GRADING_RULES") or None  # JSON file; the built-in scale when unset
+
+# Questions from TalkToStudents (qa.py)
+QA_BACKEND = os.getenv("QA_BACKEND", "stub")   # "stub" answers offline; "openai" needs OPENAI_API_KEY
+QA_MODEL = os.getenv("QA_MODEL", "gpt-4o-mini")
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY") or None
+QA_CACHE_SIZE = _env_int("QA_CACHE_SIZE", 1000)   # answers
+QA_CACHE_TTL = _env_int("QA_CACHE_TTL", 600)      # seconds; any write clears the cache sooner
+
+# The app (server.py)
+CORS_ORIGINS = [origin.strip() for origin in os.getenv("CORS_ORIGINS", "*").split(",") if origin.strip()]
+# Done at startup so the first requests don't pay for them; a subset of
+# pool, schemas, rankings, search, analytics
+STARTUP_WARMUP = [step.strip() for step in os.getenv("STARTUP_WARMUP", "pool,schemas,rankings,search,analytics").split(",")
+                  if step.strip()]
+
+# Live updates pushed to dashboards over server-sent events (live.py)
+LIVE_FLUSH_MS = _env_int("LIVE_FLUSH_MS", 100)            # writes within this window go out as one delta
+LIVE_HEARTBEAT_SECONDS = _env_int("LIVE_HEARTBEAT_SECONDS", 15)  # keeps idle connections through proxies
+LIVE_MAX_PENDING_IDS = _env_int("LIVE_MAX_PENDING_IDS", 1000)    # a consumer further behind is told to resync
+LIVE_MAX_SUBSCRIBERS = _env_int("LIVE_MAX_SUBSCRIBERS", 10000)
+
+# Admission control per route class (admission.py): requests past the
+# concurrency limit queue, and past the queue limit get a 503.  Together
+# the limits stay under the 40 worker threads sync routes run on.
+ADMISSION_ENABLED = _env_bool("ADMISSION_ENABLED", True)
+ADMISSION_BULK_CONCURRENCY = _env_int("ADMISSION_BULK_CONCURRENCY", 2)
+ADMISSION_BULK_QUEUE = _env_int("ADMISSION_BULK_QUEUE", 8)
+ADMISSION_LISTING_CONCURRENCY = _env_int("ADMISSION_LISTING_CONCURRENCY", 4)
+ADMISSION_LISTING_QUEUE = _env_int("ADMISSION_LISTING_QUEUE", 16)
+# Exports hold their slot for the whole stream, so they get a class of their own
+ADMISSION_EXPORT_CONCURRENCY = _env_int("ADMISSION_EXPORT_CONCURRENCY", 2)
+ADMISSION_EXPORT_QUEUE = _env_int("ADMISSION_EXPORT_QUEUE", 4)
+ADMISSION_READ_CONCURRENCY = _env_int("ADMISSION_READ_CONCURRENCY", 32)
+ADMISSION_READ_QUEUE = _env_int("ADMISSION_READ_QUEUE", 256)
+ADMISSION_QUEUE_TIMEOUT_MS = _env_int("ADMISSION_QUEUE_TIMEOUT_MS", 5000)  # longest wait in a queue
@@ -1,16 +1,136 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, declarative_base
-from urllib.parse import quote_plus
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+import config
+from instrumentation import instrument_engine
+from config import DATABASE_URL, READ_REPLICA_URL, ASYNC_DATABASE_URL
+
+
+class _TimedCheckout:
+    """Pool mixin that records how long callers wait for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.checkout_stats.record(time.perf_counter() - started, timed_out)
+
+    @property
+    def checkout_stats(self):
+        # Pools are re-created on dispose(), so the stats live on the instance
+        stats = self.__dict__.get("_checkout_stats")
+        if stats is None:
+            stats = self.__dict__.setdefault("_checkout_stats", CheckoutStats())
+        return stats
+
+
+class CheckoutStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.slow = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, waited, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            if waited * 1000 >= config.DB_POOL_SLOW_CHECKOUT_MS:
+                self.slow += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "slow_checkouts": self.slow,
+                "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
 
-DB_USER = "root"
-DB_PASSWORD = quote_plus("Cinthiya@30")  # Escape special characters
-DB_HOST = "localhost"
-DB_NAME = "college"
+def _engine_options(url, poolclass):
+    url = make_url(url)
+    options = {"pool_pre_ping": config.DB_POOL_PRE_PING}
+    if url.get_backend_name() == "sqlite":
+        # Local stand-in: one file shared by the threadpool workers
+        if url.get_driver_name() != "aiosqlite":
+            options["connect_args"] = {"check_same_thread": False}
+        if url.database in (None, "", ":memory:"):
+            return options
 
-DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
+    options.update(
+        poolclass=poolclass,
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_recycle=config.DB_POOL_RECYCLE,
+    )
+    return options
+
+
+def _enforce_foreign_keys(engine):
+    # SQLite ignores foreign keys (and so ON DELETE CASCADE) unless asked,
+    # per connection.
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _foreign_keys_on(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+def make_engine(url):
+    """Build a sync engine with the configured pool settings."""
+    engine = create_engine(url, **_engine_options(url, TimedQueuePool))
+    _enforce_foreign_keys(engine)
+    instrument_engine(engine)
+    return engine
+
+
+def make_async_engine(url):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    engine = create_async_engine(url, **_engine_options(url, TimedAsyncQueuePool))
+    _enforce_foreign_keys(engine.sync_engine)
+    instrument_engine(engine)
+    return engine
+
+
+engine = make_engine(DATABASE_URL)
+# Reads go to the replica when one is configured, otherwise to the primary
+read_engine = make_engine(READ_REPLICA_URL) if READ_REPLICA_URL else engine
 
-engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+ReadSessionLocal = sessionmaker(bind=read_engine, autoflush=False, autocommit=False)
 Base = declarative_base()
 
 def get_db():
@@ -19,3 +139,113 @@ def get_db():
         yield db
     finally:
         db.close()  # Make sure session closes
+
+
+def get_read_db():
+    # For GET routes only: the replica may lag behind the primary slightly
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# The async engine is only built when first used, so the async driver is
+# not needed unless DB_MODE=async.
+_async_engine = None
+_AsyncSessionLocal = None
+
+
+def get_async_engine():
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        _async_engine = make_async_engine(ASYNC_DATABASE_URL)
+        _AsyncSessionLocal = async_sessionmaker(
+            bind=_async_engine, autoflush=False, expire_on_commit=False
+        )
+    return _async_engine
+
+
+async def get_async_db():
+    get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        yield db
+
+
+def engines():
+    """Named engines that are currently in use, for metrics."""
+    named = {"primary": engine}
+    if read_engine is not engine:
+        named["replica"] = read_engine
+    if _async_engine is not None:
+        named["async"] = _async_engine.sync_engine
+    return named
+
+
+def pool_status(engine):
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        status.update(
+            size=pool.size(),
+            max_overflow=pool._max_overflow,
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            saturation=round(pool.checkedout() / capacity, 3) if capacity else None,
+        )
+    if isinstance(pool, _TimedCheckout):
+        status.update(pool.checkout_stats.snapshot())
+    return status
+
+
+@contextmanager
+def foreign_keys_off(connection):
+    """Suspend SQLite's foreign key enforcement on ``connection`` for a migration.
+
+    SQLite rebuilds a table to change its constraints; with foreign keys on,
+    dropping the old copy would fire the very cascades being added.  The
+    pragma is ignored inside a transaction, hence the commits.
+    """
+    sqlite = connection.dialect.name == "sqlite"
+    if sqlite:
+        connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+        connection.commit()
+    try:
+        yield connection
+    finally:
+        if sqlite:
+            connection.exec_driver_sql("PRAGMA foreign_keys=ON")
+            connection.commit()
+
+
+def migrate(revision="head"):
+    """Bring the schema up to ``revision`` with the migrations in migrations/."""
+    import os
+
+    from alembic import command
+    from alembic.config import Config
+
+    cfg = Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini"))
+    cfg.attributes["configure_logger"] = False
+    with engine.connect() as connection, foreign_keys_off(connection):
+        with connection.begin():
+            cfg.attributes["connection"] = connection
+            command.upgrade(cfg, revision)
+
+
+def init_db():
+    # Creates missing tables and indexes; tables made earlier by create_all()
+    # are adopted as they are.
+    migrate()
+
+    import aggregates
+
+    db = SessionLocal()
+    try:
+        aggregates.ensure_built(db)
+    finally:
+        db.close()
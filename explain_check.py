@@ -0,0 +1,351 @@
+"""EXPLAIN every statement the API issues and fail on full table scans.
+
+    python explain_check.py [--students N] [--url DATABASE_URL]
+
+Seeds a database (a throwaway SQLite file unless --url points somewhere
+else; use a scratch database, the check writes to it), brings it to the
+latest migration, drives one request through every route of the app
+(server.create_app: routes.py, backend.py and the feature routers), and
+runs EXPLAIN on each SELECT/UPDATE/DELETE those requests
+issued.  A plan that reads a whole table fails the check unless
+
+- the statement has a LIMIT and reads rows in index order (the scan stops
+  early, e.g. the first page of a keyset listing), or
+- the route/table pair is listed in ALLOWED_SCANS with the reason.
+
+Routes that no sample request reaches are reported as failures too, so new
+routes have to be added here.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+# Route -> tables it may read in full, and why
+ALLOWED_SCANS = {
+    ("main", "GET /students_full/export"): {"student_data"},        # streams the whole table
+    ("main", "GET /students/search"): {"student_data"},             # index build on first search
+    ("main", "GET /analytics/summary"): {"student_sem_info"},       # columnar load, once per change
+    ("main", "(outside a route)"): {"student_sem_info"},            # recompute_grades job re-derives everything
+    ("backend", "GET /student_info/"): {"student_info"},
+    ("backend", "GET /student_sem_info/"): {"student_sem_info"},
+    ("backend", "GET /student_record/"): {"student_record"},
+}
+# One row per department (and semester); reading them whole is the point
+SUMMARY_TABLES = {"dept_sem_stats", "dept_stats", "alembic_version"}
+
+# Plain app routes without TimedRoute, so not seen by route_metrics
+UNTIMED_ROUTES = {"GET /"}
+
+EXPLAINED = re.compile(r"^\s*(SELECT|UPDATE|DELETE)\b", re.I)
+HAS_LIMIT = re.compile(r"\bLIMIT\b", re.I)
+SQLITE_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?( USING (?:COVERING )?INDEX \w+)?")
+
+
+def _sample_profile(i, department="CSE", year=2, semester=3):
+    return {
+        "student": {"student_name": f"Student {i}", "dob": "2003-01-01", "department": department,
+                    "register_num": f"EX{i:06d}", "university_num": 900000 + i},
+        "info": {"address": "12 Main Road", "blood_grp": "O+", "mail_id": f"s{i}@example.com",
+                 "phone_no": 9000000000 + i, "year": year},
+        "sem_info": {"cgpa": 7.5, "semester": semester, "pass_fail": "Pass", "grade": "A", "mark": 78,
+                     "subject": "Maths"},
+        "record": {"father_name": "F", "mother_name": "M", "father_occupation": "Farmer",
+                   "aadhar_num": 100000000000 + i, "tenth_mark": 450, "twelfth_mark": 520,
+                   "account_num": 5000000000 + i, "community": "BC", "religion": "Hindu",
+                   "nationality": "Indian"},
+    }
+
+
+def shared_requests():
+    # analytics and metrics routers
+    return [
+        ("GET", "/analytics/summary", {"params": {"by": ["department", "semester"]}}),
+        ("GET", "/analytics/histogram", {}),
+        ("GET", "/analytics/pass-rates", {}),
+        ("GET", "/analytics/status", {}),
+        ("GET", "/metrics/pool", {}),
+        ("GET", "/metrics/requests", {}),
+        ("GET", "/metrics/loader", {}),
+        ("GET", "/metrics/cache", {}),
+        ("GET", "/metrics/search", {}),
+        ("GET", "/metrics/jobs", {}),
+        ("GET", "/metrics/rankings", {}),
+        ("GET", "/metrics/qa", {}),
+        ("GET", "/metrics/live", {}),
+        ("GET", "/metrics/admission", {}),
+        ("GET", "/metrics/startup", {}),
+        # The stream itself never ends; a rejected filter still reaches the route
+        ("GET", "/live", {"params": {"student_ids": "x"}, "expect": 422}),
+    ]
+
+
+def main_requests(students):
+    departments = ["CSE", "ECE", "MECH", "CIVIL"]
+    seed = [_sample_profile(i, departments[i % 4], 1 + i % 4, 1 + i % 8) for i in range(students)]
+    ndjson = json.dumps(_sample_profile(students + 1))
+    one = students // 2
+    return [
+        ("POST", "/students/bulk/", {"json": seed}),
+        ("POST", "/student_full/", {"json": _sample_profile(students + 2)}),
+        ("POST", "/students/import", {"files": {"file": ("import.ndjson", ndjson)}}),
+        ("GET", "/jobs/{job_id}", {}),
+        ("POST", "/jobs", {"json": {"kind": "export", "params": {"format": "csv", "department": "CSE"}}}),
+        ("GET", "/jobs/{job_id}/result", {}),
+        ("POST", "/jobs", {"json": {"kind": "analytics_report", "params": {"by": ["department"]}}}),
+        ("GET", "/jobs/{job_id}/result", {}),
+        # Finished by now (drive waits for 202s), so this is the 409 path
+        ("POST", "/jobs/{job_id}/cancel", {"expect": 409}),
+        ("GET", "/jobs", {"params": {"status": "completed", "limit": 10}}),
+        ("GET", "/jobs", {"params": {"kind": "import"}}),
+        ("GET", f"/student_full/{one}", {}),
+        ("GET", "/student_full/batch", {"params": {"ids": f"{one},{one + 1},{one + 2}"}}),
+        ("GET", "/students_full/", {"params": {"limit": 20}}),
+        ("GET", "/students_full/", {"params": {"limit": 20, "department": "ECE", "year": 2, "semester": 3}}),
+        ("GET", "/students_full/", {"params": {"limit": 20, "cursor": "__next__"}}),
+        ("GET", "/students_full/", {"params": {"limit": 20, "order": "desc", "semester": 5}}),
+        ("GET", "/students_full/export", {"params": {"department": "CSE"}}),
+        ("GET", "/student_data/", {"params": {"limit": 20}}),
+        ("GET", "/student_data/", {"params": {"limit": 20, "department": "MECH", "cursor": "__next__"}}),
+        ("GET", "/students/search", {"params": {"q": "student 12"}}),
+        ("GET", "/graph/all-charts", {}),
+        *shared_requests(),
+        ("GET", "/", {}),
+        # Student id n was seeded from _sample_profile(n - 1)
+        ("PUT", f"/students/{one}", {"json": _sample_profile(one - 1, "IT")}),
+        ("DELETE", f"/students/{one + 1}", {}),
+        ("PATCH", f"/students/{one}", {"json": {"sem_info": {"mark": 77}, "student": {"department": "CSE"}}}),
+        ("PATCH", f"/students/{one}", {"json": {"record": {"religion": "Patched"}}, "params": {"return_profile": True}}),
+        # Seeded student n has its sem row in semester 1 + (n - 1) % 8
+        ("PATCH", "/semesters/3/marks", {"json": {"items": [
+            {"student_id": n + 1, "subject": "Maths", "mark": 60 + n % 40, "pass_fail": "Pass"} for n in range(2, students, 8)
+        ]}}),
+        ("GET", f"/students/{one}/gpa", {}),
+        ("GET", "/rankings/CSE/1", {"params": {"limit": 10}}),
+        ("GET", f"/students/{one}/rank", {}),
+        ("POST", "/ask", {"json": {"question": "Who are the top 5 in CSE semester 1?"}}),
+        ("POST", "/ask", {"json": {"question": "What is the pass rate in ECE?"}}),
+        ("POST", "/ask", {"json": {"question": f"What is the rank of student {one}?"}}),
+        ("GET", "/ask/stream", {"params": {"q": "average cgpa in MECH semester 3"}}),
+        ("GET", "/grades/rules", {}),
+        ("POST", "/grades/recompute", {"json": {"student_ids": [one, one + 2]}}),
+        ("POST", "/grades/recompute", {"json": {}}),
+        ("GET", "/jobs/{job_id}", {}),
+        # Last, as it removes a quarter of the seeded students
+        ("POST", "/students/purge", {"params": {"department": "CIVIL", "year": 4, "dry_run": True}}),
+        ("POST", "/students/purge", {"params": {"department": "CIVIL", "year": 4, "chunk_size": 50}}),
+        ("GET", "/jobs/{job_id}", {}),
+    ]
+
+
+def backend_requests(students):
+    sid = students // 3
+    profile = _sample_profile(sid - 1)
+    return [
+        ("GET", f"/student_data/{sid}", {}),
+        ("PUT", f"/student_data/{sid}", {"json": {**profile["student"], "student_id": sid}}),
+        ("GET", "/student_info/", {}),
+        ("GET", f"/student_info/{sid}", {}),
+        ("PUT", f"/student_info/{sid}", {"json": {**profile["info"], "student_info_id": sid, "student_id": sid}}),
+        ("GET", "/student_sem_info/", {}),
+        ("GET", f"/student_sem_info/{sid}", {}),
+        ("PUT", f"/student_sem_info/{sid}", {"json": {**profile["sem_info"], "student_id": sid, "student_info_id": sid}}),
+        ("GET", "/student_record/", {}),
+        ("GET", f"/student_record/{sid}", {}),
+        ("PUT", f"/student_record/{sid}", {"json": {**profile["record"], "student_id": sid}}),
+        ("POST", "/student_data/", {"json": {**_sample_profile(students + 10)["student"], "student_id": students + 10}}),
+        ("POST", "/student_info/", {"json": {**profile["info"], "student_info_id": students + 10, "student_id": students + 10}}),
+        ("POST", "/student_sem_info/", {"json": {**profile["sem_info"], "student_id": students + 10, "student_info_id": students + 10}}),
+        ("POST", "/student_record", {"json": {**profile["record"], "student_id": students + 10}}),
+        ("DELETE", f"/student_sem_info/{sid + 1}", {}),
+        ("DELETE", f"/student_record/{sid + 1}", {}),
+        ("DELETE", f"/student_info/{sid + 1}", {}),
+        ("DELETE", f"/student_data/{sid + 1}", {}),
+        ("PATCH", f"/student_data/{sid}", {"json": {"student_name": "Patched"}}),
+        ("PATCH", f"/student_info/{sid}", {"json": {"year": 3}}),
+        ("PATCH", f"/student_sem_info/{sid}", {"json": {"cgpa": 8.1}}),
+        ("PATCH", f"/student_record/{sid}", {"json": {"religion": "Patched"}}),
+        ("POST", "/student_data/batch", {"json": [
+            {**_sample_profile(students + n)["student"], "student_id": students + n} for n in (20, 21)]}),
+        ("POST", "/student_info/batch", {"json": [
+            {**profile["info"], "student_info_id": students + n, "student_id": students + n} for n in (20, 21)]}),
+        ("POST", "/student_sem_info/batch", {"json": [
+            {**profile["sem_info"], "student_id": students + n, "student_info_id": students + n} for n in (20, 21)]}),
+        ("POST", "/student_record/batch", {"json": [{**profile["record"], "student_id": students + n} for n in (20, 21)]}),
+        ("GET", "/student_data/batch", {"params": {"ids": f"{sid},{sid + 2}"}}),
+        ("GET", "/student_info/batch", {"params": {"ids": f"{sid},{sid + 2}"}}),
+        ("GET", "/student_sem_info/batch", {"params": {"ids": f"{sid},{sid + 2}"}}),
+        ("GET", "/student_record/batch", {"params": {"ids": f"{sid},{sid + 2}"}}),
+        ("PUT", "/student_data/batch", {"json": [{**profile["student"], "student_id": sid}]}),
+        ("PUT", "/student_info/batch", {"json": [{**profile["info"], "student_info_id": sid, "student_id": sid}]}),
+        ("PUT", "/student_sem_info/batch", {"json": [
+            {**profile["sem_info"], "sem_info_id": sid, "student_id": sid, "student_info_id": sid}]}),
+        ("PUT", "/student_record/batch", {"json": [{**profile["record"], "student_record_id": sid, "student_id": sid}]}),
+        ("DELETE", "/student_sem_info/batch", {"params": {"ids": f"{sid + 2},{sid + 3}"}}),
+        ("DELETE", "/student_record/batch", {"params": {"ids": f"{sid + 2},{sid + 3}"}}),
+        ("DELETE", "/student_info/batch", {"params": {"ids": f"{sid + 2},{sid + 3}"}}),
+        ("DELETE", "/student_data/batch", {"params": {"ids": f"{sid + 2},{sid + 3}"}}),
+    ]
+
+
+class Recorder:
+    """Collects (route, statement, parameters) from the app's engine."""
+
+    def __init__(self):
+        self.app = None
+        self.seen = defaultdict(dict)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        from instrumentation import current_stats
+
+        if self.app is None or not EXPLAINED.match(statement):
+            return
+        stats = current_stats()
+        route = stats.route if stats is not None and stats.route else "(outside a route)"
+        if executemany:
+            parameters = parameters[0]
+        self.seen[(self.app, route)].setdefault(statement, parameters)
+
+
+def full_scans_sqlite(conn, statement, parameters, tables):
+    plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+    details = [row[3] for row in plan]
+    ordered = not any("USE TEMP B-TREE FOR ORDER BY" in detail for detail in details)
+    scans = []
+    for detail in details:
+        match = SQLITE_SCAN.match(detail)
+        if match and match.group(1) in tables:
+            scans.append((match.group(1), detail))
+    if scans and HAS_LIMIT.search(statement) and ordered and len(scans) == 1:
+        return [], details
+    return scans, details
+
+
+def full_scans_mysql(conn, statement, parameters, tables):
+    plan = conn.exec_driver_sql("EXPLAIN " + statement, parameters).mappings().all()
+    details = [f"{row['table']}: type={row['type']} key={row['key']} extra={row['Extra']}" for row in plan]
+    ordered = not any("filesort" in (row["Extra"] or "") for row in plan)
+    scans = [(row["table"], row["type"], detail) for row, detail in zip(plan, details)
+             if row["table"] in tables and row["type"] in ("ALL", "index")]
+    # A full index walk under a LIMIT without a filesort stops early
+    if len(scans) == 1 and scans[0][1] == "index" and HAS_LIMIT.search(statement) and ordered:
+        return [], details
+    return [(table, detail) for table, _, detail in scans], details
+
+
+def _wait_for_job(client, status_url, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if client.get(status_url).json().get("status") in ("completed", "failed", "cancelled"):
+            return
+        time.sleep(0.05)
+
+
+def drive(client, app_name, requests, recorder):
+    recorder.app = app_name
+    next_cursor, job_id, failures = None, None, []
+    for method, path, kwargs in requests:
+        path = path.replace("{job_id}", job_id or "missing")
+        kwargs = dict(kwargs)
+        expect = kwargs.pop("expect", None)
+        params = kwargs.get("params")
+        if params and params.get("cursor") == "__next__":
+            params = {**params, "cursor": next_cursor}
+            kwargs = {**kwargs, "params": params}
+        response = client.request(method, path, **kwargs)
+        if response.status_code >= 400 and response.status_code != expect:
+            failures.append(f"{app_name}: {method} {path} returned {response.status_code}: {response.text[:200]}")
+            continue
+        if response.headers.get("content-type", "").startswith("application/json"):
+            body = response.json()
+            if isinstance(body, dict):
+                next_cursor = body.get("next_cursor") or next_cursor
+                job_id = body.get("job_id") or job_id
+                # Let background jobs finish, so their statements are checked
+                # and the requests after them see the result
+                if response.status_code == 202 and "status_url" in body:
+                    _wait_for_job(client, body["status_url"])
+    recorder.app = None
+    return failures
+
+
+def routes_of(app):
+    return {
+        f"{method.upper()} {path}"
+        for path, operations in app.openapi()["paths"].items()
+        for method in operations
+    }
+
+
+def run(students):
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    import database
+    from instrumentation import route_metrics
+    from models import Base
+    from server import create_app
+
+    database.migrate()
+    recorder = Recorder()
+    event.listen(database.engine, "before_cursor_execute", recorder)
+    tables = set(Base.metadata.tables) - SUMMARY_TABLES
+
+    failures = []
+    app = create_app()
+    before = route_metrics.snapshot()
+    with TestClient(app, raise_server_exceptions=False) as client:
+        # Named after the module whose routes each list is for
+        failures += drive(client, "main", main_requests(students), recorder)
+        failures += drive(client, "backend", backend_requests(students), recorder)
+    # Every request is counted per route, including ones that run no SQL
+    hit = {route for route, m in route_metrics.snapshot().items()
+           if m["requests"] > before.get(route, {}).get("requests", 0)}
+    for route in sorted(routes_of(app) - hit - UNTIMED_ROUTES):
+        failures.append(f"{route} has no sample request in explain_check.py")
+
+    event.remove(database.engine, "before_cursor_execute", recorder)
+    explain = full_scans_sqlite if database.engine.dialect.name == "sqlite" else full_scans_mysql
+    checked = 0
+    with database.engine.connect() as conn:
+        for (app_name, route), statements in sorted(recorder.seen.items()):
+            allowed = ALLOWED_SCANS.get((app_name, route), set())
+            for statement, parameters in statements.items():
+                checked += 1
+                scans, details = explain(conn, statement, parameters, tables)
+                for table, detail in scans:
+                    if table not in allowed:
+                        failures.append(
+                            f"{app_name}: {route} scans {table}: {detail}\n    "
+                            + " ".join(statement.split())[:300]
+                        )
+    return checked, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--url", help="scratch database to seed and check (default: temporary SQLite)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before config.py is imported
+        os.environ["DATABASE_URL"] = args.url or f"sqlite:///{tmp}/explain_check.db"
+        os.environ.pop("READ_REPLICA_URL", None)
+        os.environ["DB_MODE"] = "sync"
+        checked, failures = run(args.students)
+
+    print(f"{checked} statements checked")
+    for failure in failures:
+        print("FAIL", failure)
+    if failures:
+        sys.exit(1)
+    print("OK: no full table scans")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Constant-memory export of full student profiles.
+
+Profiles are read with a single flat SELECT over a server-side cursor and
+written out one partition at a time, so neither the ORM objects nor the
+response body for the whole table ever exist in memory at once.  The same
+streams back the ``export`` background job, which writes to a result file
+instead of a response.
+"""
+import csv
+import io
+import json
+import os
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import func, select
+
+from database import ReadSessionLocal
+from jobs import job
+from models import StudentData, StudentInfo, StudentRecord, StudentSemInfo
+from pagination import filter_students
+from schemas import ExportJobParams, StudentDataSchema, StudentInfoSchema, StudentRecordSchema, StudentSemInfoSchema
+
+PARTITION_SIZE = 1000
+
+# Section name, model, primary key, response schema; mirrors FullStudentResponse
+SECTIONS = [
+    ("student", StudentData, StudentData.student_id, StudentDataSchema),
+    ("info", StudentInfo, StudentInfo.student_info_id, StudentInfoSchema),
+    ("sem_info", StudentSemInfo, StudentSemInfo.sem_info_id, StudentSemInfoSchema),
+    ("record", StudentRecord, StudentRecord.student_record_id, StudentRecordSchema),
+]
+
+COLUMNS = [
+    (section, field)
+    for section, _, _, schema in SECTIONS
+    for field in schema.model_fields
+]
+CSV_HEADER = [f"{section}.{field}" for section, field in COLUMNS]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _first_child_id(pk):
+    # Same row the ORM relationships would hand back first: the lowest id
+    return (
+        select(func.min(pk))
+        .where(pk.table.c.student_id == StudentData.student_id)
+        .correlate(StudentData)
+        .scalar_subquery()
+    )
+
+
+def profile_select():
+    """One flat row per student with the columns of every profile section."""
+    stmt = select(*[
+        model.__table__.c[field].label(f"{section}.{field}")
+        for section, model, _, schema in SECTIONS
+        for field in schema.model_fields
+    ]).select_from(StudentData)
+
+    for section, model, pk, _ in SECTIONS[1:]:
+        stmt = stmt.outerjoin(model, pk == _first_child_id(pk))
+    return stmt
+
+
+def profile_query(department: Optional[str] = None, year: Optional[int] = None):
+    stmt = filter_students(profile_select(), department, year)
+    return stmt.order_by(StudentData.student_id)
+
+
+def nest_profile(row):
+    """Turn a flat profile_select() mapping into the FullStudentResponse shape."""
+    profile = {}
+    for section, _, pk, _ in SECTIONS:
+        fields = {field: row[f"{section}.{field}"] for s, field in COLUMNS if s == section}
+        profile[section] = fields if fields[pk.key] is not None else None
+    return profile
+
+
+def _json_default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _partitions(stmt, on_partition=None):
+    db = ReadSessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=PARTITION_SIZE))
+        for partition in result.mappings().partitions():
+            if on_partition is not None:
+                on_partition(len(partition))
+            yield partition
+    finally:
+        db.close()
+
+
+def stream_ndjson(stmt, on_partition=None):
+    for partition in _partitions(stmt, on_partition):
+        yield "".join(
+            json.dumps(nest_profile(row), default=_json_default, separators=(",", ":")) + "\n"
+            for row in partition
+        )
+
+
+def stream_csv(stmt, on_partition=None):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    for partition in _partitions(stmt, on_partition):
+        writer.writerows([row[name] for name in CSV_HEADER] for row in partition)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+@job("export", ExportJobParams)
+def write_file(ctx, format="ndjson", department=None, year=None):
+    """Export to a result file, served by GET /jobs/{job_id}/result."""
+    stmt = profile_query(department, year)
+    rows = 0
+
+    def on_partition(count):
+        nonlocal rows
+        ctx.check_cancelled()
+        rows += count
+        ctx.progress(rows=rows)
+
+    stream = stream_csv(stmt, on_partition) if format == "csv" else stream_ndjson(stmt, on_partition)
+    path = ctx.result_path(f".{format}")
+    try:
+        with open(path, "w", newline="", encoding="utf-8") as out:
+            out.writelines(stream)
+    except BaseException:
+        os.remove(path)
+        raise
+    return {
+        "rows": rows,
+        "file": os.path.basename(path),
+        "media_type": MEDIA_TYPES[format],
+        "filename": f"students.{format}",
+    }
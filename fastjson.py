@@ -0,0 +1,25 @@
+"""Single-pass JSON responses for list endpoints.
+
+The regular path builds ORM objects, validates each into a response model,
+then lets FastAPI validate and serialize the whole list again through
+``response_model``.  Routes that opt in here select plain column tuples
+instead and hand the resulting dicts straight to pydantic-core's Rust
+serializer, so every row is converted exactly once.  The selected columns
+are taken from the response schema, so the JSON shape is unchanged.
+"""
+from fastapi.responses import Response
+from pydantic_core import to_json
+
+
+def schema_columns(model, schema):
+    """The table columns that make up ``schema``, in the schema's field order."""
+    table = model.__table__
+    return [table.c[field] for field in schema.model_fields]
+
+
+def rows_to_dicts(rows):
+    return [row._asdict() for row in rows]
+
+
+def json_response(payload, status_code: int = 200) -> Response:
+    return Response(content=to_json(payload), media_type="application/json", status_code=status_code)
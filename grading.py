@@ -0,0 +1,343 @@
+"""Server-side grades, pass/fail and CGPA, derived from the marks.
+
+``GradingRules`` maps a mark to a grade and grade points (with per-subject
+credits); ``derive`` applies them to whole arrays of sem rows at once:
+
+- grade and pass/fail of every row with a mark;
+- the SGPA of each (student, semester): credit-weighted mean grade points;
+- the CGPA stored on each row: the same mean over all of the student's
+  semesters up to and including that row's.
+
+Writes keep this up to date incrementally: every transaction that calls
+``mark_changed`` re-derives the sem rows of just those students before it
+commits, writes the rows whose values moved and nets the change into the
+dashboard aggregates.  ``recompute_all`` does the whole table in one pass
+(``python grading.py recompute``, or the ``recompute_grades`` job).
+"""
+import json
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import bindparam, event, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+import aggregates
+import config
+from changes import mark_all_changed
+from jobs import job
+from models import StudentData, StudentSemInfo
+
+ID_CHUNK_SIZE = 1000
+WRITE_CHUNK_SIZE = 5000
+# Stored CGPAs are rounded to this many decimals
+CGPA_DIGITS = 2
+
+DEFAULT_SCALE = [
+    (91, "O", 10), (81, "A+", 9), (71, "A", 8), (61, "B+", 7), (56, "B", 6), (50, "C", 5), (0, "U", 0),
+]
+
+COLUMNS = (
+    StudentSemInfo.sem_info_id, StudentSemInfo.student_id, StudentSemInfo.semester, StudentSemInfo.subject,
+    StudentSemInfo.mark, StudentSemInfo.grade, StudentSemInfo.pass_fail, StudentSemInfo.cgpa,
+)
+
+
+class GradingRules:
+    """Grading scale, pass threshold and credits.
+
+    ``scale`` is a list of (lowest mark, grade, grade points); a grade with
+    fewer than ``pass_points`` points is a fail.  ``failed_in_gpa`` decides
+    whether failed subjects count (with their points) towards SGPA/CGPA.
+    """
+
+    def __init__(self, scale=DEFAULT_SCALE, pass_points=1, credits=None, default_credits=1, failed_in_gpa=True):
+        scale = sorted(scale, key=lambda step: step[0])
+        if not scale or scale[0][0] > 0:
+            raise ValueError("The grading scale must start at mark 0")
+        self.floors = np.array([step[0] for step in scale], dtype=float)
+        self.grades = np.array([step[1] for step in scale], dtype=object)
+        self.points = np.array([step[2] for step in scale], dtype=float)
+        self.pass_points = pass_points
+        self.credits = dict(credits or {})
+        self.default_credits = default_credits
+        self.failed_in_gpa = failed_in_gpa
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(**{**data, "scale": [tuple(step) for step in data.get("scale", DEFAULT_SCALE)]})
+
+    def as_dict(self):
+        return {
+            "scale": [[float(floor), grade, float(points)]
+                      for floor, grade, points in zip(self.floors[::-1], self.grades[::-1], self.points[::-1])],
+            "pass_points": self.pass_points,
+            "credits": self.credits,
+            "default_credits": self.default_credits,
+            "failed_in_gpa": self.failed_in_gpa,
+        }
+
+    def credits_for(self, subjects: Sequence[Optional[str]]) -> np.ndarray:
+        labels = {subject: self.credits.get(subject, self.default_credits) for subject in set(subjects)}
+        return np.fromiter(map(labels.__getitem__, subjects), dtype=float, count=len(subjects))
+
+
+def load_rules(path: Optional[str] = None) -> GradingRules:
+    path = path or config.GRADING_RULES
+    if not path:
+        return GradingRules()
+    with open(path, encoding="utf-8") as f:
+        return GradingRules.from_dict(json.load(f))
+
+
+active_rules = load_rules()
+
+
+def _nullable(values, dtype=float):
+    return np.array([np.nan if value is None else value for value in values], dtype=dtype)
+
+
+def derive(rows, rules: GradingRules = None):
+    """Derived values for ``rows`` of COLUMNS, as arrays aligned with them.
+
+    Returns a dict of ``graded`` (has a mark and semester), ``grade``,
+    ``pass_fail``, ``sgpa`` and ``cgpa``; SGPA/CGPA are NaN where a student
+    has no graded credits yet.
+    """
+    return _derive(_transpose(rows), rules)
+
+
+def _transpose(rows):
+    return list(zip(*rows)) if rows else [()] * len(COLUMNS)
+
+
+def _derive(columns, rules):
+    rules = rules or active_rules
+    size = len(columns[0])
+    student_id, semester, subject, mark = columns[1:5]
+    student_id = np.array(student_id, dtype=np.int64)
+    semester = _nullable(semester)
+    mark = _nullable(mark)
+    graded = ~np.isnan(mark) & ~np.isnan(semester)
+
+    step = np.clip(np.searchsorted(rules.floors, np.where(graded, mark, 0), side="right") - 1, 0, None)
+    points = rules.points[step]
+    passed = points >= rules.pass_points
+    weight = rules.credits_for(subject) * graded
+    if not rules.failed_in_gpa:
+        weight *= passed
+
+    # One group per (student, semester), in order; rows without a semester
+    # sort first and carry no weight.
+    order = np.lexsort((np.nan_to_num(semester, nan=-1), student_id))
+    s, sem = student_id[order], np.nan_to_num(semester, nan=-1)[order]
+    starts = np.r_[True, (s[1:] != s[:-1]) | (sem[1:] != sem[:-1])] if size else np.zeros(0, dtype=bool)
+    group = np.cumsum(starts) - 1
+    group_points = np.bincount(group, weights=(points * weight)[order], minlength=int(starts.sum()))
+    group_credits = np.bincount(group, weights=weight[order], minlength=int(starts.sum()))
+
+    # Running totals restarted at each student's first group
+    group_student = s[starts]
+    first = np.r_[True, group_student[1:] != group_student[:-1]] if len(group_student) else np.zeros(0, dtype=bool)
+    first_index = np.maximum.accumulate(np.where(first, np.arange(len(first)), 0)) if len(first) else first
+    running_points = np.cumsum(group_points)
+    running_credits = np.cumsum(group_credits)
+    cum_points = running_points - (running_points - group_points)[first_index]
+    cum_credits = running_credits - (running_credits - group_credits)[first_index]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        group_sgpa = np.where(group_credits > 0, group_points / group_credits, np.nan)
+        group_cgpa = np.where(cum_credits > 0, cum_points / cum_credits, np.nan)
+
+    sgpa, cgpa = np.empty(size), np.empty(size)
+    sgpa[order] = group_sgpa[group]
+    cgpa[order] = group_cgpa[group]
+    cgpa[np.isnan(semester)] = np.nan
+    return {
+        "graded": graded,
+        "grade": rules.grades[step],
+        "pass_fail": np.where(passed, "Pass", "Fail"),
+        "sgpa": sgpa,
+        "cgpa": np.round(cgpa, CGPA_DIGITS),
+    }
+
+
+def changes(rows, rules: GradingRules = None) -> List[dict]:
+    """The rows whose stored grade, pass/fail or CGPA differ from the derived ones.
+
+    Rows without a mark keep their grade and pass/fail; rows without a
+    computable CGPA keep theirs.
+    """
+    if not rows:
+        return []
+    columns = _transpose(rows)
+    derived = _derive(columns, rules)
+    graded = derived["graded"]
+    grade, pass_fail, cgpa = columns[5:8]
+    grade = np.array(grade, dtype=object)
+    pass_fail = np.array(pass_fail, dtype=object)
+    cgpa = _nullable(cgpa)
+
+    new_grade = graded & (grade != derived["grade"])
+    new_pass_fail = graded & (pass_fail != derived["pass_fail"].astype(object))
+    with np.errstate(invalid="ignore"):
+        new_cgpa = ~np.isnan(derived["cgpa"]) & ~(np.abs(cgpa - derived["cgpa"]) < 0.5 * 10 ** -CGPA_DIGITS)
+
+    changed = np.flatnonzero(new_grade | new_pass_fail | new_cgpa).tolist()
+    # Plain lists from here: indexing numpy arrays one element at a time is slow
+    sem_info_id = columns[0]
+    grade, pass_fail, cgpa = derived["grade"].tolist(), derived["pass_fail"].tolist(), derived["cgpa"].tolist()
+    new_grade, new_pass_fail, new_cgpa = new_grade.tolist(), new_pass_fail.tolist(), new_cgpa.tolist()
+    updates = []
+    for i in changed:
+        values = {"sem_info_id": sem_info_id[i]}
+        if new_grade[i]:
+            values["grade"] = grade[i]
+        if new_pass_fail[i]:
+            values["pass_fail"] = pass_fail[i]
+        if new_cgpa[i]:
+            values["cgpa"] = cgpa[i]
+        updates.append(values)
+    return updates
+
+
+def _write(db: Session, updates: List[dict]) -> int:
+    # One executemany per set of columns; most batches only move one or two
+    table = StudentSemInfo.__table__
+    by_columns: Dict[tuple, List[dict]] = {}
+    for row in updates:
+        by_columns.setdefault(tuple(sorted(name for name in row if name != "sem_info_id")), []).append(row)
+
+    for names, rows in by_columns.items():
+        stmt = (
+            update(table)
+            .where(table.c.sem_info_id == bindparam("_sem_info_id"))
+            .values({name: bindparam(f"_{name}") for name in names})
+        )
+        for start in range(0, len(rows), WRITE_CHUNK_SIZE):
+            db.execute(stmt, [
+                {f"_{name}": value for name, value in row.items()} for row in rows[start:start + WRITE_CHUNK_SIZE]
+            ])
+    return len(updates)
+
+
+def _sync_identity_map(db: Session, updates: List[dict]):
+    # Loaded sem rows (sessions that do not expire on commit, e.g. the async
+    # routes) must not keep showing the values the client sent.
+    by_id = {row["sem_info_id"]: row for row in updates}
+    for obj in list(db.identity_map.values()):
+        if isinstance(obj, StudentSemInfo) and obj.sem_info_id in by_id:
+            for name, value in by_id[obj.sem_info_id].items():
+                set_committed_value(obj, name, value)
+
+
+def recompute(db: Session, student_ids: Iterable[int], rules: GradingRules = None) -> int:
+    """Re-derive the sem rows of ``student_ids``; returns how many rows changed.
+
+    Runs in the caller's transaction and keeps the dashboard aggregates in step.
+    """
+    ids = sorted(set(student_ids))
+    rows = []
+    for start in range(0, len(ids), ID_CHUNK_SIZE):
+        rows.extend(db.execute(
+            select(*COLUMNS, StudentData.department)
+            .join(StudentData, StudentSemInfo.student_id == StudentData.student_id)
+            .where(StudentSemInfo.student_id.in_(ids[start:start + ID_CHUNK_SIZE]))
+        ).all())
+    updates = changes(rows, rules)
+    if not updates:
+        return 0
+
+    _write(db, updates)
+    if aggregates.affects(StudentSemInfo.__table__, {name for row in updates for name in row}):
+        by_id = {row["sem_info_id"]: row for row in updates}
+        moved = [row for row in rows if row.sem_info_id in by_id]
+        aggregates.replace_sem_rows(
+            db,
+            [(row.department, row.semester, row.pass_fail, row.cgpa) for row in moved],
+            [(row.department, row.semester, by_id[row.sem_info_id].get("pass_fail", row.pass_fail),
+              by_id[row.sem_info_id].get("cgpa", row.cgpa)) for row in moved],
+        )
+    _sync_identity_map(db, updates)
+    return len(updates)
+
+
+def recompute_all(db: Session, rules: GradingRules = None, log=None) -> dict:
+    """Re-derive every sem row in one pass, then rebuild the aggregates; commits."""
+    started = time.perf_counter()
+    rows = db.execute(select(*COLUMNS)).all()
+    loaded = time.perf_counter()
+    updates = changes(rows, rules)
+    derived = time.perf_counter()
+    if updates:
+        _write(db, updates)
+        # Caches, indexes and live subscribers start over rather than take every id
+        mark_all_changed(db)
+        # Everything is derived already; the commit hook need not do it again
+        db.info["grades_derived"] = True
+        aggregates.rebuild(db)  # commits
+    finished = time.perf_counter()
+    stats = {
+        "rows": len(rows),
+        "updated": len(updates),
+        "load_ms": round((loaded - started) * 1000, 1),
+        "derive_ms": round((derived - loaded) * 1000, 1),
+        "write_ms": round((finished - derived) * 1000, 1),
+    }
+    if log:
+        log(stats)
+    return stats
+
+
+@event.listens_for(Session, "before_commit")
+def _derive_before_commit(session):
+    if session.info.pop("grades_derived", False) or not config.GRADING_AUTO:
+        return
+    student_ids = session.info.get("changed_students")
+    if student_ids:
+        session.flush()
+        recompute(session, student_ids)
+
+
+@job("recompute_grades")
+def recompute_job(ctx):
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return recompute_all(db)
+    finally:
+        db.close()
+
+
+def gpa(db: Session, student_id: int) -> Optional[dict]:
+    """Per-semester SGPA and CGPA of one student, from the current marks."""
+    rows = db.execute(select(*COLUMNS).where(StudentSemInfo.student_id == student_id)).all()
+    if not rows:
+        return None
+    derived = derive(rows)
+    semesters = {}
+    for i, row in enumerate(rows):
+        if row.semester is None:
+            continue
+        entry = semesters.setdefault(row.semester, {"semester": row.semester, "subjects": 0})
+        entry["subjects"] += bool(derived["graded"][i])
+        entry["sgpa"] = None if np.isnan(derived["sgpa"][i]) else round(float(derived["sgpa"][i]), CGPA_DIGITS)
+        entry["cgpa"] = None if np.isnan(derived["cgpa"][i]) else float(derived["cgpa"][i])
+    ordered = [semesters[semester] for semester in sorted(semesters)]
+    return {"student_id": student_id, "semesters": ordered, "cgpa": ordered[-1]["cgpa"] if ordered else None}
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["recompute"]:
+        sys.exit("usage: python grading.py recompute")
+
+    from database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        print(recompute_all(session))
+    finally:
+        session.close()
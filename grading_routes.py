@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+
+import grading
+import job_routes
+from changes import mark_changed
+from database import get_db, get_read_db
+from instrumentation import TimedRoute
+from schemas import GradeRecompute
+
+router = APIRouter(tags=["grades"], route_class=TimedRoute)
+
+
+@router.get("/grades/rules")
+def get_grading_rules():
+    return grading.active_rules.as_dict()
+
+
+@router.post("/grades/recompute")
+def recompute_grades(payload: GradeRecompute, db: Session = Depends(get_db)):
+    """Re-derive the given students now, or everyone as a background job (202)."""
+    if payload.student_ids is None:
+        return JSONResponse(job_routes.submit("recompute_grades"), status_code=202)
+    updated = grading.recompute(db, payload.student_ids)
+    if updated:
+        mark_changed(db, payload.student_ids)
+    db.info["grades_derived"] = True
+    db.commit()
+    return {"updated": updated}
+
+
+@router.get("/students/{student_id}/gpa")
+def get_student_gpa(student_id: int, db: Session = Depends(get_read_db)):
+    result = grading.gpa(db, student_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="No semester records for this student")
+    return result
@@ -0,0 +1,100 @@
+"""Incremental NDJSON/CSV import of full student profiles.
+
+The uploaded file is read record by record and written in chunks, each in
+its own transaction, so rows become visible while the rest of the file is
+still being parsed and memory use depends on the chunk size only.  Imports
+run as background jobs (jobs.py); cancelling one stops it between chunks,
+keeping the chunks already written.
+"""
+import csv
+import json
+import os
+from itertools import islice
+
+import aggregates
+import bulk
+from changes import mark_changed
+from database import SessionLocal
+from export import CSV_HEADER
+from jobs import job
+
+# Keep at most this many rejected rows in the report; the count is exact
+MAX_REPORTED_ERRORS = 1000
+
+
+def _ndjson_records(fileobj):
+    for line_no, line in enumerate(fileobj, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError as e:
+            yield line_no, e
+
+
+def _csv_records(fileobj):
+    reader = csv.DictReader(fileobj)
+    for row_no, row in enumerate(reader, start=1):
+        record = {}
+        for column, value in row.items():
+            if column not in CSV_HEADER:
+                continue
+            section, field = column.split(".", 1)
+            record.setdefault(section, {})[field] = value if value != "" else None
+        yield row_no, record
+
+
+def iter_records(fileobj, format):
+    """Yield (position, raw record) pairs; unparsable lines yield the exception."""
+    return _csv_records(fileobj) if format == "csv" else _ndjson_records(fileobj)
+
+
+def _remove_upload(path, **params):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+# Not submittable through POST /jobs: it reads (and then deletes) a server path
+@job("import", public=False, cleanup=_remove_upload)
+def run(ctx, path, format, chunk_size=bulk.DEFAULT_CHUNK_SIZE, filename=None):
+    """Import the spooled upload at ``path``; it is deleted afterwards."""
+    processed = inserted = rejected = 0
+    reported = []
+    with open(path, newline="", encoding="utf-8") as fileobj:
+        records = iter_records(fileobj, format)
+        while True:
+            ctx.check_cancelled()
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+
+            parsed = [(index, raw) for index, raw in chunk if not isinstance(raw, Exception)]
+            errors = [
+                {"index": index, "detail": f"Invalid JSON: {raw}"}
+                for index, raw in chunk if isinstance(raw, Exception)
+            ]
+            valid, invalid = bulk.validate_entries(parsed)
+            errors.extend(invalid)
+
+            db = SessionLocal()
+            try:
+                student_ids, insert_errors = bulk.insert_entries(db, valid)
+                aggregates.apply(db, student_ids)
+                mark_changed(db, student_ids, created=True)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+            errors.extend(insert_errors)
+
+            errors.sort(key=lambda error: error["index"])
+            reported.extend(errors[:max(MAX_REPORTED_ERRORS - len(reported), 0)])
+            processed += len(chunk)
+            inserted += len(student_ids)
+            rejected += len(errors)
+            ctx.progress(processed=processed, inserted=inserted, rejected=rejected)
+    return {"filename": filename, "processed": processed, "inserted": inserted,
+            "rejected": rejected, "errors": reported}
@@ -0,0 +1,239 @@
+"""Per-request SQL and timing instrumentation.
+
+``RequestTimingMiddleware`` opens a ``RequestStats`` for every HTTP request.
+SQLAlchemy cursor events attached by ``instrument_engine`` count statements
+and DB time into it, and ``TimedRoute`` splits the rest into handler time
+and the framework's validation/serialization time.  The result is sent back
+as a ``Server-Timing`` header, aggregated per route for ``/metrics/requests``,
+and requests that blow the statement budget or repeat one statement shape
+(the usual N+1 pattern) are logged.
+"""
+import functools
+import inspect
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+
+import config
+
+logger = logging.getLogger("instrumentation")
+
+STATEMENT_BUDGET = config.SQL_STATEMENT_BUDGET
+N_PLUS_ONE_THRESHOLD = config.SQL_N_PLUS_ONE_THRESHOLD
+
+_current: ContextVar[Optional["RequestStats"]] = ContextVar("request_stats", default=None)
+
+
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.route = None
+        self.statements = 0
+        self.db_time = 0.0
+        self.handler_time = 0.0
+        self.route_time = 0.0
+        # Spent waiting for admission (admission.py), before anything ran
+        self.queue_time = 0.0
+        self.shapes = Counter()
+        # Sync handlers run in a worker thread, not the event loop's
+        self._lock = threading.Lock()
+
+    def add_statement(self, statement, elapsed):
+        with self._lock:
+            self.statements += 1
+            self.db_time += elapsed
+            self.shapes[statement] += 1
+
+    def repeated_statements(self):
+        return [(sql, count) for sql, count in self.shapes.most_common() if count >= N_PLUS_ONE_THRESHOLD]
+
+    def server_timing(self, total):
+        serialize = max(self.route_time - self.handler_time, 0.0)
+        app = max(self.handler_time - self.db_time, 0.0)
+        return ", ".join([
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.statements} statements"',
+            f"app;dur={app * 1000:.2f}",
+            f"serialize;dur={serialize * 1000:.2f}",
+            f"queue;dur={self.queue_time * 1000:.2f}",
+            f"total;dur={total * 1000:.2f}",
+        ])
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+# --- SQLAlchemy hooks ---
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.add_statement(statement, time.perf_counter() - started)
+
+
+def instrument_engine(engine):
+    """Attach the statement counters to an engine (sync or async)."""
+    engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# --- Route timing ---
+
+def _timed_endpoint(endpoint):
+    # include_router() re-creates routes from the already wrapped endpoint
+    if getattr(endpoint, "_is_timed", False):
+        return endpoint
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _record_handler_time(time.perf_counter() - started)
+    else:
+        @functools.wraps(endpoint)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                _record_handler_time(time.perf_counter() - started)
+    timed._is_timed = True
+    return timed
+
+
+def _record_handler_time(elapsed):
+    stats = _current.get()
+    if stats is not None:
+        stats.handler_time += elapsed
+
+
+class TimedRoute(APIRoute):
+    """APIRoute that times the endpoint separately from the rest of the route.
+
+    Whatever the route spends outside the endpoint is request parsing and
+    validation plus response validation and serialization.
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        name = f"{','.join(sorted(self.methods))} {self.path}"
+
+        async def timed_handler(request):
+            stats = _current.get()
+            if stats is None:
+                return await handler(request)
+            stats.route = name
+            started = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                stats.route_time += time.perf_counter() - started
+
+        return timed_handler
+
+
+# --- Aggregated per-route metrics ---
+
+class _RouteMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = defaultdict(lambda: {
+            "requests": 0, "statements": 0, "db_ms": 0.0, "total_ms": 0.0,
+            "max_statements": 0, "over_budget": 0, "n_plus_one": 0,
+        })
+
+    def record(self, stats: RequestStats, total, over_budget, n_plus_one):
+        with self._lock:
+            route = self._routes[stats.route or "unmatched"]
+            route["requests"] += 1
+            route["statements"] += stats.statements
+            route["db_ms"] += stats.db_time * 1000
+            route["total_ms"] += total * 1000
+            route["max_statements"] = max(route["max_statements"], stats.statements)
+            route["over_budget"] += over_budget
+            route["n_plus_one"] += n_plus_one
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: {
+                    "requests": m["requests"],
+                    "avg_statements": round(m["statements"] / m["requests"], 2),
+                    "max_statements": m["max_statements"],
+                    "avg_db_ms": round(m["db_ms"] / m["requests"], 3),
+                    "avg_total_ms": round(m["total_ms"] / m["requests"], 3),
+                    "over_budget": m["over_budget"],
+                    "n_plus_one": m["n_plus_one"],
+                }
+                for name, m in sorted(self._routes.items())
+            }
+
+
+route_metrics = _RouteMetrics()
+
+
+def _finish(stats: RequestStats):
+    total = time.perf_counter() - stats.started
+    over_budget = stats.statements > STATEMENT_BUDGET
+    repeated = stats.repeated_statements()
+
+    if over_budget:
+        logger.warning(
+            "%s issued %d SQL statements (budget %d)", stats.route, stats.statements, STATEMENT_BUDGET
+        )
+    for statement, count in repeated:
+        logger.warning(
+            "%s: possible N+1, statement executed %d times: %s",
+            stats.route, count, " ".join(statement.split())[:200],
+        )
+
+    route_metrics.record(stats, total, over_budget, bool(repeated))
+    return stats.server_timing(total)
+
+
+class RequestTimingMiddleware:
+    """Pure ASGI middleware, so streaming responses pass through untouched."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+
+        async def send_with_timing(message):
+            # Headers go out with the start message, so everything done after
+            # it (streamed bodies, background tasks) is not included.
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", _finish(stats).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
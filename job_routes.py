@@ -0,0 +1,98 @@
+import os
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse
+from pydantic import ValidationError
+
+import config
+import jobs
+from instrumentation import TimedRoute
+from schemas import JobSubmit
+
+# Register the job kinds
+import aggregates  # noqa: F401
+import analytics  # noqa: F401
+import export  # noqa: F401
+import grading  # noqa: F401
+import importer  # noqa: F401
+import purge  # noqa: F401
+
+router = APIRouter(prefix="/jobs", tags=["jobs"], route_class=TimedRoute)
+
+# What a 503 asks clients to wait before submitting again
+RETRY_AFTER_SECONDS = 5
+
+
+def submit(kind, params=None):
+    """Queue a job and return the 202 body; 503 when the queue is full."""
+    try:
+        job_id = jobs.runner.submit(kind, params)
+    except jobs.QueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Job queue is full: {e}",
+                            headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+    return {"job_id": job_id, "status_url": f"/jobs/{job_id}"}
+
+
+@router.post("", status_code=202)
+def submit_job(payload: JobSubmit):
+    kind = jobs.KINDS.get(payload.kind)
+    if kind is None or not kind.public:
+        public = sorted(name for name, spec in jobs.KINDS.items() if spec.public)
+        raise HTTPException(status_code=400, detail=f"Unknown job kind; one of {public}")
+    params = payload.params
+    if kind.params is not None:
+        try:
+            params = kind.params.model_validate(params).model_dump()
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(
+                include_url=False, include_context=False, include_input=False))
+    elif params:
+        raise HTTPException(status_code=422, detail=f"{payload.kind} takes no params")
+    return submit(payload.kind, params)
+
+
+@router.get("")
+def list_jobs(
+    status: Optional[str] = None,
+    kind: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+):
+    return {"items": jobs.runner.list(status, kind, limit)}
+
+
+def _job(job_id):
+    job = jobs.runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/{job_id}")
+def get_job(job_id: str):
+    return _job(job_id)
+
+
+@router.get("/{job_id}/result")
+def get_job_result(job_id: str):
+    job = _job(job_id)
+    if job["status"] != jobs.COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    result = job["result"]
+    if isinstance(result, dict) and "file" in result:
+        path = os.path.join(config.JOB_RESULTS_DIR, result["file"])
+        if not os.path.exists(path):
+            raise HTTPException(status_code=410, detail="Result file is gone")
+        return FileResponse(path, media_type=result["media_type"], filename=result["filename"])
+    return result
+
+
+@router.post("/{job_id}/cancel")
+def cancel_job(job_id: str):
+    try:
+        job = jobs.runner.cancel(job_id)
+    except jobs.JobStateError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -0,0 +1,413 @@
+"""In-process background jobs with persistent records.
+
+Long operations (imports, exports, purges, aggregate rebuilds, reports) are
+submitted here instead of running inside a request, so the request worker
+is free again as soon as the job is recorded.  Every job has a row in the
+``jobs`` table, which any worker can poll:
+
+    queued -> running -> completed | failed | cancelled
+
+Thread jobs run on a bounded thread pool and are called as
+``func(ctx, **params)``; they report progress and notice cancellation
+through their ``JobContext``.  Process jobs are for CPU-bound work: they run
+as ``func(**params)`` in a process pool (spawned, so the function must be
+importable at module level) and can only be cancelled before they start.
+"""
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from sqlalchemy import delete, select, update
+
+import config
+from database import SessionLocal
+from models import Job
+
+logger = logging.getLogger("jobs")
+
+QUEUED, RUNNING, COMPLETED, FAILED, CANCELLED = "queued", "running", "completed", "failed", "cancelled"
+FINISHED = (COMPLETED, FAILED, CANCELLED)
+PRUNE_INTERVAL = 3600  # seconds
+
+
+class JobCancelled(Exception):
+    """Raised inside a thread job by ``JobContext.check_cancelled``."""
+
+
+class QueueFull(Exception):
+    """More than JOB_MAX_QUEUED jobs are waiting for a worker."""
+
+
+class JobStateError(Exception):
+    """The job is in a state that does not allow the operation."""
+
+
+class JobKind:
+    def __init__(self, name, func, params=None, process=False, public=True, cleanup=None):
+        self.name = name
+        self.func = func
+        self.params = params      # pydantic model POST /jobs validates against
+        self.process = process
+        self.public = public      # False: only code can submit it (e.g. it takes a server path)
+        self.cleanup = cleanup    # cleanup(**params), called however the job ends
+
+
+KINDS = {}
+
+
+def job(name, params=None, process=False, public=True, cleanup=None):
+    """Register the decorated function as the job kind ``name``."""
+    def register(func):
+        KINDS[name] = JobKind(name, func, params, process, public, cleanup)
+        return func
+    return register
+
+
+def _worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def result_path(job_id, suffix):
+    """Where a job keeps a result file; pruned together with the job record."""
+    os.makedirs(config.JOB_RESULTS_DIR, exist_ok=True)
+    return os.path.join(config.JOB_RESULTS_DIR, f"{job_id}{suffix}")
+
+
+class JobContext:
+    """Handed to thread jobs for progress reporting and cancellation."""
+
+    def __init__(self, runner, job_id):
+        self.job_id = job_id
+        self._runner = runner
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._progress = {}
+        self._dirty = False
+        self._synced = time.monotonic()
+
+    def progress(self, **counters):
+        """Merge ``counters`` into the job's progress; persisted every JOB_PROGRESS_INTERVAL."""
+        with self._lock:
+            self._progress.update(counters)
+            self._dirty = True
+        self._sync()
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._progress)
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        self._sync()
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def result_path(self, suffix):
+        return result_path(self.job_id, suffix)
+
+    def _sync(self, force=False):
+        # Writes pending progress and picks up cancellations made by other
+        # workers, at most once per interval.
+        now = time.monotonic()
+        if not force and now - self._synced < config.JOB_PROGRESS_INTERVAL:
+            return
+        self._synced = now
+        with self._lock:
+            progress, self._dirty = (dict(self._progress) if self._dirty else None), False
+        if self._runner.sync(self.job_id, progress):
+            self._cancel.set()
+
+
+class JobRunner:
+    def __init__(self, session_factory, threads, processes, max_queued):
+        self.session_factory = session_factory
+        self.max_queued = max_queued
+        self.thread_workers = threads
+        self.process_workers = processes
+        self._threads = ThreadPoolExecutor(threads, thread_name_prefix="job")
+        # Process jobs wait for their result on their own threads, so they
+        # never hold up the I/O-bound ones.
+        self._dispatch = ThreadPoolExecutor(processes, thread_name_prefix="job-process")
+        self._processes = None
+        self._lock = threading.Lock()
+        self._live = {}
+        self._queued = 0
+        self._running = 0
+        self._pruned_at = 0.0
+        self.counts = {"submitted": 0, COMPLETED: 0, FAILED: 0, CANCELLED: 0, "rejected": 0}
+
+    # --- records ---
+
+    def _write(self, job_id, only_if=None, **values):
+        db = self.session_factory()
+        try:
+            stmt = update(Job).where(Job.job_id == job_id).values(**values)
+            if only_if is not None:
+                stmt = stmt.where(Job.status == only_if)
+            changed = db.execute(stmt).rowcount
+            db.commit()
+            return changed
+        finally:
+            db.close()
+
+    def sync(self, job_id, progress=None):
+        """Persist ``progress`` (if any); returns whether a cancel was requested."""
+        db = self.session_factory()
+        try:
+            if progress is not None:
+                db.execute(update(Job).where(Job.job_id == job_id).values(progress=progress))
+                db.commit()
+            return bool(db.execute(select(Job.cancel_requested).where(Job.job_id == job_id)).scalar())
+        finally:
+            db.close()
+
+    def _view(self, job):
+        kind = KINDS.get(job.kind)
+        live = self._live.get(job.job_id)
+        return {
+            "job_id": job.job_id,
+            "kind": job.kind,
+            "status": job.status,
+            "params": job.params if kind is not None and kind.public else None,
+            "progress": live.snapshot() if live is not None and job.status == RUNNING else job.progress,
+            "result": job.result,
+            "error": job.error,
+            "cancel_requested": job.cancel_requested,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+        }
+
+    def get(self, job_id):
+        db = self.session_factory()
+        try:
+            job = db.get(Job, job_id)
+            return None if job is None else self._view(job)
+        finally:
+            db.close()
+
+    def list(self, status=None, kind=None, limit=50):
+        stmt = select(Job).order_by(Job.created_at.desc()).limit(limit)
+        if status is not None:
+            stmt = stmt.where(Job.status == status)
+        if kind is not None:
+            stmt = stmt.where(Job.kind == kind)
+        db = self.session_factory()
+        try:
+            return [self._view(job) for job in db.execute(stmt).scalars()]
+        finally:
+            db.close()
+
+    # --- submit / run ---
+
+    def submit(self, kind, params=None):
+        """Record and queue a job; raises QueueFull when JOB_MAX_QUEUED are waiting."""
+        spec = KINDS[kind]
+        params = params or {}
+        with self._lock:
+            if self._queued >= self.max_queued:
+                self.counts["rejected"] += 1
+                raise QueueFull(f"{self._queued} jobs are already waiting")
+            self._queued += 1
+
+        job_id = uuid.uuid4().hex
+        ctx = JobContext(self, job_id)
+        try:
+            db = self.session_factory()
+            try:
+                db.add(Job(
+                    job_id=job_id, kind=kind, status=QUEUED, params=params, progress={},
+                    cancel_requested=False, worker=_worker_name(), created_at=time.time(),
+                ))
+                db.commit()
+            finally:
+                db.close()
+            with self._lock:
+                self._live[job_id] = ctx
+                self.counts["submitted"] += 1
+            (self._dispatch if spec.process else self._threads).submit(self._run, spec, ctx, params)
+        except Exception:
+            with self._lock:
+                self._queued -= 1
+                self._live.pop(job_id, None)
+            raise
+        self._maybe_prune()
+        return job_id
+
+    def _process_pool(self):
+        with self._lock:
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(
+                    self.process_workers, mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._processes
+
+    def _run(self, spec, ctx, params):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        status, result, error = None, None, None
+        try:
+            # Loses to a cancel() that got here first
+            if not self._write(ctx.job_id, only_if=QUEUED, status=RUNNING, started_at=time.time()):
+                return
+            try:
+                if spec.process:
+                    try:
+                        result = self._process_pool().submit(spec.func, **params).result()
+                    except BrokenProcessPool:
+                        with self._lock:
+                            self._processes = None
+                        raise
+                else:
+                    result = spec.func(ctx, **params)
+                status = COMPLETED
+            except JobCancelled:
+                status = CANCELLED
+            except Exception as e:
+                logger.exception("Job %s (%s) failed", ctx.job_id, spec.name)
+                status, error = FAILED, str(e) or type(e).__name__
+            self._write(
+                ctx.job_id, status=status, result=result, error=error,
+                progress=ctx.snapshot(), finished_at=time.time(),
+            )
+        finally:
+            if spec.cleanup is not None:
+                try:
+                    spec.cleanup(**params)
+                except Exception:
+                    logger.exception("Cleanup of job %s failed", ctx.job_id)
+            with self._lock:
+                self._running -= 1
+                self._live.pop(ctx.job_id, None)
+                self.counts[status or CANCELLED] += 1
+
+    def cancel(self, job_id):
+        """Cancel a queued job, or ask a running thread job to stop at its next check."""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        if job["status"] in FINISHED:
+            raise JobStateError(f"Job is already {job['status']}")
+
+        now = time.time()
+        if job["status"] == QUEUED and self._write(
+            job_id, only_if=QUEUED, status=CANCELLED, cancel_requested=True, finished_at=now,
+        ):
+            return self.get(job_id)
+        if KINDS[job["kind"]].process:
+            raise JobStateError("Process jobs cannot be cancelled once running")
+        self._write(job_id, cancel_requested=True)
+        ctx = self._live.get(job_id)
+        if ctx is not None:
+            ctx._cancel.set()
+        return self.get(job_id)
+
+    # --- housekeeping ---
+
+    def recover(self):
+        """Fail the jobs whose process is gone (a restart, a crash); returns how many."""
+        host = socket.gethostname()
+        db = self.session_factory()
+        try:
+            orphans = db.execute(
+                select(Job.job_id, Job.kind, Job.params, Job.worker).where(Job.status.in_([QUEUED, RUNNING]))
+            ).all()
+        finally:
+            db.close()
+
+        recovered = 0
+        for job_id, kind, params, worker in orphans:
+            worker_host, _, pid = (worker or "").rpartition(":")
+            if worker_host != host or job_id in self._live:
+                continue
+            if pid.isdigit() and int(pid) != os.getpid() and _alive(int(pid)):
+                continue
+            if self._write(job_id, status=FAILED, error="Interrupted: the process running it exited",
+                           finished_at=time.time()):
+                recovered += 1
+            spec = KINDS.get(kind)
+            if spec is not None and spec.cleanup is not None:
+                try:
+                    spec.cleanup(**(params or {}))
+                except Exception:
+                    logger.exception("Cleanup of job %s failed", job_id)
+        self.prune()
+        return recovered
+
+    def prune(self):
+        """Forget finished jobs older than JOB_RETENTION_HOURS, and their result files."""
+        self._pruned_at = time.monotonic()
+        cutoff = time.time() - config.JOB_RETENTION_HOURS * 3600
+        db = self.session_factory()
+        try:
+            stale = list(db.execute(
+                select(Job.job_id).where(Job.created_at < cutoff).where(Job.status.in_(FINISHED))
+            ).scalars())
+            for start in range(0, len(stale), 500):
+                db.execute(delete(Job).where(Job.job_id.in_(stale[start:start + 500])))
+            db.commit()
+        finally:
+            db.close()
+        if stale and os.path.isdir(config.JOB_RESULTS_DIR):
+            stale = set(stale)
+            for name in os.listdir(config.JOB_RESULTS_DIR):
+                if name.split(".", 1)[0] in stale:
+                    os.remove(os.path.join(config.JOB_RESULTS_DIR, name))
+        return len(stale)
+
+    def _maybe_prune(self):
+        if time.monotonic() - self._pruned_at >= PRUNE_INTERVAL:
+            try:
+                self.prune()
+            except Exception:
+                logger.exception("Pruning old jobs failed")
+
+    def shutdown(self):
+        """Stop taking work and ask running thread jobs to stop."""
+        with self._lock:
+            live = list(self._live.values())
+        for ctx in live:
+            ctx._cancel.set()
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        self._dispatch.shutdown(wait=False, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "thread_workers": self.thread_workers,
+                "process_workers": self.process_workers,
+                "queued": self._queued,
+                "running": self._running,
+                "max_queued": self.max_queued,
+                **self.counts,
+            }
+
+
+runner = JobRunner(
+    SessionLocal,
+    threads=config.JOB_THREAD_WORKERS,
+    processes=config.JOB_PROCESS_WORKERS,
+    max_queued=config.JOB_MAX_QUEUED,
+)
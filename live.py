@@ -0,0 +1,328 @@
+"""Live updates for the dashboards, pushed over server-sent events.
+
+Committed writes reach the hub through the students-written hook, which
+only queues their ids.  A publisher task on the event loop wakes at most
+every LIVE_FLUSH_MS, resolves the whole batch with one lookup (which of the
+students still exist and in which department) plus one read of the
+summary tables, and offers each subscriber the part its filter lets
+through:
+
+    event: delta
+    data: {"seq": 12, "created": [...], "updated": [...], "deleted": [...],
+           "charts": {"departments": {"CSE": {"passed": 41}}}}
+
+``charts`` holds only the counters that moved since the last delta; the
+``snapshot`` event sent on connect has all of them.
+
+Every subscriber keeps one pending delta.  A consumer that reads slowly
+just has it grow (ids are merged, counters overwritten) and gets all of it
+in its next event; one more than LIVE_MAX_PENDING_IDS ids behind is sent
+``"resync": true`` instead and should refetch.  So is every subscriber,
+once, after a commit that changed every student (a full grade recompute).
+An idle subscriber costs
+an asyncio.Event, a suspended generator and a heartbeat comment every
+LIVE_HEARTBEAT_SECONDS -- no thread and no polling.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+from typing import Iterable, Optional, Set
+
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+
+import aggregates
+import config
+from changes import on_all_students_changed, on_students_written
+from models import StudentData
+from synced import DirtySet, primary_sessions
+
+logger = logging.getLogger("live")
+
+LOOKUP_CHUNK_SIZE = 1000
+
+
+def _diff(old, new):
+    """The parts of the nested dict ``new`` that differ from ``old``; None for removed keys."""
+    changed = {}
+    for key, value in new.items():
+        before = old.get(key)
+        if isinstance(value, dict) and isinstance(before, dict):
+            inner = _diff(before, value)
+            if inner:
+                changed[key] = inner
+        elif value != before:
+            changed[key] = value
+    for key in old.keys() - new.keys():
+        changed[key] = None
+    return changed
+
+
+def _merge(into, delta):
+    for key, value in delta.items():
+        if isinstance(value, dict) and isinstance(into.get(key), dict):
+            _merge(into[key], value)
+        else:
+            into[key] = value
+
+
+def _event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class Subscriber:
+    """One connection's filter and the delta waiting to be sent to it."""
+
+    def __init__(self, departments: Optional[Iterable[str]] = None, student_ids: Optional[Iterable[int]] = None,
+                 students: bool = True, charts: bool = True):
+        self.departments = set(departments) if departments else None
+        self.student_ids = set(student_ids) if student_ids else None
+        self.students = students
+        self.charts = charts
+        self.wakeup = asyncio.Event()
+        self._clear()
+
+    def _clear(self):
+        self.created, self.updated, self.deleted = set(), set(), set()
+        self.chart_delta = {}
+        self.resync = False
+
+    def _wants(self, student_id, department):
+        if self.student_ids is not None and student_id not in self.student_ids:
+            return False
+        # A deleted student's department went with the row
+        return self.departments is None or department is None or department in self.departments
+
+    def charts_view(self, counters):
+        if self.departments is None or "departments" not in counters:
+            return counters
+        view = dict(counters)
+        departments = {name: value for name, value in counters["departments"].items() if name in self.departments}
+        if departments:
+            view["departments"] = departments
+        else:
+            del view["departments"]
+        return view
+
+    def offer(self, created, updated, deleted, chart_delta):
+        """Merge one batch into the pending delta; True if one was already waiting.
+
+        ``created`` and ``updated`` map ids to departments.
+        """
+        waiting = self.wakeup.is_set()
+        if self.students and not self.resync:
+            self.created.update(i for i, department in created.items() if self._wants(i, department))
+            self.updated.update(i for i, department in updated.items() if self._wants(i, department))
+            gone = {i for i in deleted if self._wants(i, None)}
+            self.deleted |= gone
+            self.created -= gone
+            # Created and then changed before the client heard of it: still just created
+            self.updated -= self.created | gone
+            if len(self.created) + len(self.updated) + len(self.deleted) > config.LIVE_MAX_PENDING_IDS:
+                self.resync = True
+                self.created, self.updated, self.deleted = set(), set(), set()
+        if self.charts and chart_delta:
+            _merge(self.chart_delta, self.charts_view(chart_delta))
+        if self.resync or self.created or self.updated or self.deleted or self.chart_delta:
+            self.wakeup.set()
+            return waiting
+        return False
+
+    def offer_resync(self):
+        """Drop the pending delta for a resync; True if one was already waiting."""
+        waiting = self.wakeup.is_set()
+        self._clear()
+        self.resync = True
+        self.wakeup.set()
+        return waiting
+
+    def take(self):
+        if self.resync:
+            payload = {"resync": True}
+        else:
+            payload = {name: sorted(ids) for name, ids in
+                       (("created", self.created), ("updated", self.updated), ("deleted", self.deleted)) if ids}
+            if self.chart_delta:
+                payload["charts"] = self.chart_delta
+        self._clear()
+        self.wakeup.clear()
+        return payload
+
+
+class LiveHub:
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+        self._subscribers: Set[Subscriber] = set()
+        # Filled by commits from any thread
+        self._queued = DirtySet()
+        self._resync_all = False
+        self._loop = None
+        self._wakeup = None
+        self._publishing = None
+        self._publisher = None
+        self.counters = None
+        self.seq = 0
+        self.batches = 0
+        self.events_sent = 0
+        self.coalesced = 0
+        self.resyncs = 0
+
+    # --- producer side: post-commit, any thread ---
+
+    def students_written(self, student_ids, created_ids):
+        if not self._subscribers:
+            return
+        self._queued.mark(student_ids, created_ids)
+        self._wake()
+
+    def all_students_changed(self):
+        if not self._subscribers:
+            return
+        self._resync_all = True
+        self._wake()
+
+    def _wake(self):
+        try:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            pass  # the loop is closed; nobody is listening any more
+
+    # --- publisher, on the event loop ---
+
+    def _start(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._publisher is not None and not self._publisher.done():
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._publishing = asyncio.Lock()
+        # A context of its own, so its queries are not billed to whichever request started it
+        self._publisher = loop.create_task(self._publish_forever(), context=contextvars.Context())
+
+    def _resolve(self, student_ids, with_counters):
+        db = self.session_factory()
+        try:
+            departments = {}
+            ids = sorted(student_ids)
+            for start in range(0, len(ids), LOOKUP_CHUNK_SIZE):
+                departments.update(db.execute(
+                    select(StudentData.student_id, StudentData.department)
+                    .where(StudentData.student_id.in_(ids[start:start + LOOKUP_CHUNK_SIZE]))
+                ).all())
+            return departments, aggregates.counters(db) if with_counters else None
+        finally:
+            db.close()
+
+    def _read_counters(self):
+        db = self.session_factory()
+        try:
+            return aggregates.counters(db)
+        finally:
+            db.close()
+
+    async def _publish_forever(self):
+        while True:
+            await self._wakeup.wait()
+            # Let a burst of commits land in the same batch
+            await asyncio.sleep(config.LIVE_FLUSH_MS / 1000)
+            self._wakeup.clear()
+            resync, self._resync_all = self._resync_all, False
+            # A resync covers whatever was queued with it
+            student_ids, created_ids = self._queued.take()
+            if not (student_ids or resync) or not self._subscribers:
+                continue
+            async with self._publishing:
+                with_counters = any(subscriber.charts for subscriber in self._subscribers)
+                if resync:
+                    try:
+                        counters = await run_in_threadpool(self._read_counters) if with_counters else None
+                    except Exception:
+                        logger.exception("live resync counters read failed")
+                        counters = None
+                    self._resync(counters)
+                    continue
+                try:
+                    departments, counters = await run_in_threadpool(self._resolve, student_ids, with_counters)
+                except Exception:
+                    logger.exception("live update lookup failed for %d students", len(student_ids))
+                    continue
+                self._fan_out(student_ids, created_ids, departments, counters)
+
+    def _fan_out(self, student_ids, created_ids, departments, counters):
+        created = {i: departments[i] for i in created_ids if i in departments}
+        updated = {i: department for i, department in departments.items() if i not in created}
+        deleted = student_ids - departments.keys()
+        chart_delta = {}
+        if counters is not None:
+            if self.counters is not None:
+                chart_delta = _diff(self.counters, counters)
+            self.counters = counters
+        self.seq += 1
+        self.batches += 1
+        for subscriber in list(self._subscribers):
+            self.coalesced += subscriber.offer(created, updated, deleted, chart_delta)
+
+    def _resync(self, counters):
+        if counters is not None:
+            self.counters = counters
+        self.seq += 1
+        self.batches += 1
+        for subscriber in list(self._subscribers):
+            self.coalesced += subscriber.offer_resync()
+
+    # --- subscribers ---
+
+    def full(self):
+        return len(self._subscribers) >= config.LIVE_MAX_SUBSCRIBERS
+
+    async def _subscribe(self, subscriber):
+        self._start()
+        async with self._publishing:
+            # Counters are only kept current while someone watches them
+            if subscriber.charts and (self.counters is None or not any(s.charts for s in self._subscribers)):
+                self.counters = await run_in_threadpool(self._read_counters)
+            self._subscribers.add(subscriber)
+            snapshot = {"seq": self.seq}
+            if subscriber.charts:
+                snapshot["charts"] = subscriber.charts_view(self.counters)
+            return snapshot
+
+    async def events(self, subscriber: Subscriber):
+        """The SSE stream for ``subscriber``, until the client goes away."""
+        try:
+            yield _event("snapshot", await self._subscribe(subscriber))
+            while True:
+                try:
+                    await asyncio.wait_for(subscriber.wakeup.wait(), config.LIVE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                payload = subscriber.take()
+                if payload.get("resync"):
+                    self.resyncs += 1
+                    if subscriber.charts and self.counters is not None:
+                        payload["charts"] = subscriber.charts_view(self.counters)
+                self.events_sent += 1
+                yield _event("delta", {"seq": self.seq, **payload})
+        finally:
+            self._subscribers.discard(subscriber)
+
+    def stats(self):
+        subscribers = list(self._subscribers)
+        return {
+            "subscribers": len(subscribers),
+            "watching_charts": sum(subscriber.charts for subscriber in subscribers),
+            "pending": sum(subscriber.wakeup.is_set() for subscriber in subscribers),
+            "queued_students": len(self._queued),
+            "batches": self.batches,
+            "seq": self.seq,
+            "events_sent": self.events_sent,
+            "coalesced": self.coalesced,
+            "resyncs": self.resyncs,
+        }
+
+
+hub = LiveHub(primary_sessions())
+on_students_written(hub.students_written)
+on_all_students_changed(hub.all_students_changed)
@@ -0,0 +1,35 @@
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+import live
+from instrumentation import TimedRoute
+
+router = APIRouter(tags=["live"], route_class=TimedRoute)
+
+# What a 503 asks clients to wait before reconnecting
+RETRY_AFTER_SECONDS = 10
+
+
+def _csv(value, cast=str):
+    try:
+        return [cast(part.strip()) for part in value.split(",") if part.strip()] if value else None
+    except ValueError:
+        raise HTTPException(status_code=422, detail=f"Not a comma-separated list: {value!r}")
+
+
+@router.get("/live")
+async def live_updates(
+    departments: Optional[str] = None,
+    student_ids: Optional[str] = None,
+    students: bool = True,
+    charts: bool = True,
+):
+    """Server-sent ``snapshot`` and ``delta`` events, see live.py."""
+    if live.hub.full():
+        raise HTTPException(status_code=503, detail="Too many live subscribers",
+                            headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+    subscriber = live.Subscriber(_csv(departments), _csv(student_ids, int), students, charts)
+    return StreamingResponse(live.hub.events(subscriber), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
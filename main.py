@@ -1,23 +1,4 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from routes import router  # Make sure this is correctly importing your routes
-
-app = FastAPI()
-
-# Add CORS middleware FIRST
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Use ["http://localhost:5173"] in production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# THEN include your routes
-app.include_router(router)
-
-@app.get("/")
-def root():
-    return {"message": "FastAPI is running"}
-
+"""``uvicorn main:app`` still works; the app itself is built in server.py."""
+from server import create_app
 
+app = create_app()
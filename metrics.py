@@ -0,0 +1,71 @@
+from fastapi import APIRouter, Request
+
+import admission
+import config
+from cache import profile_cache
+from database import engines, pool_status
+from instrumentation import TimedRoute, route_metrics
+from jobs import runner as job_runner
+from live import hub as live_hub
+from qa import answer_cache
+from ranking import ranking_index
+from repository import profile_loader
+from search import search_index
+
+router = APIRouter(prefix="/metrics", tags=["metrics"], route_class=TimedRoute)
+
+
+@router.get("/pool")
+def get_pool_metrics():
+    return {name: pool_status(engine) for name, engine in engines().items()}
+
+
+@router.get("/requests")
+def get_request_metrics():
+    return route_metrics.snapshot()
+
+
+@router.get("/loader")
+def get_loader_metrics():
+    return profile_loader.stats()
+
+
+@router.get("/cache")
+def get_cache_metrics():
+    return {"profiles": profile_cache.stats()}
+
+
+@router.get("/search")
+def get_search_metrics():
+    return search_index.stats()
+
+
+@router.get("/jobs")
+def get_job_metrics():
+    return job_runner.stats()
+
+
+@router.get("/rankings")
+def get_ranking_metrics():
+    return ranking_index.stats()
+
+
+@router.get("/qa")
+def get_qa_metrics():
+    return {"backend": config.QA_BACKEND, "cache": answer_cache.stats()}
+
+
+@router.get("/live")
+def get_live_metrics():
+    return live_hub.stats()
+
+
+@router.get("/admission")
+def get_admission_metrics():
+    return admission.stats()
+
+
+@router.get("/startup")
+def get_startup_metrics(request: Request):
+    timer = getattr(request.app.state, "startup", None)
+    return timer.report() if timer is not None else {}
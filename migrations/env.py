@@ -0,0 +1,49 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+import config as settings
+import models  # noqa: F401  (registers the models on Base)
+from database import Base
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    context.configure(
+        url=settings.DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    # database.migrate() hands over its own connection; the alembic CLI
+    # goes through the app's engine.
+    connection = config.attributes.get("connection")
+    if connection is None:
+        from database import engine, foreign_keys_off
+
+        with engine.connect() as connection, foreign_keys_off(connection):
+            _run(connection)
+    else:
+        _run(connection)
+
+
+def _run(connection):
+    context.configure(connection=connection, target_metadata=target_metadata)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,87 @@
+"""Initial schema: the four student tables
+
+Databases created earlier with ``create_all`` already have these tables;
+they are left as they are.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _missing(table):
+    return not sa.inspect(op.get_bind()).has_table(table)
+
+
+def upgrade():
+    if _missing("student_data"):
+        op.create_table(
+            "student_data",
+            sa.Column("student_id", sa.Integer(), primary_key=True),
+            sa.Column("student_name", sa.String(100)),
+            sa.Column("dob", sa.Date()),
+            sa.Column("department", sa.String(100)),
+            sa.Column("register_num", sa.String(50), unique=True),
+            sa.Column("university_num", sa.Integer(), unique=True),
+        )
+        op.create_index("ix_student_data_student_id", "student_data", ["student_id"])
+
+    if _missing("student_info"):
+        op.create_table(
+            "student_info",
+            sa.Column("student_info_id", sa.Integer(), primary_key=True),
+            sa.Column("student_id", sa.Integer(), sa.ForeignKey("student_data.student_id")),
+            sa.Column("address", sa.String(255)),
+            sa.Column("blood_grp", sa.String(10)),
+            sa.Column("mail_id", sa.String(100)),
+            sa.Column("phone_no", sa.BigInteger()),
+            sa.Column("year", sa.Integer()),
+        )
+        op.create_index("ix_student_info_student_info_id", "student_info", ["student_info_id"])
+
+    if _missing("student_sem_info"):
+        op.create_table(
+            "student_sem_info",
+            sa.Column("sem_info_id", sa.Integer(), primary_key=True),
+            sa.Column("student_id", sa.Integer(), sa.ForeignKey("student_data.student_id")),
+            sa.Column("student_info_id", sa.Integer(), sa.ForeignKey("student_info.student_info_id")),
+            sa.Column("cgpa", sa.Float()),
+            sa.Column("semester", sa.Integer()),
+            sa.Column("pass_fail", sa.String(10)),
+            sa.Column("grade", sa.String(5)),
+            sa.Column("mark", sa.Integer()),
+            sa.Column("subject", sa.String(100)),
+        )
+        op.create_index("ix_student_sem_info_sem_info_id", "student_sem_info", ["sem_info_id"])
+
+    if _missing("student_record"):
+        op.create_table(
+            "student_record",
+            sa.Column("student_record_id", sa.Integer(), primary_key=True),
+            sa.Column("student_id", sa.Integer(), sa.ForeignKey("student_data.student_id")),
+            sa.Column("father_name", sa.String(100)),
+            sa.Column("mother_name", sa.String(100)),
+            sa.Column("father_occupation", sa.String(100)),
+            sa.Column("aadhar_num", sa.BigInteger()),
+            sa.Column("tenth_mark", sa.Integer()),
+            sa.Column("twelfth_mark", sa.Integer()),
+            sa.Column("account_num", sa.BigInteger()),
+            sa.Column("community", sa.String(50)),
+            sa.Column("religion", sa.String(50)),
+            sa.Column("nationality", sa.String(50)),
+        )
+        op.create_index("ix_student_record_student_record_id", "student_record", ["student_record_id"])
+
+
+def downgrade():
+    op.drop_table("student_record")
+    op.drop_table("student_sem_info")
+    op.drop_table("student_info")
+    op.drop_table("student_data")
@@ -0,0 +1,41 @@
+"""Dashboard summary tables maintained by aggregates.py
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def _missing(table):
+    return not sa.inspect(op.get_bind()).has_table(table)
+
+
+def upgrade():
+    if _missing("dept_sem_stats"):
+        op.create_table(
+            "dept_sem_stats",
+            sa.Column("department", sa.String(100), primary_key=True),
+            sa.Column("semester", sa.Integer(), primary_key=True),
+            sa.Column("passed", sa.Integer(), nullable=False),
+            sa.Column("failed", sa.Integer(), nullable=False),
+            sa.Column("cgpa_sum", sa.Float(), nullable=False),
+            sa.Column("cgpa_count", sa.Integer(), nullable=False),
+        )
+    if _missing("dept_stats"):
+        op.create_table(
+            "dept_stats",
+            sa.Column("department", sa.String(100), primary_key=True),
+            sa.Column("student_count", sa.Integer(), nullable=False),
+        )
+
+
+def downgrade():
+    op.drop_table("dept_stats")
+    op.drop_table("dept_sem_stats")
@@ -0,0 +1,43 @@
+"""Indexes for the hot filter and join columns
+
+- foreign keys to student_data, used by every profile load, the
+  first-child subqueries of the list/export routes and the write routes;
+- student_sem_info.student_info_id, checked when a student_info row goes;
+- student_data.department and student_info.year, the list filters;
+- student_sem_info (semester, subject), the semester filter and the
+  analytics/dashboard groupings.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_student_data_department", "student_data", ["department"]),
+    ("ix_student_info_student_id", "student_info", ["student_id"]),
+    ("ix_student_info_year", "student_info", ["year"]),
+    ("ix_student_sem_info_student_id", "student_sem_info", ["student_id"]),
+    ("ix_student_sem_info_student_info_id", "student_sem_info", ["student_info_id"]),
+    ("ix_student_sem_info_semester_subject", "student_sem_info", ["semester", "subject"]),
+    ("ix_student_record_student_id", "student_record", ["student_id"]),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns in INDEXES:
+        # create_all() from models.py may already have made it
+        if name not in {index["name"] for index in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,70 @@
+"""ON DELETE actions on the student foreign keys
+
+Deleting a student_data row now takes its info, sem and record rows with
+it, so a student is removed with one DELETE.  Deleting a student_info row
+keeps the sem rows and clears their student_info_id, which is what the
+ORM used to do by hand.
+
+SQLite cannot alter a constraint, so there the child tables are rebuilt
+(alembic batch mode); MySQL drops and re-adds the constraints in place.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# (table, column, parent table, parent column, ON DELETE)
+FOREIGN_KEYS = [
+    ("student_info", "student_id", "student_data", "student_id", "CASCADE"),
+    ("student_sem_info", "student_id", "student_data", "student_id", "CASCADE"),
+    ("student_sem_info", "student_info_id", "student_info", "student_info_id", "SET NULL"),
+    ("student_record", "student_id", "student_data", "student_id", "CASCADE"),
+]
+
+
+def _name(table, column, parent):
+    return f"fk_{table}_{column}_{parent}"
+
+
+def _swap(ondelete_for):
+    inspector = sa.inspect(op.get_bind())
+    tables = dict.fromkeys(table for table, *_ in FOREIGN_KEYS)
+    for table in tables:
+        existing = inspector.get_foreign_keys(table)
+        changes = []
+        for fk_table, column, parent, parent_column, ondelete in FOREIGN_KEYS:
+            if fk_table != table:
+                continue
+            wanted = ondelete_for(ondelete)
+            current = next((fk for fk in existing if fk["constrained_columns"] == [column]), None)
+            if current is not None and (current.get("options", {}).get("ondelete") or "").upper() == (wanted or ""):
+                continue
+            changes.append((current, column, parent, parent_column, wanted))
+        if not changes:
+            continue
+
+        # SQLite reflects unnamed constraints; the naming convention gives
+        # them the names used below so batch mode can drop them.
+        convention = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+        with op.batch_alter_table(table, naming_convention=convention) as batch:
+            for current, column, parent, parent_column, wanted in changes:
+                if current is not None:
+                    batch.drop_constraint(current["name"] or _name(table, column, parent), type_="foreignkey")
+                batch.create_foreign_key(
+                    _name(table, column, parent), parent, [column], [parent_column], ondelete=wanted,
+                )
+
+
+def upgrade():
+    _swap(lambda ondelete: ondelete)
+
+
+def downgrade():
+    _swap(lambda ondelete: None)
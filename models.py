@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Float, ForeignKey, BigInteger
+from sqlalchemy import Column, Integer, String, Date, Float, ForeignKey, BigInteger, Index, Boolean, JSON, Text
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -8,34 +8,39 @@ class StudentData(Base):
     student_id = Column(Integer, primary_key=True, index=True)
     student_name = Column(String(100))
     dob = Column(Date)
-    department = Column(String(100))
+    department = Column(String(100), index=True)
     register_num = Column(String(50), unique=True)
     university_num = Column(Integer, unique=True)
 
-    info = relationship("StudentInfo", back_populates="student", uselist=False)
-    record = relationship("StudentRecord", back_populates="student", uselist=False)
-    sem_infos = relationship("StudentSemInfo", back_populates="student")
+    # The database deletes the children (ON DELETE CASCADE, migration 0004);
+    # passive_deletes keeps the ORM from loading them first.
+    info = relationship("StudentInfo", back_populates="student", uselist=False,
+                        cascade="all, delete", passive_deletes=True)
+    record = relationship("StudentRecord", back_populates="student", uselist=False,
+                          cascade="all, delete", passive_deletes=True)
+    sem_infos = relationship("StudentSemInfo", back_populates="student", order_by="StudentSemInfo.sem_info_id",
+                             cascade="all, delete", passive_deletes=True)
 
 class StudentInfo(Base):
     __tablename__ = "student_info"
 
     student_info_id = Column(Integer, primary_key=True, index=True)
-    student_id = Column(Integer, ForeignKey("student_data.student_id"))
+    student_id = Column(Integer, ForeignKey("student_data.student_id", ondelete="CASCADE"), index=True)
     address = Column(String(255))
     blood_grp = Column(String(10))
     mail_id = Column(String(100))
     phone_no = Column(BigInteger)
-    year = Column(Integer)
+    year = Column(Integer, index=True)
 
     student = relationship("StudentData", back_populates="info")
-    sem_infos = relationship("StudentSemInfo", back_populates="student_info")
+    sem_infos = relationship("StudentSemInfo", back_populates="student_info", passive_deletes=True)
 
 class StudentSemInfo(Base):
     __tablename__ = "student_sem_info"
 
     sem_info_id = Column(Integer, primary_key=True, index=True)
-    student_id = Column(Integer, ForeignKey("student_data.student_id"))
-    student_info_id = Column(Integer, ForeignKey("student_info.student_info_id"))
+    student_id = Column(Integer, ForeignKey("student_data.student_id", ondelete="CASCADE"), index=True)
+    student_info_id = Column(Integer, ForeignKey("student_info.student_info_id", ondelete="SET NULL"), index=True)
     cgpa = Column(Float)
     semester = Column(Integer)
     pass_fail = Column(String(10))
@@ -46,11 +51,15 @@ class StudentSemInfo(Base):
     student = relationship("StudentData", back_populates="sem_infos")
     student_info = relationship("StudentInfo", back_populates="sem_infos")
 
+    __table_args__ = (
+        Index("ix_student_sem_info_semester_subject", "semester", "subject"),
+    )
+
 class StudentRecord(Base):
     __tablename__ = "student_record"
 
     student_record_id = Column(Integer, primary_key=True, index=True)
-    student_id = Column(Integer, ForeignKey("student_data.student_id"))
+    student_id = Column(Integer, ForeignKey("student_data.student_id", ondelete="CASCADE"), index=True)
     father_name = Column(String(100))
     mother_name = Column(String(100))
     father_occupation = Column(String(100))
@@ -65,3 +74,40 @@ class StudentRecord(Base):
     student = relationship("StudentData", back_populates="record")
 
 
+# --- Dashboard summary tables (maintained by aggregates.py) ---
+
+class DepartmentSemesterStats(Base):
+    __tablename__ = "dept_sem_stats"
+
+    department = Column(String(100), primary_key=True)
+    semester = Column(Integer, primary_key=True)
+    passed = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    cgpa_sum = Column(Float, nullable=False, default=0)
+    cgpa_count = Column(Integer, nullable=False, default=0)
+
+class DepartmentStats(Base):
+    __tablename__ = "dept_stats"
+
+    department = Column(String(100), primary_key=True)
+    student_count = Column(Integer, nullable=False, default=0)
+
+
+# --- Background jobs (jobs.py) ---
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    job_id = Column(String(32), primary_key=True)
+    kind = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False, index=True)
+    params = Column(JSON)
+    progress = Column(JSON)
+    result = Column(JSON)
+    error = Column(Text)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    # host:pid of the process running it, to tell orphans from live jobs
+    worker = Column(String(255))
+    created_at = Column(Float, nullable=False, index=True)
+    started_at = Column(Float)
+    finished_at = Column(Float)
@@ -22,14 +22,24 @@ export async function createStudent(data) {
   });
 }
 
-export async function getStudentsdata() {
-  return fetch(`${API_BASE}/student_data/`)
+export async function getStudentsdata({ cursor, limit = 10, department } = {}) {
+  const params = new URLSearchParams({ limit });
+  if (cursor) params.set('cursor', cursor);
+  if (department) params.set('department', department);
+  return fetch(`${API_BASE}/student_data/?${params}`)
     .then(res => {
       if (!res.ok) throw new Error('Failed to fetch students');
       return res.json();
     });
 }
 
+export async function searchStudents(q, { limit = 20, signal } = {}) {
+  const params = new URLSearchParams({ q, limit });
+  const res = await fetch(`${API_BASE}/students/search?${params}`, { signal });
+  if (!res.ok) throw new Error('Failed to search students');
+  return res.json();
+}
+
 
 export async function getStudentById(id) {
   const res = await fetch(`http://localhost:8000/student_full/${id}`);
@@ -37,4 +47,62 @@ export async function getStudentById(id) {
   return res.json();
 }
 
+// Department/semester rank; null when the student has no CGPA yet
+export async function getStudentRank(id, semester) {
+  const params = semester ? `?semester=${semester}` : '';
+  const res = await fetch(`${API_BASE}/students/${id}/rank${params}`);
+  if (res.status === 404) return null;
+  if (!res.ok) throw new Error('Failed to fetch student rank');
+  return res.json();
+}
+
+
+// Cohort analytics; `by` is a list of department/subject/semester/year
+function analyticsParams({ by = [], ...rest }) {
+  const params = new URLSearchParams();
+  by.forEach(dimension => params.append('by', dimension));
+  Object.entries(rest).forEach(([key, value]) => {
+    if (value !== undefined && value !== null && value !== '') params.set(key, value);
+  });
+  return params;
+}
+
+export async function getAnalyticsSummary(options = {}) {
+  const res = await fetch(`${API_BASE}/analytics/summary?${analyticsParams(options)}`);
+  if (!res.ok) throw new Error('Failed to fetch analytics summary');
+  return res.json();
+}
+
+export async function getAnalyticsHistogram(options = {}) {
+  const res = await fetch(`${API_BASE}/analytics/histogram?${analyticsParams(options)}`);
+  if (!res.ok) throw new Error('Failed to fetch analytics histogram');
+  return res.json();
+}
+
+// Streams an answer over server-sent events; returns a function that stops it
+export function streamAnswer(question, { onToken, onDone, onError }) {
+  const source = new EventSource(`${API_BASE}/ask/stream?${new URLSearchParams({ q: question })}`);
+  source.addEventListener('token', event => onToken(JSON.parse(event.data).text));
+  source.addEventListener('done', () => {
+    source.close();
+    onDone?.();
+  });
+  // Both the server's error event and a dropped connection end up here
+  source.addEventListener('error', event => {
+    source.close();
+    onError?.(event.data ? JSON.parse(event.data).detail : 'Could not reach the server');
+  });
+  return () => source.close();
+}
 
+// Live student and chart changes over server-sent events; returns a function that stops them.
+// EventSource reconnects by itself, and every (re)connect starts with a fresh snapshot.
+export function subscribeLive({ departments, studentIds, students = true, charts = true } = {}, { onSnapshot, onDelta }) {
+  const params = new URLSearchParams({ students, charts });
+  if (departments?.length) params.set('departments', departments.join(','));
+  if (studentIds?.length) params.set('student_ids', studentIds.join(','));
+  const source = new EventSource(`${API_BASE}/live?${params}`);
+  source.addEventListener('snapshot', event => onSnapshot?.(JSON.parse(event.data)));
+  source.addEventListener('delta', event => onDelta?.(JSON.parse(event.data)));
+  return () => source.close();
+}
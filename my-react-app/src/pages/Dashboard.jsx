@@ -1,4 +1,5 @@
 // src/pages/Dashboard.jsx
+import { useEffect, useState } from 'react';
 import {
   Card,
   CardContent,
@@ -10,6 +11,7 @@ import {
 import { useNavigate } from 'react-router-dom';
 import SchoolIcon from '@mui/icons-material/School';
 import ChatIcon from '@mui/icons-material/Chat';
+import { subscribeLive } from '../api/studentapi';
 
 import {
   Chart as ChartJS,
@@ -35,60 +37,87 @@ ChartJS.register(
   PointElement
 );
 
-// Chart Data
-const pieChartData = {
-  labels: ['Passed', 'Failed'],
-  datasets: [
-    {
-      data: [300, 100],
-      backgroundColor: ['#66bb6a', '#ef5350'],
-      borderColor: ['#388e3c', '#c62828'],
-      borderWidth: 2,
-    },
-  ],
+// Chart data, built from the live counters: { departments: { CSE: { students, passed, failed } },
+// semesters: { 1: { average_cgpa } } }
+const pieChartData = ({ departments = {} }) => {
+  const counts = Object.values(departments);
+  return {
+    labels: ['Passed', 'Failed'],
+    datasets: [
+      {
+        data: [
+          counts.reduce((sum, d) => sum + d.passed, 0),
+          counts.reduce((sum, d) => sum + d.failed, 0),
+        ],
+        backgroundColor: ['#66bb6a', '#ef5350'],
+        borderColor: ['#388e3c', '#c62828'],
+        borderWidth: 2,
+      },
+    ],
+  };
 };
 
-const barChartData = {
-  labels: ['CSE', 'ECE', 'MECH', 'CIVIL'],
-  datasets: [
-    {
-      label: 'Passed',
-      data: [90, 80, 70, 60],
-      backgroundColor: '#4caf50',
-    },
-    {
-      label: 'Failed',
-      data: [10, 20, 30, 40],
-      backgroundColor: '#f44336',
-    },
-  ],
+const barChartData = ({ departments = {} }) => {
+  const labels = Object.keys(departments).sort();
+  return {
+    labels,
+    datasets: [
+      {
+        label: 'Passed',
+        data: labels.map(d => departments[d].passed),
+        backgroundColor: '#4caf50',
+      },
+      {
+        label: 'Failed',
+        data: labels.map(d => departments[d].failed),
+        backgroundColor: '#f44336',
+      },
+    ],
+  };
 };
 
-const lineChartData = {
-  labels: ['Sem 1', 'Sem 2', 'Sem 3', 'Sem 4'],
-  datasets: [
-    {
-      label: 'Average CGPA',
-      data: [7.5, 7.8, 8.0, 8.3],
-      borderColor: '#1976d2',
-      backgroundColor: 'rgba(25, 118, 210, 0.2)',
-      tension: 0.4,
-      fill: true,
-      pointBackgroundColor: '#1976d2',
-      pointRadius: 5,
-    },
-  ],
+const lineChartData = ({ semesters = {} }) => {
+  const sems = Object.keys(semesters).sort((a, b) => a - b);
+  return {
+    labels: sems.map(sem => `Sem ${sem}`),
+    datasets: [
+      {
+        label: 'Average CGPA',
+        data: sems.map(sem => semesters[sem].average_cgpa),
+        borderColor: '#1976d2',
+        backgroundColor: 'rgba(25, 118, 210, 0.2)',
+        tension: 0.4,
+        fill: true,
+        pointBackgroundColor: '#1976d2',
+        pointRadius: 5,
+      },
+    ],
+  };
 };
 
-const deptCountData = {
-  labels: ['CSE', 'ECE', 'MECH', 'CIVIL'],
-  datasets: [
-    {
-      label: 'Total Students',
-      data: [120, 100, 85, 70],
-      backgroundColor: '#42a5f5',
-    },
-  ],
+const deptCountData = ({ departments = {} }) => {
+  const labels = Object.keys(departments).sort();
+  return {
+    labels,
+    datasets: [
+      {
+        label: 'Total Students',
+        data: labels.map(d => departments[d].students),
+        backgroundColor: '#42a5f5',
+      },
+    ],
+  };
+};
+
+// A delta only carries the counters that moved; null means the key is gone
+const applyDelta = (into, delta) => {
+  const out = { ...into };
+  Object.entries(delta).forEach(([key, value]) => {
+    if (value === null) delete out[key];
+    else if (typeof value === 'object' && typeof out[key] === 'object') out[key] = applyDelta(out[key], value);
+    else out[key] = value;
+  });
+  return out;
 };
 
 const chartCardStyles = {
@@ -109,6 +138,15 @@ const chartCardStyles = {
 
 export default function Dashboard() {
   const navigate = useNavigate();
+  const [counters, setCounters] = useState({});
+
+  useEffect(() => subscribeLive({ students: false }, {
+    onSnapshot: ({ charts }) => setCounters(charts ?? {}),
+    // A resync carries all the counters again
+    onDelta: ({ charts, resync }) => {
+      if (charts) setCounters(prev => (resync ? charts : applyDelta(prev, charts)));
+    },
+  }), []);
 
   return (
     <Box
@@ -223,7 +261,7 @@ export default function Dashboard() {
           </Typography>
           <Box sx={{ flexGrow: 1 }}>
             <Bar
-              data={barChartData}
+              data={barChartData(counters)}
               options={{
                 responsive: true,
                 maintainAspectRatio: false,
@@ -247,7 +285,7 @@ export default function Dashboard() {
           </Typography>
           <Box sx={{ flexGrow: 1, display: 'flex', justifyContent: 'center', alignItems: 'center' }}>
             <Pie
-              data={pieChartData}
+              data={pieChartData(counters)}
               options={{
                 responsive: true,
                 maintainAspectRatio: false,
@@ -279,7 +317,7 @@ export default function Dashboard() {
           </Typography>
           <Box sx={{ flexGrow: 1 }}>
             <Line
-              data={lineChartData}
+              data={lineChartData(counters)}
               options={{
                 responsive: true,
                 maintainAspectRatio: false,
@@ -303,7 +341,7 @@ export default function Dashboard() {
           </Typography>
           <Box sx={{ flexGrow: 1 }}>
             <Bar
-              data={deptCountData}
+              data={deptCountData(counters)}
               options={{
                 indexAxis: 'y',
                 responsive: true,
@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import {
   Box,
   Paper,
@@ -11,19 +11,28 @@ import {
   TableRow,
   IconButton,
   Tooltip,
-  Pagination,
-  CircularProgress
+  Button,
+  CircularProgress,
+  TextField
 } from '@mui/material';
 import VisibilityIcon from '@mui/icons-material/Visibility';
 import EditIcon from '@mui/icons-material/Edit';
 import DeleteIcon from '@mui/icons-material/Delete';
 import { useNavigate } from 'react-router-dom';
-import { getStudentsdata } from '../api/studentapi';
+import { getStudentsdata, searchStudents, subscribeLive } from '../api/studentapi';
 
 const StudentList = () => {
   const [students, setStudents] = useState([]);
-  const [page, setPage] = useState(1);
+  // cursors[i] is the cursor that loads page i; page 0 has none
+  const [cursors, setCursors] = useState([null]);
+  const [page, setPage] = useState(0);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [query, setQuery] = useState('');
+  const [results, setResults] = useState(null);
+  const [reload, setReload] = useState(0);
+  // What the live handler needs to know about the page on screen
+  const visible = useRef({ ids: new Set(), lastPage: false });
 
   const rowsPerPage = 10;
   const navigate = useNavigate();
@@ -31,8 +40,10 @@ const StudentList = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const data = await getStudentsdata();
-        setStudents(data);
+        const data = await getStudentsdata({ cursor: cursors[page], limit: rowsPerPage });
+        setStudents(data.items);
+        setNextCursor(data.next_cursor);
+        visible.current = { ids: new Set(data.items.map(s => s.student_id)), lastPage: !data.next_cursor };
       } catch (err) {
         console.error('Failed to fetch students:', err);
       } finally {
@@ -40,10 +51,50 @@ const StudentList = () => {
       }
     };
     fetchData();
-  }, []);
+  }, [page, cursors, reload]);
 
-  const handleChangePage = (event, value) => {
-    setPage(value);
+  // Refetch the page when a row on it changes, or when new students could land on it
+  useEffect(() => subscribeLive({ charts: false }, {
+    onDelta: ({ created = [], updated = [], deleted = [], resync }) => {
+      const { ids, lastPage } = visible.current;
+      if (resync || [...updated, ...deleted].some(id => ids.has(id)) || (created.length && lastPage)) {
+        setReload(n => n + 1);
+      }
+    },
+  }), []);
+
+  // Server-side search, debounced; an empty box goes back to the paged list
+  useEffect(() => {
+    const q = query.trim();
+    if (!q) {
+      setResults(null);
+      return;
+    }
+    const controller = new AbortController();
+    const timer = setTimeout(async () => {
+      try {
+        const data = await searchStudents(q, { signal: controller.signal });
+        setResults(data.items);
+      } catch (err) {
+        if (err.name !== 'AbortError') console.error('Search failed:', err);
+      }
+    }, 250);
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [query]);
+
+  const rows = results ?? students;
+
+  const handleNextPage = () => {
+    if (!nextCursor) return;
+    setCursors(prev => [...prev.slice(0, page + 1), nextCursor]);
+    setPage(prev => prev + 1);
+  };
+
+  const handlePrevPage = () => {
+    setPage(prev => Math.max(prev - 1, 0));
   };
 
   const handleEdit = (id) => {
@@ -56,8 +107,6 @@ const StudentList = () => {
     }
   };
 
-  const paginatedStudents = students.slice((page - 1) * rowsPerPage, page * rowsPerPage);
-
   if (loading) {
     return (
       <Box sx={{ display: 'flex', flexDirection: 'column', alignItems: 'center', justifyContent: 'center', height: '60vh' }}>
@@ -87,6 +136,14 @@ const StudentList = () => {
         📋 Student List
       </Typography>
 
+      <TextField
+        size="small"
+        placeholder="Search by name, register number or university number"
+        value={query}
+        onChange={(e) => setQuery(e.target.value)}
+        sx={{ mb: 2, width: 480 }}
+      />
+
       <Paper elevation={2} sx={{ flexGrow: 1, overflow: 'hidden', borderRadius: 2 }}>
         <TableContainer sx={{ maxHeight: 550 }}>
           <Table stickyHeader>
@@ -101,7 +158,7 @@ const StudentList = () => {
               </TableRow>
             </TableHead>
             <TableBody>
-              {paginatedStudents.map((student) => (
+              {rows.map((student) => (
                 <TableRow key={student.student_id} hover sx={{ height: 60 }}>
                   <TableCell>{student.student_name}</TableCell>
                   <TableCell>{student.dob}</TableCell>
@@ -132,14 +189,17 @@ const StudentList = () => {
         </TableContainer>
       </Paper>
 
-      <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
-        <Pagination
-          count={Math.ceil(students.length / rowsPerPage)}
-          page={page}
-          onChange={handleChangePage}
-          color="primary"
-        />
-      </Box>
+      {results === null && (
+        <Box sx={{ display: 'flex', justifyContent: 'center', alignItems: 'center', gap: 2, mt: 2 }}>
+          <Button variant="outlined" onClick={handlePrevPage} disabled={page === 0}>
+            Previous
+          </Button>
+          <Typography>Page {page + 1}</Typography>
+          <Button variant="outlined" onClick={handleNextPage} disabled={!nextCursor}>
+            Next
+          </Button>
+        </Box>
+      )}
     </Box>
   );
 };
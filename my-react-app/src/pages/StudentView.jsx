@@ -8,7 +8,7 @@ import {
   Card,
   CardContent,
 } from '@mui/material';
-import { getStudentById } from '../api/studentapi';
+import { getStudentById, getStudentRank } from '../api/studentapi';
 import SchoolIcon from '@mui/icons-material/School';
 import InfoIcon from '@mui/icons-material/Info';
 import AccountBoxIcon from '@mui/icons-material/AccountBox';
@@ -53,6 +53,7 @@ const Section = ({ icon, title, children }) => (
 const StudentView = () => {
   const { id } = useParams();
   const [studentData, setStudentData] = useState(null);
+  const [rank, setRank] = useState(null);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
@@ -60,6 +61,8 @@ const StudentView = () => {
       try {
         const data = await getStudentById(id);
         setStudentData(data);
+        const ranks = await getStudentRank(id, data.sem_info?.semester);
+        setRank(ranks?.items[0] ?? null);
       } catch (error) {
         console.error(error);
       } finally {
@@ -144,6 +147,10 @@ const StudentView = () => {
             <LabelValue label="Subject" value={sem_info?.subject} />
             <LabelValue label="Semester" value={sem_info?.semester} />
             <LabelValue label="CGPA" value={sem_info?.cgpa} />
+            <LabelValue
+              label="Rank"
+              value={rank && `${rank.rank} of ${rank.of} in ${rank.department}, semester ${rank.semester}`}
+            />
             <LabelValue label="Mark" value={sem_info?.mark} />
             <LabelValue label="Grade" value={sem_info?.grade} />
             <LabelValue label="Status" value={sem_info?.pass_fail} />
@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import {
   Box,
   Paper,
@@ -7,26 +7,37 @@ import {
   IconButton,
 } from '@mui/material';
 import SendIcon from '@mui/icons-material/Send';
+import { streamAnswer } from '../api/studentapi';
 
 const TalkToStudents = () => {
   const [question, setQuestion] = useState('');
   const [chat, setChat] = useState([]);
+  const [answering, setAnswering] = useState(false);
+  const stopRef = useRef(null);
 
-  const getMockResponse = (input) => {
-    if (input.toLowerCase().includes('exam')) {
-      return "📅 The exams will start from next Monday. All the best!";
-    } else if (input.toLowerCase().includes('holiday')) {
-      return "🏖️ No holidays this week. Please refer to the academic calendar.";
-    } else {
-      return "🤖 I'm here to help! Please ask something related to your academics.";
-    }
+  useEffect(() => () => stopRef.current?.(), []);
+
+  // Tokens are appended to the last (bot) message as they arrive
+  const appendToAnswer = (text) => {
+    setChat(messages => {
+      const last = messages[messages.length - 1];
+      return [...messages.slice(0, -1), { ...last, text: last.text + text }];
+    });
   };
 
   const handleSend = () => {
-    if (!question.trim()) return;
-    const response = getMockResponse(question);
-    setChat([...chat, { type: 'user', text: question }, { type: 'bot', text: response }]);
+    if (!question.trim() || answering) return;
+    setChat(messages => [...messages, { type: 'user', text: question }, { type: 'bot', text: '' }]);
     setQuestion('');
+    setAnswering(true);
+    stopRef.current = streamAnswer(question, {
+      onToken: appendToAnswer,
+      onDone: () => setAnswering(false),
+      onError: (detail) => {
+        appendToAnswer(`⚠️ ${detail}`);
+        setAnswering(false);
+      },
+    });
   };
 
   return (
@@ -76,7 +87,7 @@ const TalkToStudents = () => {
                 color: msg.type === 'user' ? 'white' : 'black',
               }}
             >
-              <Typography>{msg.text}</Typography>
+              <Typography>{msg.text || '…'}</Typography>
             </Paper>
           </Box>
         ))}
@@ -92,7 +103,7 @@ const TalkToStudents = () => {
           onChange={(e) => setQuestion(e.target.value)}
           onKeyDown={(e) => e.key === 'Enter' && handleSend()}
         />
-        <IconButton color="primary" onClick={handleSend}>
+        <IconButton color="primary" onClick={handleSend} disabled={answering}>
           <SendIcon />
         </IconButton>
       </Box>
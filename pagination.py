@@ -0,0 +1,81 @@
+import base64
+import binascii
+import json
+from operator import attrgetter
+from typing import Optional
+
+from fastapi import HTTPException
+from models import StudentData, StudentInfo, StudentSemInfo
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(student_id: int, order: str) -> str:
+    raw = json.dumps({"id": student_id, "o": order}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, order: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        student_id = int(data["id"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # A cursor is only meaningful for the direction it was issued for
+    if data.get("o") != order:
+        raise HTTPException(status_code=400, detail="Cursor does not match sort order")
+    return student_id
+
+
+def filter_students(
+    query,
+    department: Optional[str] = None,
+    year: Optional[int] = None,
+    semester: Optional[int] = None,
+):
+    if department is not None:
+        query = query.filter(StudentData.department == department)
+    if year is not None:
+        query = query.filter(StudentData.info.has(StudentInfo.year == year))
+    if semester is not None:
+        query = query.filter(StudentData.sem_infos.any(StudentSemInfo.semester == semester))
+    return query
+
+
+def keyset_window(query, cursor: Optional[str], limit: int, order: str = "asc"):
+    """Restrict a Query or Select on StudentData to the page after ``cursor``.
+
+    Rows are ordered by student_id only, so the page boundary is a single
+    indexed comparison and the cost does not grow with the page number.
+    One extra row is fetched to tell whether another page follows.
+    """
+    if cursor:
+        last_id = decode_cursor(cursor, order)
+        if order == "desc":
+            query = query.filter(StudentData.student_id < last_id)
+        else:
+            query = query.filter(StudentData.student_id > last_id)
+
+    sort_key = StudentData.student_id.desc() if order == "desc" else StudentData.student_id.asc()
+    return query.order_by(sort_key).limit(limit + 1)
+
+
+def split_page(rows, limit: int, order: str = "asc", key=attrgetter("student_id")):
+    """Trim the look-ahead row fetched by keyset_window and build the next cursor.
+
+    ``key`` extracts the student_id from a row.
+    """
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(key(rows[-1]), order)
+    return rows, next_cursor
+
+
+def keyset_page(query, cursor: Optional[str], limit: int, order: str = "asc"):
+    """Return one page of StudentData rows and the cursor for the next page."""
+    rows = keyset_window(query, cursor, limit, order).all()
+    return split_page(rows, limit, order)
@@ -0,0 +1,98 @@
+"""Column-minimal partial updates.
+
+``patch_rows`` writes just the columns a client sent, as one ``UPDATE``
+with no SELECT before it and no refresh after it.  The dashboard aggregates
+are only recomputed when one of the columns they are built from changes.
+
+``update_semester_marks`` applies a whole semester's marks at once: one
+lookup of the affected sem rows per chunk of students, then one CASE-keyed
+UPDATE per chunk of rows (see ``batch.case_update``).
+"""
+from contextlib import nullcontext
+from typing import Dict, List
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+import aggregates
+from batch import case_update
+from changes import mark_changed
+from models import StudentSemInfo
+
+MARKS_CHUNK_SIZE = 500
+MARK_FIELDS = ("mark", "grade", "pass_fail", "cgpa")
+
+
+def tracking(db: Session, writes, student_ids):
+    """``aggregates.tracking`` if any (table, columns) in ``writes`` feeds the summaries."""
+    if any(aggregates.affects(table, columns) for table, columns in writes):
+        return aggregates.tracking(db, student_ids)
+    return nullcontext()
+
+
+def patch_rows(db: Session, model, where, values: Dict, student_ids, track=True) -> int:
+    """``UPDATE model SET <values> WHERE <where>``; returns the number of rows matched.
+
+    An empty ``values`` writes nothing and only reports whether a row exists.
+    Pass ``track=False`` when the caller already wraps several patches in
+    one ``tracking`` block.
+    """
+    table = model.__table__
+    if not values:
+        return db.execute(select(func.count()).select_from(table).where(where)).scalar()
+
+    with tracking(db, [(table, values)] if track else [], student_ids):
+        matched = db.execute(update(table).where(where).values(values)).rowcount
+    if matched:
+        mark_changed(db, student_ids)
+    return matched
+
+
+def update_semester_marks(db: Session, semester: int, items: List[dict]):
+    """Apply ``items`` ({student_id, subject, and any of MARK_FIELDS}) to one semester.
+
+    Returns (updated row count, student ids touched, per-item errors).
+    """
+    errors, wanted = [], {}
+    for index, item in enumerate(items):
+        key = (item["student_id"], item["subject"])
+        if key in wanted:
+            errors.append({"index": index, "detail": "Repeats an earlier item for the same student and subject"})
+        else:
+            wanted[key] = index
+
+    sem_ids: Dict[tuple, List[int]] = {}
+    student_ids = sorted({student_id for student_id, _ in wanted})
+    for start in range(0, len(student_ids), MARKS_CHUNK_SIZE):
+        rows = db.execute(
+            select(StudentSemInfo.sem_info_id, StudentSemInfo.student_id, StudentSemInfo.subject)
+            .where(StudentSemInfo.semester == semester)
+            .where(StudentSemInfo.student_id.in_(student_ids[start:start + MARKS_CHUNK_SIZE]))
+        )
+        for sem_info_id, student_id, subject in rows:
+            if (student_id, subject) in wanted:
+                sem_ids.setdefault((student_id, subject), []).append(sem_info_id)
+
+    updates, touched = [], set()
+    for key, index in wanted.items():
+        if key not in sem_ids:
+            errors.append({"index": index, "detail": f"No semester {semester} row for student {key[0]} in {key[1]}"})
+            continue
+        fields = {name: items[index][name] for name in MARK_FIELDS if name in items[index]}
+        if fields:
+            updates.extend({"sem_info_id": sem_info_id, **fields} for sem_info_id in sem_ids[key])
+            touched.add(key[0])
+
+    columns = [StudentSemInfo.__table__.c[name] for name in MARK_FIELDS]
+    written = {name for row in updates for name in row}
+    updated = 0
+    sem_info_ids = [row["sem_info_id"] for row in updates]
+    tracked = aggregates.affects(StudentSemInfo.__table__, written)
+    with aggregates.tracking_sem_rows(db, sem_info_ids) if tracked else nullcontext():
+        for start in range(0, len(updates), MARKS_CHUNK_SIZE):
+            updated += case_update(db, StudentSemInfo.__table__.c.sem_info_id, columns,
+                                   updates[start:start + MARKS_CHUNK_SIZE])
+    mark_changed(db, touched)
+
+    errors.sort(key=lambda error: error["index"])
+    return updated, touched, errors
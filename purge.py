@@ -0,0 +1,71 @@
+"""Bulk removal of students by department and/or year.
+
+Matching students are found a chunk at a time by keyset on student_id and
+each chunk is deleted in its own short transaction, so a large purge never
+holds locks on the whole department at once and can be watched while it
+runs.  The students' info, sem and record rows go with them through the
+foreign keys' ON DELETE CASCADE.  Purges run as background jobs (jobs.py);
+cancelling one stops it between chunks.
+"""
+from sqlalchemy import delete, func, select
+
+import aggregates
+import config
+from changes import mark_changed
+from database import SessionLocal
+from jobs import job
+from models import StudentData, StudentInfo
+from schemas import PurgeJobParams
+
+DEFAULT_CHUNK_SIZE = config.PURGE_CHUNK_SIZE
+MAX_CHUNK_SIZE = config.PURGE_MAX_CHUNK_SIZE
+
+
+def matching(department=None, year=None):
+    """SELECT of the student_ids matching the filters."""
+    stmt = select(StudentData.student_id)
+    if department is not None:
+        stmt = stmt.where(StudentData.department == department)
+    if year is not None:
+        stmt = stmt.where(StudentData.student_id.in_(
+            select(StudentInfo.student_id).where(StudentInfo.year == year)
+        ))
+    return stmt
+
+
+def count(db, department=None, year=None):
+    return db.execute(select(func.count()).select_from(matching(department, year).subquery())).scalar()
+
+
+def delete_chunk(db, student_ids):
+    """Delete ``student_ids`` and everything under them; the caller commits."""
+    with aggregates.tracking(db, student_ids):
+        deleted = db.execute(delete(StudentData).where(StudentData.student_id.in_(student_ids))).rowcount
+    mark_changed(db, student_ids)
+    return deleted
+
+
+@job("purge", PurgeJobParams)
+def run(ctx, department=None, year=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    query = matching(department, year).order_by(StudentData.student_id).limit(chunk_size)
+    last_id, deleted, chunks = None, 0, 0
+    while True:
+        ctx.check_cancelled()
+        db = SessionLocal()
+        try:
+            stmt = query if last_id is None else query.where(StudentData.student_id > last_id)
+            student_ids = list(db.execute(stmt).scalars())
+            if not student_ids:
+                break
+            deleted += delete_chunk(db, student_ids)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        last_id = student_ids[-1]
+        chunks += 1
+        ctx.progress(deleted=deleted, chunks=chunks)
+    return {"deleted": deleted, "chunks": chunks}
@@ -0,0 +1,332 @@
+"""Questions about the student data in plain language (TalkToStudents).
+
+A question is grounded before any model sees it: ``ground`` picks out the
+department, semester, student and what is being asked, and collects facts
+from what is already precomputed or indexed -- the dashboard summary
+tables, the leaderboards, the search index and one student's sem rows.
+No question ever reads a whole table.
+
+The facts and the question then go to a model backend, which streams the
+answer back a token at a time.  Backends are looked up by name in
+``BACKENDS`` (``QA_BACKEND``): ``stub`` answers offline and
+deterministically straight from the facts, ``openai`` asks a chat model to
+phrase them.  Finished answers are cached by normalized question until the
+next write.
+"""
+import logging
+import re
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import config
+import grading
+from cache import LRUTTLCache
+from changes import on_all_students_changed, on_students_changed
+from models import DepartmentSemesterStats, DepartmentStats
+from ranking import ranking_index
+from search import EXACT_NAME, search_index
+
+logger = logging.getLogger("qa")
+
+DEFAULT_TOP = 5
+MAX_TOP = 20
+
+# Folded together before matching and caching
+SYNONYMS = {
+    "semester": "sem", "semesters": "sem", "sems": "sem",
+    "students": "student", "dept": "department", "departments": "department",
+    "toppers": "topper", "ranks": "rank", "ranking": "rank", "marks": "mark",
+    "grades": "grade", "passed": "pass", "failed": "fail", "failing": "fail",
+}
+ORDINALS = {"first": 1, "second": 2, "third": 3, "fourth": 4, "fifth": 5, "sixth": 6, "seventh": 7, "eighth": 8}
+
+TOP_WORDS = {"top", "best", "topper", "highest", "leaderboard"}
+RANK_WORDS = {"rank", "position", "standing"}
+PASS_WORDS = {"pass", "fail", "arrear", "arrears"}
+CGPA_WORDS = {"cgpa", "gpa", "sgpa", "average", "mean"}
+COUNT_WORDS = {"many", "count", "number", "total", "strength"}
+STUDENT_WORDS = {"grade", "mark", "details", "about", "profile"} | RANK_WORDS | {"cgpa", "gpa", "sgpa"}
+# Left out when the rest of a question is looked up as a student's name
+FILLER = {
+    "a", "an", "the", "of", "for", "in", "is", "are", "was", "what", "whats", "who", "whos", "how", "show",
+    "me", "tell", "give", "list", "and", "with", "his", "her", "their", "s", "student", "department",
+    "sem", "please", "do", "does", "did", "i", "my", "our", "this", "that", "current", "overall", "all",
+    "have", "has", "get", "find", "which", "at", "whose", "rate", "ratio", "percentage", "percent",
+    "result", "results", "stats", "statistics", "summary", "score", "scores", "scored", "on", "by",
+} | TOP_WORDS | PASS_WORDS | CGPA_WORDS | COUNT_WORDS | STUDENT_WORDS | set(ORDINALS)
+
+HELP = ("Ask about a department's toppers, pass rate, average CGPA or head count, "
+        "or about a student by name or register number.")
+
+_words = re.compile(r"[0-9a-z]+").findall
+_tokens = re.compile(r"\S+\s*").findall
+
+
+def normalize(question: str) -> str:
+    return " ".join(SYNONYMS.get(word, word) for word in _words(question.casefold()))
+
+
+class Intent:
+    """What a normalized question asks about."""
+
+    def __init__(self, words: List[str], departments: List[str]):
+        self.words = set(words)
+        known = {department.casefold(): department for department in departments}
+        self.departments = [known[word] for word in dict.fromkeys(words) if word in known]
+        self.semester = self._semester(words)
+        self.top = None
+        if self.words & TOP_WORDS:
+            count = re.search(r"\btop (\d+)\b", " ".join(words))
+            self.top = min(int(count.group(1)), MAX_TOP) if count else DEFAULT_TOP
+        rest = [word for word in words if word not in FILLER and word not in known and not word.isdigit()]
+        numbers = [word for word in words if word.isdigit() and int(word) != self.semester and int(word) != self.top]
+        self.name = " ".join(rest)
+        self.student_number = numbers[0] if numbers else None
+
+    @staticmethod
+    def _semester(words):
+        for i, word in enumerate(words):
+            if word != "sem":
+                continue
+            if i + 1 < len(words) and words[i + 1].isdigit():
+                return int(words[i + 1])
+            if i and words[i - 1] in ORDINALS:
+                return ORDINALS[words[i - 1]]
+            if i and re.fullmatch(r"\d+(st|nd|rd|th)?", words[i - 1]):
+                return int(re.match(r"\d+", words[i - 1]).group())
+        return None
+
+    def asks(self, vocabulary):
+        return bool(self.words & vocabulary)
+
+
+def _fact(source, text, **data):
+    return {"source": source, "text": text, **data}
+
+
+def _pct(part, whole):
+    return f"{100 * part / whole:.1f}%" if whole else "n/a"
+
+
+def _find_student(intent: Intent) -> Optional[dict]:
+    # Register and university numbers first: they are exact
+    for query in (intent.student_number, intent.name):
+        if not query:
+            continue
+        hits = search_index.search(query, 1)
+        # Only confident hits: every typed word a name word or an identifier
+        if hits and hits[0]["score"] >= EXACT_NAME * len(query.split()):
+            return hits[0]
+    return None
+
+
+def _student_facts(db, student):
+    student_id = student["student_id"]
+    facts = [_fact("search", f"{student['student_name']} (student {student_id}) is in {student['department']}.",
+                   student_id=student_id)]
+    result = grading.gpa(db, student_id)
+    if result and result["semesters"]:
+        per_semester = ", ".join(
+            f"semester {entry['semester']}: SGPA {entry['sgpa']}" for entry in result["semesters"] if entry["sgpa"] is not None
+        )
+        facts.append(_fact("grades", f"Their CGPA is {result['cgpa']} ({per_semester}).", cgpa=result["cgpa"]))
+    ranks = ranking_index.ranks_of(student_id)
+    if ranks:
+        for item in ranks["items"]:
+            facts.append(_fact(
+                "rankings",
+                f"They rank {item['rank']} of {item['of']} in {item['department']} semester {item['semester']}.",
+                **item,
+            ))
+    return facts
+
+
+def _top_facts(intent, stats):
+    facts = []
+    departments = intent.departments or sorted({row.department for row in stats if row.department})
+    for department in departments:
+        semesters = sorted({row.semester for row in stats if row.department == department and row.cgpa_count})
+        semester = intent.semester or (semesters[-1] if semesters else None)
+        if semester is None:
+            continue
+        board = ranking_index.top(department, semester, intent.top)
+        if not board["items"]:
+            facts.append(_fact("rankings", f"No ranked students in {department} semester {semester}."))
+            continue
+        listed = "; ".join(f"{item['rank']}. {item['student_name']} ({item['cgpa']})" for item in board["items"])
+        facts.append(_fact(
+            "rankings",
+            f"Top {len(board['items'])} of {board['students']} in {department} semester {semester} by CGPA: {listed}.",
+            department=department, semester=semester, items=board["items"],
+        ))
+    return facts
+
+
+def _matching(intent, stats):
+    return [
+        row for row in stats
+        if (not intent.departments or row.department in intent.departments)
+        and (intent.semester is None or row.semester == intent.semester)
+    ]
+
+
+def _scope(intent):
+    where = " and ".join(intent.departments) if intent.departments else "all departments"
+    return f"{where}, semester {intent.semester}" if intent.semester is not None else where
+
+
+def _pass_facts(intent, stats):
+    rows = _matching(intent, stats)
+    passed, failed = sum(row.passed for row in rows), sum(row.failed for row in rows)
+    return [_fact("aggregates", f"In {_scope(intent)}: {passed} pass and {failed} fail results "
+                                f"(pass rate {_pct(passed, passed + failed)}).", passed=passed, failed=failed)]
+
+
+def _cgpa_facts(intent, stats):
+    rows = _matching(intent, stats)
+    total, count = sum(row.cgpa_sum for row in rows), sum(row.cgpa_count for row in rows)
+    if not count:
+        return [_fact("aggregates", f"There are no CGPAs recorded for {_scope(intent)}.")]
+    return [_fact("aggregates", f"The average CGPA in {_scope(intent)} is {total / count:.2f} over {count} results.",
+                  average_cgpa=round(total / count, 2), results=count)]
+
+
+def _count_facts(intent, counts):
+    if intent.departments:
+        return [_fact("aggregates", f"{department} has {counts.get(department, 0)} students.",
+                      department=department, students=counts.get(department, 0))
+                for department in intent.departments]
+    listed = ", ".join(f"{department} {count}" for department, count in sorted(counts.items()))
+    return [_fact("aggregates", f"There are {sum(counts.values())} students ({listed}).", students=sum(counts.values()))]
+
+
+def ground(db: Session, question: str) -> List[dict]:
+    """Facts that answer ``question``, from summaries and indexes only."""
+    counts = {
+        row.department: row.student_count
+        for row in db.execute(select(DepartmentStats).where(DepartmentStats.student_count > 0)).scalars()
+        if row.department
+    }
+    stats = list(db.execute(select(DepartmentSemesterStats)).scalars())
+    intent = Intent(normalize(question).split(), list(counts))
+
+    facts = []
+    if intent.asks(STUDENT_WORDS) or intent.student_number or (intent.name and not intent.asks(TOP_WORDS)):
+        student = _find_student(intent)
+        if student is not None:
+            return _student_facts(db, student)
+    if intent.top:
+        facts += _top_facts(intent, stats)
+    if intent.asks(PASS_WORDS):
+        facts += _pass_facts(intent, stats)
+    if intent.asks(CGPA_WORDS):
+        facts += _cgpa_facts(intent, stats)
+    if intent.asks(COUNT_WORDS):
+        facts += _count_facts(intent, counts)
+    if not facts:
+        facts = _count_facts(intent, counts) + [_fact("help", HELP)]
+    return facts
+
+
+class StubBackend:
+    """Offline and deterministic: reads the facts back."""
+
+    name = "stub"
+
+    def stream(self, question: str, facts: List[dict]) -> Iterator[str]:
+        yield from _tokens(" ".join(fact["text"] for fact in facts))
+
+
+class OpenAIBackend:
+    """A chat model (``QA_MODEL``) phrases the answer from the facts."""
+
+    name = "openai"
+    prompt = (
+        "You answer questions about a college's student records. Use only the facts below; "
+        "if they do not answer the question, say so. Be brief.\n\nFacts:\n"
+    )
+
+    def __init__(self):
+        from openai import OpenAI
+
+        self.client = OpenAI(api_key=config.OPENAI_API_KEY)
+
+    def stream(self, question: str, facts: List[dict]) -> Iterator[str]:
+        response = self.client.chat.completions.create(
+            model=config.QA_MODEL,
+            temperature=0,
+            stream=True,
+            messages=[
+                {"role": "system", "content": self.prompt + "\n".join(f"- {fact['text']}" for fact in facts)},
+                {"role": "user", "content": question},
+            ],
+        )
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+BACKENDS = {"stub": StubBackend, "openai": OpenAIBackend}
+_backends: Dict[str, object] = {}
+
+
+class BackendUnavailable(Exception):
+    pass
+
+
+def backend(name: Optional[str] = None):
+    name = name or config.QA_BACKEND
+    if name not in _backends:
+        if name not in BACKENDS:
+            raise BackendUnavailable(f"Unknown QA backend {name!r}; one of {sorted(BACKENDS)}")
+        try:
+            _backends[name] = BACKENDS[name]()
+        except Exception as e:  # missing package or API key
+            raise BackendUnavailable(f"QA backend {name!r} is unavailable: {e}") from e
+    return _backends[name]
+
+
+answer_cache = LRUTTLCache(config.QA_CACHE_SIZE, config.QA_CACHE_TTL)
+
+
+@on_students_changed
+def _invalidate_answers(student_ids):
+    # Any write can move a count, an average or a rank
+    answer_cache.clear()
+
+
+on_all_students_changed(answer_cache.clear)
+
+
+class Answer:
+    """One question's answer: ``tokens`` streams it, caching it once complete."""
+
+    def __init__(self, db: Session, question: str):
+        self.backend = backend()
+        self.key = (self.backend.name, normalize(question))
+        cached = answer_cache.get(self.key)
+        self.cached = cached is not None
+        if self.cached:
+            self.text, self.sources = cached
+            return
+        token = answer_cache.reserve()
+        self.facts = ground(db, question)
+        self.sources = sorted({fact["source"] for fact in self.facts})
+        self.question, self._token = question, token
+
+    def tokens(self) -> Iterator[str]:
+        if self.cached:
+            yield self.text
+            return
+        parts = []
+        for part in self.backend.stream(self.question, self.facts):
+            parts.append(part)
+            yield part
+        # Only reached when the answer streamed to the end
+        self.text = "".join(parts)
+        answer_cache.set(self.key, (self.text, self.sources), self._token)
+
+    def complete(self) -> str:
+        return "".join(self.tokens())
@@ -0,0 +1,58 @@
+import json
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+import qa
+from database import get_read_db
+from instrumentation import TimedRoute
+from schemas import Question
+
+logger = logging.getLogger("qa")
+
+router = APIRouter(prefix="/ask", tags=["qa"], route_class=TimedRoute)
+
+
+def _answer(db, question):
+    try:
+        return qa.Answer(db, question)
+    except qa.BackendUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@router.post("")
+def ask(payload: Question, db: Session = Depends(get_read_db)):
+    answer = _answer(db, payload.question)
+    try:
+        text = answer.complete()
+    except Exception as e:
+        logger.exception("QA backend %s failed", answer.backend.name)
+        raise HTTPException(status_code=502, detail=f"The {answer.backend.name} backend failed: {e}")
+    return {"answer": text, "cached": answer.cached, "backend": answer.backend.name, "sources": answer.sources}
+
+
+def _event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.get("/stream")
+def ask_stream(q: str = Query(min_length=1, max_length=500), db: Session = Depends(get_read_db)):
+    """Server-sent events: ``meta``, then ``token`` events, then ``done`` (or ``error``)."""
+    # Grounded here, while the request's session is open; the stream only talks to the backend
+    answer = _answer(db, q)
+
+    def events():
+        yield _event("meta", {"cached": answer.cached, "backend": answer.backend.name, "sources": answer.sources})
+        try:
+            for token in answer.tokens():
+                yield _event("token", {"text": token})
+        except Exception as e:
+            logger.exception("QA backend %s failed", answer.backend.name)
+            yield _event("error", {"detail": f"The {answer.backend.name} backend failed: {e}"})
+            return
+        yield _event("done", {})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,177 @@
+"""In-process department/semester leaderboards.
+
+Every (department, semester) has a board: the CGPA of each student with
+sem rows in that semester, kept in a SortedList so a student's rank is
+one bisection, the top k is a slice and a changed CGPA moves in O(log n).
+Students with equal CGPAs share a rank (1, 2, 2, 4) and are listed by
+student_id.
+
+A student's CGPA for a semester is the one stored on their sem rows of that
+semester (the same on every row once grades are derived, see grading.py;
+otherwise the highest).  The boards are built at startup and kept in sync
+the same way as the search index (synced.py): committed writes mark their
+students dirty and the next lookup re-reads just those students first.
+"""
+import logging
+from typing import Dict, List, Tuple
+
+from sortedcontainers import SortedList
+from sqlalchemy import func, select
+
+from changes import on_all_students_changed, on_students_changed
+from models import StudentData, StudentSemInfo
+from synced import SyncedIndex, primary_sessions
+
+logger = logging.getLogger("ranking")
+
+DEFAULT_TOP = 10
+MAX_TOP = 100
+BUILD_BATCH_SIZE = 5000
+
+
+class _Board:
+    """Students of one department/semester, best CGPA first."""
+
+    def __init__(self):
+        self.keys = SortedList()
+        self.cgpa: Dict[int, float] = {}
+
+    def bulk_load(self, pairs):
+        self.cgpa = dict(pairs)
+        self.keys = SortedList((-cgpa, student_id) for student_id, cgpa in self.cgpa.items())
+
+    def add(self, student_id, cgpa):
+        self.remove(student_id)
+        self.cgpa[student_id] = cgpa
+        self.keys.add((-cgpa, student_id))
+
+    def remove(self, student_id):
+        cgpa = self.cgpa.pop(student_id, None)
+        if cgpa is not None:
+            self.keys.remove((-cgpa, student_id))
+
+    def rank(self, cgpa):
+        # (-cgpa,) sorts before every key with that CGPA: everyone ahead of it
+        return self.keys.bisect_left((-cgpa,)) + 1
+
+    def top(self, k):
+        return [(self.rank(-key), student_id, -key) for key, student_id in self.keys.islice(0, k)]
+
+    def __len__(self):
+        return len(self.keys)
+
+
+class RankingIndex(SyncedIndex):
+    def __init__(self, session_factory):
+        super().__init__(session_factory, logger)
+        self._boards: Dict[Tuple[str, int], _Board] = {}
+        # student_id -> (name, the boards they are on)
+        self._students: Dict[int, Tuple[str, List[Tuple[str, int]]]] = {}
+
+    # --- maintenance ---
+
+    def _fetch(self, db, student_ids=None):
+        """(student_id, name, department, semester, cgpa) per ranked student and semester."""
+        stmt = (
+            select(
+                StudentData.student_id, StudentData.student_name, StudentData.department,
+                StudentSemInfo.semester, func.max(StudentSemInfo.cgpa),
+            )
+            .join(StudentSemInfo, StudentSemInfo.student_id == StudentData.student_id)
+            .where(
+                StudentData.department.is_not(None),
+                StudentSemInfo.semester.is_not(None),
+                StudentSemInfo.cgpa.is_not(None),
+            )
+            .group_by(StudentData.student_id, StudentData.student_name, StudentData.department, StudentSemInfo.semester)
+        )
+        if student_ids is not None:
+            stmt = stmt.where(StudentData.student_id.in_(student_ids))
+        return db.execute(stmt.execution_options(yield_per=BUILD_BATCH_SIZE))
+
+    def _load(self, db):
+        entries: Dict[Tuple[str, int], list] = {}
+        students: Dict[int, Tuple[str, list]] = {}
+        for student_id, name, department, semester, cgpa in self._fetch(db):
+            entries.setdefault((department, semester), []).append((student_id, cgpa))
+            students.setdefault(student_id, (name, []))[1].append((department, semester))
+
+        boards = {}
+        for group, pairs in entries.items():
+            boards[group] = board = _Board()
+            board.bulk_load(pairs)
+        self._boards = boards
+        self._students = students
+        return f"rankings built: {len(boards)} boards, {len(students)} students"
+
+    def _unplace(self, student_id):
+        _, groups = self._students.pop(student_id, (None, ()))
+        for group in groups:
+            board = self._boards.get(group)
+            if board is None:
+                continue
+            board.remove(student_id)
+            if not board:
+                del self._boards[group]
+
+    def _reload(self, db, student_ids):
+        rows = list(self._fetch(db, student_ids))
+        for student_id in student_ids:
+            self._unplace(student_id)
+        for student_id, name, department, semester, cgpa in rows:
+            group = (department, semester)
+            self._boards.setdefault(group, _Board()).add(student_id, cgpa)
+            self._students.setdefault(student_id, (name, []))[1].append(group)
+
+    # --- queries ---
+
+    def top(self, department: str, semester: int, k: int = DEFAULT_TOP):
+        with self._lock:
+            self.ensure_current()
+            self.queries += 1
+            board = self._boards.get((department, semester))
+            if board is None:
+                return {"department": department, "semester": semester, "students": 0, "items": []}
+            return {
+                "department": department,
+                "semester": semester,
+                "students": len(board),
+                "items": [
+                    {"rank": rank, "student_id": student_id, "student_name": self._students[student_id][0], "cgpa": cgpa}
+                    for rank, student_id, cgpa in board.top(k)
+                ],
+            }
+
+    def ranks_of(self, student_id: int):
+        """The student's rank on each of their boards, by semester; None if unranked."""
+        with self._lock:
+            self.ensure_current()
+            self.queries += 1
+            entry = self._students.get(student_id)
+            if entry is None:
+                return None
+            items = []
+            for department, semester in sorted(entry[1], key=lambda group: group[1]):
+                board = self._boards[(department, semester)]
+                cgpa = board.cgpa[student_id]
+                items.append({
+                    "department": department,
+                    "semester": semester,
+                    "rank": board.rank(cgpa),
+                    "of": len(board),
+                    "cgpa": cgpa,
+                })
+            return {"student_id": student_id, "student_name": entry[0], "items": items}
+
+    def stats(self):
+        with self._lock:
+            return {
+                **super().stats(),
+                "boards": len(self._boards),
+                "students": len(self._students),
+            }
+
+
+ranking_index = RankingIndex(primary_sessions())
+on_students_changed(ranking_index.mark_dirty)
+on_all_students_changed(ranking_index.mark_all_dirty)
@@ -0,0 +1,24 @@
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+import ranking
+from instrumentation import TimedRoute
+
+router = APIRouter(tags=["rankings"], route_class=TimedRoute)
+
+
+@router.get("/rankings/{department}/{semester}")
+def get_top_students(department: str, semester: int,
+                     limit: int = Query(ranking.DEFAULT_TOP, ge=1, le=ranking.MAX_TOP)):
+    return ranking.ranking_index.top(department, semester, limit)
+
+
+@router.get("/students/{student_id}/rank")
+def get_student_rank(student_id: int, semester: Optional[int] = None):
+    result = ranking.ranking_index.ranks_of(student_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Student has no ranked semesters")
+    if semester is not None:
+        result["items"] = [item for item in result["items"] if item["semester"] == semester]
+    return result
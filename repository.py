@@ -0,0 +1,145 @@
+"""Loading full student profiles.
+
+``load_profiles`` fetches any number of profiles in two queries: the student
+rows with their info and record joined in, then every sem row for those
+students.  ``ProfileLoader`` sits in front of it and coalesces point lookups
+that arrive within a few milliseconds of each other into one batch, in the
+spirit of a DataLoader.  ``cached_profile`` puts profile_cache in front of
+that, for the point lookup routes.
+"""
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+import config
+from cache import CachedBody, profile_cache
+from models import StudentData
+from schemas import FullStudentResponse
+from synced import primary_sessions
+
+ID_CHUNK_SIZE = 500
+
+
+def with_profile(query):
+    """Eager-load everything FullStudentResponse needs."""
+    return query.options(
+        joinedload(StudentData.info),
+        joinedload(StudentData.record),
+        selectinload(StudentData.sem_infos),
+    )
+
+
+def full_response(student: StudentData) -> FullStudentResponse:
+    return FullStudentResponse.model_validate({
+        "student": student,
+        "info": student.info,
+        "sem_info": student.sem_infos[0] if student.sem_infos else None,
+        "record": student.record
+    })
+
+
+def load_profiles(db: Session, student_ids: Iterable[int]) -> Dict[int, FullStudentResponse]:
+    ids = sorted(set(student_ids))
+    profiles = {}
+    for start in range(0, len(ids), ID_CHUNK_SIZE):
+        chunk = ids[start:start + ID_CHUNK_SIZE]
+        for student in with_profile(db.query(StudentData)).filter(StudentData.student_id.in_(chunk)):
+            profiles[student.student_id] = full_response(student)
+    return profiles
+
+
+class ProfileLoader:
+    """Coalesce concurrent profile lookups into batched ``IN (...)`` queries.
+
+    The first caller in a window becomes the leader: it waits ``window``
+    seconds for other callers to queue their ids, then loads the whole batch
+    with its own session and hands every waiter its result.
+    """
+
+    def __init__(self, session_factory, window: float = 0.002):
+        self.session_factory = session_factory
+        self.window = window
+        self._lock = threading.Lock()
+        self._pending: Dict[int, Future] = {}
+        self._leader_active = False
+        self.batches = 0
+        self.keys_loaded = 0
+
+    def load(self, student_id: int) -> Optional[FullStudentResponse]:
+        return self.load_many([student_id]).get(student_id)
+
+    def load_many(self, student_ids: Iterable[int]) -> Dict[int, FullStudentResponse]:
+        with self._lock:
+            futures = {}
+            for student_id in set(student_ids):
+                future = self._pending.get(student_id)
+                if future is None:
+                    future = self._pending[student_id] = Future()
+                futures[student_id] = future
+            lead = not self._leader_active
+            self._leader_active = True
+
+        if lead:
+            self._dispatch()
+
+        results = {}
+        for student_id, future in futures.items():
+            profile = future.result()
+            if profile is not None:
+                results[student_id] = profile
+        return results
+
+    def _dispatch(self):
+        if self.window:
+            time.sleep(self.window)
+        with self._lock:
+            batch, self._pending = self._pending, {}
+            self._leader_active = False
+
+        try:
+            db = self.session_factory()
+            try:
+                profiles = load_profiles(db, batch)
+            finally:
+                db.close()
+        except Exception as e:
+            for future in batch.values():
+                future.set_exception(e)
+            return
+
+        with self._lock:
+            self.batches += 1
+            self.keys_loaded += len(batch)
+        for student_id, future in batch.items():
+            future.set_result(profiles.get(student_id))
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "keys_loaded": self.keys_loaded,
+            "avg_batch_size": round(self.keys_loaded / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+# From the primary: the profiles end up in profile_cache, where a replica's
+# stale copy of a just-written student would outlive the invalidation
+profile_loader = ProfileLoader(primary_sessions(), window=config.PROFILE_LOADER_WINDOW_MS / 1000)
+
+
+def cached_profile(student_id: int) -> Optional[CachedBody]:
+    """The student's serialized profile, from profile_cache or else the loader; None if missing."""
+    return profile_cache.get(student_id) or load_cached_profile(student_id)
+
+
+def load_cached_profile(student_id: int) -> Optional[CachedBody]:
+    """Load the profile through the loader and cache its serialized body; None if missing."""
+    token = profile_cache.reserve()
+    profile = profile_loader.load(student_id)
+    if profile is None:
+        return None
+    cached = CachedBody(profile.model_dump_json().encode())
+    profile_cache.set(student_id, cached, token)
+    return cached
@@ -1,48 +1,101 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy.exc import SQLAlchemyError
-from database import get_db
-from typing import List
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+import os
+import shutil
+import tempfile
+import time
+import aggregates
+import bulk
+from changes import mark_changed
+import export
+import job_routes
+import patch
+import purge
+from database import get_db, get_read_db
+from instrumentation import TimedRoute
+from operator import itemgetter
+from typing import List, Literal, Optional
+from sqlalchemy import delete, func
 from models import StudentData, StudentInfo, StudentSemInfo, StudentRecord
+from repository import cached_profile, load_profiles, profile_loader
+import search
+from fastjson import json_response, rows_to_dicts, schema_columns
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, filter_students, keyset_page, keyset_window, split_page
 from schemas import (
-    FullStudentCreate, FullStudentResponse, FullStudentUpdate,
-    StudentDataSchema, StudentInfoSchema, StudentSemInfoSchema, StudentRecordSchema,StudentFullBulkCreate
+    FullStudentCreate, FullStudentResponse, FullStudentUpdate, FullStudentPatch, SemesterMarksUpdate,
+    StudentDataSchema, StudentInfoSchema, StudentSemInfoSchema, StudentRecordSchema,StudentFullBulkCreate,
+    StudentDataPage, FullStudentPage, FullStudentBatch
 )
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.post("/students/bulk/", status_code=201)
 def create_students_bulk(
-    payload: StudentFullBulkCreate, 
+    payload: StudentFullBulkCreate,
+    chunk_size: int = Query(bulk.DEFAULT_CHUNK_SIZE, ge=1, le=bulk.MAX_CHUNK_SIZE),
     db: Session = Depends(get_db)
 ):
-    created_ids = []
-
-    for entry in payload.__root__:
-        student_dict = entry.student.dict()
-        new_student = StudentData(**student_dict)
-        db.add(new_student)
+    started = time.perf_counter()
+    try:
+        created_ids, errors = bulk.insert_many(db, payload.root, chunk_size)
+        aggregates.apply(db, created_ids)
+        mark_changed(db, created_ids, created=True)
         db.commit()
-        db.refresh(new_student)
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    elapsed = time.perf_counter() - started
 
-        info_dict = entry.info.dict()
-        new_info = StudentInfo(student_id=new_student.student_id, **info_dict)
-        db.add(new_info)
+    return {
+        "inserted_student_ids": created_ids,
+        "errors": errors,
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "rows_per_sec": round(len(created_ids) / elapsed, 1) if elapsed else None,
+    }
 
-        sem_dict = entry.sem_info.dict()
-        new_sem = StudentSemInfo(student_id=new_student.student_id, student_info_id=new_info.student_info_id, **sem_dict)
-        db.add(new_sem)
+@router.post("/students/import", status_code=202)
+def import_students(
+    file: UploadFile = File(...),
+    format: Optional[Literal["ndjson", "csv"]] = None,
+    chunk_size: int = Query(bulk.DEFAULT_CHUNK_SIZE, ge=1, le=bulk.MAX_CHUNK_SIZE),
+):
+    if format is None:
+        format = "csv" if (file.filename or "").lower().endswith(".csv") else "ndjson"
 
-        record_dict = entry.record.dict()
-        new_record = StudentRecord(student_id=new_student.student_id, **record_dict)
-        db.add(new_record)
+    # Spool the upload to our own file: the request's copy is closed as soon
+    # as the response is sent, while the import keeps running.
+    with tempfile.NamedTemporaryFile(suffix=f".{format}", delete=False) as spooled:
+        shutil.copyfileobj(file.file, spooled)
 
-        db.commit()
-        created_ids.append(new_student.student_id)
+    try:
+        return job_routes.submit("import", {
+            "path": spooled.name, "format": format, "chunk_size": chunk_size, "filename": file.filename,
+        })
+    except HTTPException:
+        os.remove(spooled.name)
+        raise
+
+
+@router.post("/students/purge", status_code=202)
+def purge_students(
+    response: Response,
+    department: Optional[str] = None,
+    year: Optional[int] = None,
+    chunk_size: int = Query(purge.DEFAULT_CHUNK_SIZE, ge=1, le=purge.MAX_CHUNK_SIZE),
+    dry_run: bool = False,
+    db: Session = Depends(get_db),
+):
+    if department is None and year is None:
+        raise HTTPException(status_code=400, detail="Pass department and/or year")
+    if dry_run:
+        response.status_code = 200
+        return {"department": department, "year": year, "matched": purge.count(db, department, year)}
+
+    return job_routes.submit("purge", {"department": department, "year": year, "chunk_size": chunk_size})
 
-    return {"inserted_student_ids": created_ids}
 
 @router.post("/student_full/", response_model=dict)
 def create_full_student(payload: FullStudentCreate, db: Session = Depends(get_db)):
@@ -81,6 +134,8 @@ def create_full_student(payload: FullStudentCreate, db: Session = Depends(get_db
         new_record = StudentRecord(**record_data)
         db.add(new_record)
 
+        aggregates.apply(db, [new_student.student_id])
+        mark_changed(db, [new_student.student_id], created=True)
         db.commit()
 
         return {
@@ -94,41 +149,75 @@ def create_full_student(payload: FullStudentCreate, db: Session = Depends(get_db
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 
-@router.get("/student_full/{student_id}", response_model=FullStudentResponse)
-def get_full_student(student_id: int, db: Session = Depends(get_db)):
-    student = db.query(StudentData).filter(StudentData.student_id == student_id).first()
-    if not student:
-        raise HTTPException(status_code=404, detail="Student not found")
+@router.get("/students/search")
+def search_students(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(search.DEFAULT_LIMIT, ge=1, le=search.MAX_LIMIT),
+):
+    # Prefix and typo-tolerant match on name, register number and university number
+    return json_response({"items": search.search_index.search(q, limit)})
 
-    return FullStudentResponse.model_validate({
-        "student": student,
-        "info": student.info,
-        "sem_info": student.sem_infos[0] if student.sem_infos else None,
-        "record": student.record
-    })
+
+MAX_BATCH_IDS = 500
 
 
-@router.get("/students_full/", response_model=list[FullStudentResponse])
-def get_all_students(db: Session = Depends(get_db)):
-    students = db.query(StudentData).options(
-        joinedload(StudentData.info),
-        joinedload(StudentData.sem_infos),
-        joinedload(StudentData.record)
-    ).all()
+@router.get("/student_full/batch", response_model=FullStudentBatch)
+def get_full_students_batch(ids: List[str] = Query(...)):
+    # Accepts ?ids=1,2,3 as well as ?ids=1&ids=2
+    try:
+        student_ids = list(dict.fromkeys(int(part) for value in ids for part in value.split(",") if part.strip()))
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids must be integers")
+    if len(student_ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_BATCH_IDS} ids per request")
 
-    if not students:
-        raise HTTPException(status_code=404, detail="No students found")
+    profiles = profile_loader.load_many(student_ids)
+    return {
+        "items": [profiles[student_id] for student_id in student_ids if student_id in profiles],
+        "missing": [student_id for student_id in student_ids if student_id not in profiles],
+    }
 
-    result = []
-    for s in students:
-        result.append(FullStudentResponse.model_validate({
-            "student": s,
-            "info": s.info,
-            "sem_info": s.sem_infos[0] if s.sem_infos else None,
-            "record": s.record if s.record else None  # ❗ Fixed: pass object not list
-        }))
 
-    return result
+@router.get("/student_full/{student_id}", response_model=FullStudentResponse)
+def get_full_student(student_id: int, request: Request):
+    cached = cached_profile(student_id)
+    if cached is None:
+        raise HTTPException(status_code=404, detail="Student not found")
+    return cached.response(request.headers.get("if-none-match"))
+
+
+@router.get("/students_full/", response_model=FullStudentPage)
+def get_all_students(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    department: Optional[str] = None,
+    year: Optional[int] = None,
+    semester: Optional[int] = None,
+    order: Literal["asc", "desc"] = "asc",
+    db: Session = Depends(get_read_db)
+):
+    # Fast path: one flat query, serialized once (see fastjson.py)
+    stmt = filter_students(export.profile_select(), department, year, semester)
+    rows = db.execute(keyset_window(stmt, cursor, limit, order)).mappings().all()
+    rows, next_cursor = split_page(rows, limit, order, key=itemgetter("student.student_id"))
+    return json_response({"items": [export.nest_profile(row) for row in rows], "next_cursor": next_cursor})
+
+
+@router.get("/students_full/export")
+def export_students(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    department: Optional[str] = None,
+    year: Optional[int] = None,
+):
+    # No request-scoped session here: the stream opens its own and keeps it
+    # for as long as the client is reading.
+    stmt = export.profile_query(department, year)
+    stream = export.stream_csv(stmt) if format == "csv" else export.stream_ndjson(stmt)
+    return StreamingResponse(
+        stream,
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="students.{format}"'},
+    )
 
 
 @router.put("/students/{student_id}", response_model=FullStudentResponse)
@@ -145,6 +234,8 @@ def update_full_student(
     if not db_student or not db_info or not db_sem_info or not db_record:
         raise HTTPException(status_code=404, detail="Student not found")
 
+    aggregates.retract(db, [student_id])
+
     for key, value in payload.student.dict(exclude_unset=True).items():
         setattr(db_student, key, value)
 
@@ -157,6 +248,8 @@ def update_full_student(
     for key, value in payload.record.dict(exclude_unset=True).items():
         setattr(db_record, key, value)
 
+    aggregates.apply(db, [student_id])
+    mark_changed(db, [student_id])
     db.commit()
 
     return FullStudentResponse.model_validate({
@@ -167,62 +260,107 @@ def update_full_student(
     })
 
 
-@router.delete("/students/{student_id}", response_model=dict)
-def delete_full_student(student_id: int, db: Session = Depends(get_db)):
-    db_student = db.query(StudentData).filter(StudentData.student_id == student_id).first()
-
-    if not db_student:
-        raise HTTPException(status_code=404, detail="Student not found")
+@router.patch("/students/{student_id}")
+def patch_full_student(
+    student_id: int,
+    payload: FullStudentPatch,
+    return_profile: bool = False,
+    db: Session = Depends(get_db)
+):
+    # Only the sections and fields that were sent are written, one UPDATE
+    # per section; the profile is read back only if asked for.
+    sections = payload.model_dump(exclude_unset=True)
+    sem_fields = sections.get("sem_info")
+    if sem_fields is not None:
+        sem_info_id = sem_fields.pop("sem_info_id", None)
+        if sem_info_id is None:
+            sem_info_id = (
+                db.query(func.min(StudentSemInfo.sem_info_id))
+                .filter(StudentSemInfo.student_id == student_id)
+                .scalar()
+            )
+
+    targets = [
+        ("student", StudentData, StudentData.student_id == student_id),
+        ("info", StudentInfo, StudentInfo.student_id == student_id),
+        ("sem_info", StudentSemInfo,
+         (StudentSemInfo.student_id == student_id) & (StudentSemInfo.sem_info_id == sem_info_id) if sem_fields is not None else None),
+        ("record", StudentRecord, StudentRecord.student_id == student_id),
+    ]
+    # An empty section (or body) writes nothing but still 404s on a missing row
+    sections = sections or {"student": {}}
 
+    writes = [(model.__table__, sections[section]) for section, model, _ in targets if sections.get(section)]
     try:
-        db.query(StudentSemInfo).filter(StudentSemInfo.student_id == student_id).delete()
-        db.query(StudentInfo).filter(StudentInfo.student_id == student_id).delete()
-        db.query(StudentRecord).filter(StudentRecord.student_id == student_id).delete()
-        db.delete(db_student)
+        with patch.tracking(db, writes, [student_id]):
+            for section, model, where in targets:
+                fields = sections.get(section)
+                if fields is not None and not patch.patch_rows(db, model, where, fields, [student_id], track=False):
+                    db.rollback()
+                    raise HTTPException(status_code=404, detail=f"Student {section} not found")
         db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=f"Conflicting update: {e.orig}")
+
+    if return_profile:
+        return load_profiles(db, [student_id])[student_id]
+    return {"student_id": student_id, "updated": {section: sorted(fields) for section, fields in sections.items() if fields}}
 
-        return {"message": f"Student with ID {student_id} and related records deleted successfully."}
 
+@router.patch("/semesters/{semester}/marks")
+def update_semester_marks(semester: int, payload: SemesterMarksUpdate, db: Session = Depends(get_db)):
+    # Thousands of mark changes as a few set-based statements (see patch.py)
+    started = time.perf_counter()
+    items = [item.model_dump(exclude_unset=True) for item in payload.items]
+    try:
+        updated, student_ids, errors = patch.update_semester_marks(db, semester, items)
+        db.commit()
     except SQLAlchemyError as e:
         db.rollback()
-        raise HTTPException(status_code=500, detail=f"Deletion failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    return {
+        "updated_rows": updated,
+        "students": len(student_ids),
+        "errors": errors,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
 
-@router.get("/student_data/", response_model=List[StudentDataSchema])
-def read_all_student_data(db: Session = Depends(get_db)):
-    return db.query(StudentData).all()
 
+@router.delete("/students/{student_id}", response_model=dict)
+def delete_full_student(student_id: int, db: Session = Depends(get_db)):
+    # The info, sem and record rows go with the student (ON DELETE CASCADE)
+    try:
+        aggregates.retract(db, [student_id])
+        deleted = db.execute(delete(StudentData).where(StudentData.student_id == student_id)).rowcount
+        if not deleted:
+            db.rollback()
+            raise HTTPException(status_code=404, detail="Student not found")
+        mark_changed(db, [student_id])
+        db.commit()
 
-@router.get("/graph/all-charts")
-async def get_all_chart_data():
-    # Bar Chart: department-wise pass/fail data
-    bar_chart_data = [
-        {"department": "CSE", "passed": 80, "failed": 10},
-        {"department": "ECE", "passed": 70, "failed": 20},
-        {"department": "MECH", "passed": 65, "failed": 15},
-        {"department": "CIVIL", "passed": 50, "failed": 25},
-    ]
+        return {"message": f"Student with ID {student_id} and related records deleted successfully."}
 
-    # Pie Chart: overall pass/fail ratio
-    pie_chart_data = {
-        "passed": 265,
-        "failed": 70,
-    }
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Deletion failed: {str(e)}")
 
-    # Line Chart: average CGPA over semesters
-    line_chart_data = {
-        "semesters": ["Sem 1", "Sem 2", "Sem 3", "Sem 4"],
-        "average_cgpa": [7.5, 7.8, 8.0, 8.3],
-    }
+@router.get("/student_data/", response_model=StudentDataPage)
+def read_all_student_data(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    department: Optional[str] = None,
+    year: Optional[int] = None,
+    semester: Optional[int] = None,
+    order: Literal["asc", "desc"] = "asc",
+    db: Session = Depends(get_read_db)
+):
+    # Fast path: plain column tuples, serialized once (see fastjson.py)
+    query = filter_students(db.query(*schema_columns(StudentData, StudentDataSchema)), department, year, semester)
+    rows, next_cursor = keyset_page(query, cursor, limit, order)
+    return json_response({"items": rows_to_dicts(rows), "next_cursor": next_cursor})
 
-    # Horizontal Bar Chart: total students per department
-    horizontal_bar_chart_data = {
-        "departments": ["CSE", "ECE", "MECH", "CIVIL"],
-        "student_counts": [90, 90, 80, 75],
-    }
 
-    return {
-        "bar_chart": bar_chart_data,
-        "pie_chart": pie_chart_data,
-        "line_chart": line_chart_data,
-        "horizontal_bar_chart": horizontal_bar_chart_data,
-    }
\ No newline at end of file
+@router.get("/graph/all-charts")
+def get_all_chart_data(db: Session = Depends(get_db)):
+    return aggregates.chart_data(db)
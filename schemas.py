@@ -1,8 +1,10 @@
 
 from typing import Optional
 from datetime import date
-from typing import List
-from pydantic import BaseModel, EmailStr, ConfigDict, RootModel
+from typing import Any, Dict, List, Literal
+from pydantic import BaseModel, EmailStr, ConfigDict, Field, RootModel, create_model, model_validator
+
+import config
 
 
 # --- StudentData ---
@@ -99,5 +101,159 @@ class FullStudentUpdate(BaseModel):
     sem_info: StudentSemInfoCreate
     record: StudentRecordCreate
 
-class StudentFullBulkCreate(RootModel[List[FullStudentCreate]]):
+# --- Partial schemas (for PATCH) ---
+
+def partial(model, exclude=()):
+    """``model`` with every field defaulting to None, for PATCH bodies.
+
+    Only the fields a client actually sends are written (``exclude_unset``),
+    and an explicit null is still rejected where ``model`` does not allow it.
+    """
+    fields = {
+        name: (field.annotation, None)
+        for name, field in model.model_fields.items() if name not in exclude
+    }
+    return create_model(f"{model.__name__.replace('Create', '')}Patch", **fields)
+
+
+StudentDataPatch = partial(StudentDataCreate)
+StudentInfoPatch = partial(StudentInfoCreate)
+StudentRecordPatch = partial(StudentRecordCreate)
+
+class StudentSemInfoPatch(partial(StudentSemInfoCreate)):
+    # Which sem row to patch; defaults to the one PUT updates (the first)
+    sem_info_id: Optional[int] = None
+
+class FullStudentPatch(BaseModel):
+    student: Optional[StudentDataPatch] = None
+    info: Optional[StudentInfoPatch] = None
+    sem_info: Optional[StudentSemInfoPatch] = None
+    record: Optional[StudentRecordPatch] = None
+
+
+# --- Semester marks (bulk, set-based) ---
+
+class SemesterMark(BaseModel):
+    student_id: int
+    subject: str
+    mark: Optional[int] = None
+    grade: Optional[str] = None
+    pass_fail: Optional[str] = None
+    cgpa: Optional[float] = None
+
+class SemesterMarksUpdate(BaseModel):
+    items: List[SemesterMark] = Field(max_length=10000)
+
+
+# Entries are validated one at a time against FullStudentCreate so that a
+# bad row is reported back instead of rejecting the whole payload.
+class StudentFullBulkCreate(RootModel[List[Dict[str, Any]]]):
+    pass
+
+# Same idea for the per-table batch routes in backend.py (see batch.py)
+class BatchItems(RootModel[List[Dict[str, Any]]]):
     pass
+
+
+# --- Single table rows (backend.py's per-table CRUD routes) ---
+
+class StudentDataRow(BaseModel):
+    student_id: int
+    student_name: str
+    dob: date
+    department: str
+    register_num: str
+    university_num: int
+    model_config = ConfigDict(from_attributes=True)
+
+class StudentInfoRow(BaseModel):
+    student_info_id: int
+    student_id: int
+    address: str
+    blood_grp: str
+    mail_id: str
+    phone_no: int
+    year: int
+    model_config = ConfigDict(from_attributes=True)
+
+class StudentSemInfoRow(BaseModel):
+    student_id: int
+    student_info_id: int
+    cgpa: float
+    semester: int
+    pass_fail: str
+    grade: str
+    mark: int
+    subject: str
+    model_config = ConfigDict(from_attributes=True)
+
+class StudentRecordRow(BaseModel):
+    student_id: int
+    father_name: str
+    mother_name: str
+    father_occupation: str
+    aadhar_num: int
+    tenth_mark: int
+    twelfth_mark: int
+    account_num: int
+    community: str
+    religion: str
+    nationality: str
+    model_config = ConfigDict(from_attributes=True)
+
+# Any subset of the fields, primary key excluded
+StudentDataRowPatch = partial(StudentDataRow, exclude={"student_id"})
+StudentInfoRowPatch = partial(StudentInfoRow, exclude={"student_info_id"})
+StudentSemInfoRowPatch = partial(StudentSemInfoRow)
+StudentRecordRowPatch = partial(StudentRecordRow)
+
+
+# --- Background jobs (jobs.py, job_routes.py) ---
+
+class JobSubmit(BaseModel):
+    kind: str
+    params: Dict[str, Any] = {}
+
+# Parameters of the job kinds that can be submitted through POST /jobs
+
+class PurgeJobParams(BaseModel):
+    department: Optional[str] = None
+    year: Optional[int] = None
+    chunk_size: int = Field(config.PURGE_CHUNK_SIZE, ge=1, le=config.PURGE_MAX_CHUNK_SIZE)
+
+    @model_validator(mode="after")
+    def _needs_filter(self):
+        if self.department is None and self.year is None:
+            raise ValueError("Pass department and/or year")
+        return self
+
+class ExportJobParams(BaseModel):
+    format: Literal["ndjson", "csv"] = "ndjson"
+    department: Optional[str] = None
+    year: Optional[int] = None
+
+class ReportJobParams(BaseModel):
+    metrics: List[Literal["mark", "cgpa"]] = ["mark", "cgpa"]
+    by: List[Literal["department", "subject", "semester", "year"]] = ["department", "semester"]
+
+class GradeRecompute(BaseModel):
+    # None re-derives every student, as a background job
+    student_ids: Optional[List[int]] = Field(None, min_length=1, max_length=5000)
+
+class Question(BaseModel):
+    question: str = Field(min_length=1, max_length=500)
+
+
+# --- Paginated list responses ---
+
+class StudentDataPage(BaseModel):
+    items: List[StudentDataSchema]
+    next_cursor: Optional[str] = None
+
+class FullStudentPage(BaseModel):
+    items: List[FullStudentResponse]
+    next_cursor: Optional[str] = None
+
+class FullStudentBatch(BaseModel):
+    items: List[FullStudentResponse]
+    missing: List[int] = []
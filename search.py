@@ -0,0 +1,324 @@
+"""In-process search index over student name, register number and
+university number.
+
+Name words go into a SortedList of tokens (prefix lookups by bisection) and a
+trigram index (typo-tolerant lookups, verified with a bounded edit
+distance).  Register and university numbers are unique, so each gets a
+SortedList of keys pointing at a single student; they match exactly or by
+prefix.
+
+The index is built on first use and kept in sync by the students-changed
+hook: committed writes mark their students dirty and the next search
+re-reads just those rows before answering (see synced.py).
+"""
+import heapq
+import logging
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Set
+
+from sortedcontainers import SortedList
+from sqlalchemy import select
+
+from changes import on_all_students_changed, on_students_changed
+from models import StudentData
+from synced import SyncedIndex, primary_sessions
+
+logger = logging.getLogger("search")
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+# Bounds the work for short prefixes such as "a" or "2"
+MAX_PREFIX_TOKENS = 200
+MIN_FUZZY_LENGTH = 4
+BUILD_BATCH_SIZE = 5000
+
+# Per-term scores; a student's score is the sum over the query terms
+EXACT_ID, PREFIX_ID = 10.0, 5.0
+EXACT_NAME, PREFIX_NAME = 3.0, 2.0
+FUZZY_NAME = {1: 1.0, 2: 0.5}
+
+_split = re.compile(r"[^0-9a-z]+").split
+
+FIELDS = (
+    StudentData.student_id,
+    StudentData.student_name,
+    StudentData.dob,
+    StudentData.department,
+    StudentData.register_num,
+    StudentData.university_num,
+)
+
+
+def normalize(text) -> List[str]:
+    return [token for token in _split(str(text).casefold()) if token]
+
+
+def _identifier(value):
+    return "".join(normalize(value)) if value is not None else ""
+
+
+def _trigrams(token):
+    padded = f"${token}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _max_distance(token):
+    return 2 if len(token) >= 8 else 1
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance, or ``limit + 1`` as soon as it must exceed ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class _UniqueKeys:
+    """Sorted unique keys, each pointing at one student."""
+
+    def __init__(self):
+        self.keys = SortedList()
+        self.owner: Dict[str, int] = {}
+
+    def bulk_load(self, pairs):
+        self.owner = dict(pairs)
+        self.keys = SortedList(self.owner)
+
+    def add(self, key, student_id):
+        if not key:
+            return
+        if key not in self.owner:
+            self.keys.add(key)
+        self.owner[key] = student_id
+
+    def remove(self, key, student_id):
+        if key and self.owner.get(key) == student_id:
+            del self.owner[key]
+            self.keys.remove(key)
+
+    def match(self, term, tiers):
+        student_id = self.owner.get(term)
+        if student_id is not None:
+            tiers[EXACT_ID].append((student_id,))
+        start = self.keys.bisect_left(term)
+        prefixed = []
+        for key in self.keys.islice(start, start + MAX_PREFIX_TOKENS):
+            if not key.startswith(term):
+                break
+            if key != term:
+                prefixed.append(self.owner[key])
+        tiers[PREFIX_ID].append(prefixed)
+
+
+class _NameTokens:
+    """Name words -> students, with a sorted token list and trigram index."""
+
+    def __init__(self):
+        self.postings: Dict[str, Set[int]] = defaultdict(set)
+        self.tokens = SortedList()
+        self.trigrams: Dict[str, Set[str]] = defaultdict(set)
+
+    def bulk_load(self, postings):
+        self.postings = postings
+        self.tokens = SortedList(postings)
+        self.trigrams = defaultdict(set)
+        for token in self.tokens:
+            for gram in _trigrams(token):
+                self.trigrams[gram].add(token)
+
+    def add(self, token, student_id):
+        ids = self.postings[token]
+        if not ids:
+            self.tokens.add(token)
+            for gram in _trigrams(token):
+                self.trigrams[gram].add(token)
+        ids.add(student_id)
+
+    def remove(self, token, student_id):
+        ids = self.postings.get(token)
+        if not ids:
+            return
+        ids.discard(student_id)
+        if not ids:
+            del self.postings[token]
+            self.tokens.remove(token)
+            for gram in _trigrams(token):
+                self.trigrams[gram].discard(token)
+
+    def _fuzzy(self, term):
+        limit = _max_distance(term)
+        grams = _trigrams(term)
+        # One edit changes at most three trigrams
+        needed = len(grams) - 3 * limit
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.trigrams.get(gram, ()))
+        for token, count in shared.items():
+            if count >= needed and token != term:
+                distance = edit_distance(term, token, limit)
+                if distance <= limit:
+                    yield token, distance
+
+    def match(self, term, tiers):
+        start = self.tokens.bisect_left(term)
+        for token in self.tokens.islice(start, start + MAX_PREFIX_TOKENS):
+            if not token.startswith(term):
+                break
+            tiers[EXACT_NAME if token == term else PREFIX_NAME].append(self.postings[token])
+        if len(term) >= MIN_FUZZY_LENGTH:
+            for token, distance in self._fuzzy(term):
+                tiers[FUZZY_NAME[distance]].append(self.postings[token])
+
+
+class StudentSearchIndex(SyncedIndex):
+    def __init__(self, session_factory):
+        super().__init__(session_factory, logger)
+        self._docs: Dict[int, tuple] = {}
+        self._names = _NameTokens()
+        self._register = _UniqueKeys()
+        self._university = _UniqueKeys()
+
+    # --- maintenance ---
+
+    def _fetch(self, db, student_ids=None):
+        stmt = select(*FIELDS)
+        if student_ids is not None:
+            stmt = stmt.where(StudentData.student_id.in_(student_ids))
+        return db.execute(stmt.execution_options(yield_per=BUILD_BATCH_SIZE))
+
+    def _load(self, db):
+        docs, postings, registers, universities = {}, defaultdict(set), [], []
+        for row in self._fetch(db):
+            student_id = row[0]
+            docs[student_id] = tuple(row[1:])
+            for token in set(normalize(row.student_name or "")):
+                postings[token].add(student_id)
+            registers.append((_identifier(row.register_num), student_id))
+            universities.append((_identifier(row.university_num), student_id))
+
+        self._docs = docs
+        self._names.bulk_load(postings)
+        self._register.bulk_load(pair for pair in registers if pair[0])
+        self._university.bulk_load(pair for pair in universities if pair[0])
+        return f"search index built: {len(docs)} students"
+
+    def _unindex(self, student_id):
+        doc = self._docs.pop(student_id, None)
+        if doc is None:
+            return
+        name, _, _, register_num, university_num = doc
+        for token in set(normalize(name or "")):
+            self._names.remove(token, student_id)
+        self._register.remove(_identifier(register_num), student_id)
+        self._university.remove(_identifier(university_num), student_id)
+
+    def _index(self, student_id, doc):
+        self._docs[student_id] = doc
+        name, _, _, register_num, university_num = doc
+        for token in set(normalize(name or "")):
+            self._names.add(token, student_id)
+        self._register.add(_identifier(register_num), student_id)
+        self._university.add(_identifier(university_num), student_id)
+
+    def _reload(self, db, student_ids):
+        rows = {row[0]: tuple(row[1:]) for row in self._fetch(db, student_ids)}
+        for student_id in student_ids:
+            self._unindex(student_id)
+            if student_id in rows:
+                self._index(student_id, rows[student_id])
+
+    # --- queries ---
+
+    def _term_tiers(self, term):
+        """Students matching ``term`` as {score: ids}; a student may appear in several tiers."""
+        tiers = defaultdict(list)
+        self._names.match(term, tiers)
+        self._register.match(term, tiers)
+        if term.isdigit():
+            self._university.match(term, tiers)
+        return {score: set().union(*ids) for score, ids in tiers.items() if any(ids)}
+
+    def _rank(self, terms, limit):
+        # Whole sets are intersected and subtracted here rather than scoring
+        # every posting one by one: a common first name has tens of
+        # thousands of students at 500k.
+        per_term = [self._term_tiers(term) for term in terms]
+        if len(per_term) == 1:
+            best, seen = [], set()
+            for score in sorted(per_term[0], reverse=True):
+                fresh = per_term[0][score] - seen
+                best.extend((student_id, score) for student_id in heapq.nsmallest(limit - len(best), fresh))
+                seen |= fresh
+                if len(best) >= limit:
+                    break
+            return best
+
+        candidates = None
+        for tiers in sorted(per_term, key=lambda tiers: sum(map(len, tiers.values()))):
+            matched = set().union(*tiers.values())
+            candidates = matched if candidates is None else candidates & matched
+            if not candidates:
+                return []
+
+        totals = dict.fromkeys(candidates, 0.0)
+        for tiers in per_term:
+            remaining = set(candidates)
+            for score in sorted(tiers, reverse=True):
+                hit = tiers[score] & remaining
+                for student_id in hit:
+                    totals[student_id] += score
+                remaining -= hit
+        return heapq.nsmallest(limit, totals.items(), key=lambda item: (-item[1], item[0]))
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT):
+        terms = list(dict.fromkeys(normalize(query)))
+        if not terms:
+            return []
+
+        with self._lock:
+            self.ensure_current()
+            self.queries += 1
+            best = self._rank(terms, limit)
+            if len(terms) > 1:
+                # A register number typed with spaces or dashes ("21 CS 001")
+                # is also tried as one identifier.
+                student_id = self._register.owner.get("".join(terms))
+                if student_id is not None:
+                    best = [(student_id, EXACT_ID * len(terms))] + [item for item in best if item[0] != student_id]
+                    best = best[:limit]
+
+            return [
+                {
+                    "student_id": student_id,
+                    "student_name": name,
+                    "dob": dob,
+                    "department": department,
+                    "register_num": register_num,
+                    "university_num": university_num,
+                    "score": score,
+                }
+                for student_id, score in best
+                for name, dob, department, register_num, university_num in [self._docs[student_id]]
+            ]
+
+    def stats(self):
+        with self._lock:
+            return {
+                **super().stats(),
+                "students": len(self._docs),
+                "name_tokens": len(self._names.tokens),
+            }
+
+
+search_index = StudentSearchIndex(primary_sessions())
+on_students_changed(search_index.mark_dirty)
+on_all_students_changed(search_index.mark_all_dirty)
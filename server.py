@@ -0,0 +1,209 @@
+"""The API app, built by ``create_app()``:
+
+    uvicorn server:create_app --factory
+
+One app serves the full-student routes (routes.py, or async_routes.py with
+DB_MODE=async), backend.py's per-table routes and the feature routers.
+Everything but the standard library and config is imported inside
+create_app, so importing this module is cheap and a worker pays for the
+route modules once, while it builds the app.
+
+Startup migrates, recovers interrupted jobs and then warms what the first
+requests would otherwise pay for (STARTUP_WARMUP): the connection pool,
+the OpenAPI schema, the leaderboards, the search index and the analytics
+cohort.  How long each step took is logged once, and served at
+``/metrics/startup``.
+"""
+import logging
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+import config
+
+logger = logging.getLogger("server")
+
+
+class StartupTimer:
+    """Wall time of each startup phase, from create_app() until ready."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.ready_ms = None
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round((time.perf_counter() - started) * 1000, 1)
+
+    def ready(self):
+        self.ready_ms = round((time.perf_counter() - self.started) * 1000, 1)
+        logger.info("ready in %.0f ms: %s", self.ready_ms,
+                    ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.phases.items()))
+
+    def report(self):
+        return {"phases_ms": dict(self.phases), "ready_ms": self.ready_ms}
+
+
+# --- warm-up steps ---
+
+async def _warm_pool(app):
+    # Open the pool's connections now rather than on the first requests
+    from sqlalchemy.pool import QueuePool
+
+    from database import engines, get_async_engine
+
+    for engine in engines().values():
+        size = engine.pool.size() if isinstance(engine.pool, QueuePool) else 1
+        connections = [engine.connect() for _ in range(size)]
+        for connection in connections:
+            connection.close()
+    if config.DB_MODE == "async":
+        engine = get_async_engine()
+        connections = [await engine.connect() for _ in range(engine.pool.size())]
+        for connection in connections:
+            await connection.close()
+
+
+async def _warm_schemas(app):
+    # Otherwise built on the first /docs or /openapi.json
+    app.openapi()
+
+
+async def _warm_rankings(app):
+    from ranking import ranking_index
+
+    ranking_index.build()
+
+
+async def _warm_search(app):
+    from search import search_index
+
+    search_index.ensure_current()
+
+
+async def _warm_analytics(app):
+    from analytics import cohort_analytics
+
+    cohort_analytics.cohort()
+
+
+WARMUPS = {
+    "pool": _warm_pool,
+    "schemas": _warm_schemas,
+    "rankings": _warm_rankings,
+    "search": _warm_search,
+    "analytics": _warm_analytics,
+}
+
+
+@asynccontextmanager
+async def lifespan(app):
+    from database import init_db
+    from jobs import runner as job_runner
+
+    timer = app.state.startup
+    with timer.phase("migrate"):
+        init_db()
+    with timer.phase("recover_jobs"):
+        job_runner.recover()
+    for step in config.STARTUP_WARMUP:
+        if step not in WARMUPS:
+            logger.warning("unknown STARTUP_WARMUP step %r; one of %s", step, sorted(WARMUPS))
+            continue
+        with timer.phase(f"warm_{step}"):
+            try:
+                await WARMUPS[step](app)
+            except Exception:
+                # Only a head start: the request that needs it builds it anyway
+                logger.exception("warm-up %s failed", step)
+    timer.ready()
+    yield
+    job_runner.shutdown()
+
+
+def _mount(app, routers):
+    """Include ``routers`` in order; a method and path an earlier one serves is skipped.
+
+    Literal paths are routed before templated ones, whichever router they
+    come from, so that /student_full/batch is not taken for a
+    /student_full/{student_id} of an earlier router.
+    """
+    from fastapi import APIRouter
+
+    served = set()
+    kept = []
+    for router in routers:
+        for route in router.routes:
+            keys = {(route.path, method) for method in getattr(route, "methods", ())}
+            if keys & served:
+                continue
+            served |= keys
+            kept.append(route)
+    mounted = APIRouter()
+    # sorted() is stable: within each group the order above is kept
+    mounted.routes.extend(sorted(kept, key=lambda route: "{" in route.path))
+    app.include_router(mounted)
+
+
+def create_app():
+    timer = StartupTimer()
+    with timer.phase("imports"):
+        from fastapi import FastAPI
+        from fastapi.middleware.cors import CORSMiddleware
+
+        import backend
+        from admission import AdmissionMiddleware
+        from analytics_routes import router as analytics_router
+        from grading_routes import router as grading_router
+        from instrumentation import RequestTimingMiddleware
+        from job_routes import router as jobs_router
+        from live_routes import router as live_router
+        from metrics import router as metrics_router
+        from qa_routes import router as qa_router
+        from ranking_routes import router as ranking_router
+        from routes import router as students_router
+
+        student_routers = [students_router]
+        if config.DB_MODE == "async":
+            from async_routes import router as async_router
+
+            # Ahead of the sync handlers it replaces for the same path/method
+            student_routers.insert(0, async_router)
+
+    with timer.phase("routes"):
+        app = FastAPI(lifespan=lifespan)
+        app.state.startup = timer
+
+        # Innermost, so CORS headers and Server-Timing reach a shed request's 503 too
+        app.add_middleware(AdmissionMiddleware)
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=config.CORS_ORIGINS,
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+            expose_headers=["Server-Timing"],
+        )
+        app.add_middleware(RequestTimingMiddleware)
+
+        _mount(app, [
+            *student_routers,
+            backend.router,
+            metrics_router,
+            analytics_router,
+            jobs_router,
+            grading_router,
+            ranking_router,
+            qa_router,
+            live_router,
+        ])
+
+        @app.get("/")
+        def root():
+            return {"message": "FastAPI is running"}
+
+    return app
@@ -0,0 +1,131 @@
+"""In-memory state derived from the student tables and kept in step with
+committed writes: the search index, the leaderboards and the live hub.
+
+Commits only mark the students they touched (see changes.py).  Whoever owns
+the state takes the marked ids when it suits it and re-reads just those
+students, from the primary: the replica may not have the commit yet.
+"""
+import threading
+import time
+from typing import Iterable, Set
+
+REFRESH_CHUNK_SIZE = 1000
+
+
+def primary_sessions():
+    """The session factory for reads that must see the latest commit."""
+    from database import SessionLocal
+
+    return SessionLocal
+
+
+class DirtySet:
+    """Student ids marked from any thread, taken all at once by their consumer.
+
+    Has a lock of its own so that a commit never waits for a build or a
+    lookup.  Created ids are kept alongside for consumers that tell inserts
+    from updates.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids: Set[int] = set()
+        self._created: Set[int] = set()
+
+    def mark(self, student_ids: Iterable[int], created_ids: Iterable[int] = ()):
+        with self._lock:
+            self._ids.update(student_ids)
+            self._created.update(created_ids)
+
+    def take(self):
+        """(ids, created ids) marked since the last take."""
+        with self._lock:
+            taken = self._ids, self._created
+            self._ids, self._created = set(), set()
+        return taken
+
+    def __len__(self):
+        return len(self._ids)
+
+
+class SyncedIndex:
+    """An index built from the tables on first use and refreshed incrementally.
+
+    Register ``mark_dirty`` with ``on_students_changed`` and
+    ``mark_all_dirty`` with ``on_all_students_changed``; lookups call
+    ``ensure_current()`` under ``_lock``, which re-reads the dirty students
+    first, or builds afresh after ``mark_all_dirty``.  Subclasses implement ``_load(db)``, the full build (returning a
+    summary for the log), and ``_reload(db, student_ids)``, which replaces
+    the given students with what the database has now.
+    """
+
+    def __init__(self, session_factory, logger):
+        self.session_factory = session_factory
+        self.logger = logger
+        self._lock = threading.RLock()
+        self._dirty = DirtySet()
+        self._built = False
+        # Set from any thread, like _dirty, so a commit never waits on _lock
+        self._rebuild = False
+        self.build_ms = None
+        self.refreshes = 0
+        self.queries = 0
+
+    def _load(self, db):
+        raise NotImplementedError
+
+    def _reload(self, db, student_ids):
+        raise NotImplementedError
+
+    def mark_dirty(self, student_ids: Iterable[int]):
+        self._dirty.mark(student_ids)
+
+    def mark_all_dirty(self):
+        self._rebuild = True
+
+    def build(self):
+        with self._lock:
+            started = time.perf_counter()
+            # Writes committed from here on are picked up by the next refresh
+            self._rebuild = False
+            self._dirty.take()
+            db = self.session_factory()
+            try:
+                summary = self._load(db)
+            finally:
+                db.close()
+            self._built = True
+            self.build_ms = (time.perf_counter() - started) * 1000
+            self.logger.info("%s in %.0f ms", summary, self.build_ms)
+
+    def _refresh(self):
+        dirty = sorted(self._dirty.take()[0])
+        db = self.session_factory()
+        try:
+            for start in range(0, len(dirty), REFRESH_CHUNK_SIZE):
+                self._reload(db, dirty[start:start + REFRESH_CHUNK_SIZE])
+        except Exception:
+            # Try again on the next lookup rather than serving stale data forever
+            self.mark_dirty(dirty)
+            raise
+        finally:
+            db.close()
+        self.refreshes += 1
+
+    def ensure_current(self):
+        with self._lock:
+            if not self._built or self._rebuild:
+                self.build()
+            if self._dirty:
+                self._refresh()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "built": self._built,
+                "pending_refresh": len(self._dirty),
+                "pending_rebuild": self._rebuild,
+                "build_ms": round(self.build_ms, 1) if self.build_ms is not None else None,
+                "refreshes": self.refreshes,
+                "queries": self.queries,
+            }
@@ -0,0 +1,155 @@
+"""Shared fixtures: a throwaway SQLite database and the app over it.
+
+The settings are environment variables read when config.py is imported,
+so they are set here before any of the app's modules are.
+"""
+import os
+import sys
+import tempfile
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_tmp = tempfile.mkdtemp(prefix="student-tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{_tmp}/test.db",
+    ASYNC_DATABASE_URL=f"sqlite+aiosqlite:///{_tmp}/test.db",
+    DB_MODE="sync",
+    JOB_RESULTS_DIR=os.path.join(_tmp, "jobs"),
+    PROFILE_LOADER_WINDOW_MS="0",
+    STARTUP_WARMUP="",
+    QA_BACKEND="stub",
+)
+os.environ.pop("READ_REPLICA_URL", None)
+
+import config  # noqa: E402
+import database  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _schema():
+    database.init_db()
+
+
+@pytest.fixture(autouse=True)
+def clean_db(_schema):
+    """Every test starts from empty tables and empty in-memory indexes and caches."""
+    from analytics import cohort_analytics
+    from cache import profile_cache
+    from qa import answer_cache
+    from ranking import ranking_index
+    from search import search_index
+
+    with database.engine.begin() as connection:
+        for table in reversed(database.Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+    profile_cache.clear()
+    answer_cache.clear()
+    cohort_analytics.invalidate()
+    search_index.build()
+    ranking_index.build()
+    yield
+
+
+def _client(monkeypatch, db_mode):
+    from fastapi.testclient import TestClient
+
+    import jobs
+    import server
+
+    monkeypatch.setattr(config, "DB_MODE", db_mode)
+    # Shutting the app down shuts its job runner down for good
+    monkeypatch.setattr(jobs, "runner", jobs.JobRunner(
+        database.SessionLocal, threads=2, processes=1, max_queued=config.JOB_MAX_QUEUED,
+    ))
+    if db_mode == "async":
+        # aiosqlite connections belong to the event loop that opened them,
+        # and every TestClient runs its own
+        monkeypatch.setattr(database, "_async_engine", None)
+        monkeypatch.setattr(database, "_AsyncSessionLocal", None)
+    return TestClient(server.create_app())
+
+
+@pytest.fixture
+def client(monkeypatch):
+    with _client(monkeypatch, "sync") as test_client:
+        yield test_client
+
+
+@pytest.fixture(params=["sync", "async"])
+def any_client(request, monkeypatch):
+    """The app in each DB_MODE."""
+    with _client(monkeypatch, request.param) as test_client:
+        test_client.db_mode = request.param
+        yield test_client
+
+
+def student_payload(n, department="CSE", semester=1, mark=80, cgpa=8.0, subject="Maths", year=2):
+    return {
+        "student": {
+            "student_name": f"Student {n}",
+            "dob": "2004-01-01",
+            "department": department,
+            "register_num": f"REG{n:05d}",
+            "university_num": 710000000 + n,
+        },
+        "info": {
+            "address": "Chennai",
+            "blood_grp": "O+",
+            "mail_id": f"student{n}@example.com",
+            "phone_no": 9000000000 + n,
+            "year": year,
+        },
+        "sem_info": {
+            "cgpa": cgpa,
+            "semester": semester,
+            "pass_fail": "Pass" if mark is None or mark >= 50 else "Fail",
+            "grade": None,
+            "mark": mark,
+            "subject": subject,
+        },
+        "record": {
+            "father_name": "Father",
+            "mother_name": "Mother",
+            "father_occupation": "Farmer",
+            "aadhar_num": 100000000000 + n,
+            "tenth_mark": 450,
+            "twelfth_mark": 550,
+            "account_num": 5000000000 + n,
+            "community": "BC",
+            "religion": "Hindu",
+            "nationality": "Indian",
+        },
+    }
+
+
+@pytest.fixture
+def make_students():
+    """make_students(client, count, start=1, **fields) creates students through the API; their ids."""
+    def make(client, count, start=1, **fields):
+        ids = []
+        for n in range(start, start + count):
+            response = client.post("/student_full/", json=student_payload(n, **fields))
+            assert response.status_code == 200, response.text
+            ids.append(response.json()["student_id"])
+        return ids
+
+    return make
+
+
+@pytest.fixture
+def wait_for_job():
+    """wait_for_job(client, job_id) polls until the job has finished; its record."""
+    def wait(client, job_id, timeout=60):
+        deadline = time.monotonic() + timeout
+        while True:
+            job = client.get(f"/jobs/{job_id}").json()
+            if job["status"] in ("completed", "failed", "cancelled"):
+                return job
+            assert time.monotonic() < deadline, f"job still {job['status']}"
+            time.sleep(0.02)
+
+    return wait
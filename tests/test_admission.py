@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+import admission
+import config
+from admission import Rejected, _Gate, classify
+
+
+@pytest.mark.parametrize("method, path, expected", [
+    ("GET", "/student_full/12", ("point_read", "GET /student_full/{student_id}")),
+    ("GET", "/student_full/batch", ("listing", "GET /student_full/batch")),
+    ("GET", "/students_full", ("listing", "GET /students_full/")),
+    ("GET", "/students_full/export", ("export", "GET /students_full/export")),
+    ("PATCH", "/semesters/3/marks", ("bulk_write", "PATCH /semesters/{semester}/marks")),
+    ("GET", "/student_record/7", ("point_read", "GET /student_record/{student_record_id}")),
+    ("POST", "/student_full/", (None, None)),
+    ("GET", "/metrics/admission", (None, None)),
+])
+def test_classify(method, path, expected):
+    assert classify(method, path) == expected
+
+
+def test_gate_queues_in_order_then_sheds():
+    async def scenario():
+        gate = _Gate("test", concurrency=1, queue=2)
+        assert await gate.acquire(1) == 0.0
+        admitted = []
+
+        async def wait(name):
+            await gate.acquire(1)
+            admitted.append(name)
+
+        waiters = [asyncio.create_task(wait(name)) for name in ("first", "second")]
+        await asyncio.sleep(0)
+        with pytest.raises(Rejected):
+            await gate.acquire(1)
+
+        gate.release()
+        await asyncio.sleep(0)
+        gate.release()
+        await asyncio.gather(*waiters)
+        return gate.stats(), admitted
+
+    stats, admitted = asyncio.run(scenario())
+
+    assert admitted == ["first", "second"]
+    assert (stats["active"], stats["admitted"], stats["queued"], stats["rejected"]) == (1, 3, 2, 1)
+
+
+def test_gate_times_out_a_waiter():
+    async def scenario():
+        gate = _Gate("test", concurrency=1, queue=1)
+        await gate.acquire(1)
+        with pytest.raises(Rejected):
+            await gate.acquire(0.01)
+        return gate.stats()
+
+    stats = asyncio.run(scenario())
+
+    assert (stats["timed_out"], stats["queue_depth"], stats["active"]) == (1, 0, 1)
+
+
+def test_full_class_is_shed_with_503_and_retry_after(client, monkeypatch):
+    monkeypatch.setitem(admission.gates, "listing", _Gate("listing", concurrency=0, queue=0))
+
+    shed = client.get("/students_full/")
+    unlimited = client.get("/metrics/admission")
+
+    assert shed.status_code == 503
+    assert shed.headers["retry-after"] == str(admission.RETRY_AFTER_SECONDS)
+    assert shed.json()["detail"].startswith("Server busy")
+    assert client.get("/student_full/1").status_code == 404  # another class still gets through
+    assert unlimited.json()["classes"]["listing"]["rejected"] == 1
+
+
+def test_saturated_exports_do_not_hold_back_chart_reads(client, monkeypatch):
+    monkeypatch.setitem(admission.gates, "export", _Gate("export", concurrency=0, queue=0))
+
+    assert client.get("/students_full/export").status_code == 503
+    assert client.get("/graph/all-charts").status_code == 200
+    assert client.get("/analytics/pass-rates").status_code == 200
+    assert admission.gates["listing"].stats()["rejected"] == 0
+
+
+def test_queued_request_past_the_timeout_is_shed(client, monkeypatch):
+    monkeypatch.setitem(admission.gates, "listing", _Gate("listing", concurrency=0, queue=1))
+    monkeypatch.setattr(config, "ADMISSION_QUEUE_TIMEOUT_MS", 10)
+
+    response = client.get("/students_full/")
+
+    assert response.status_code == 503
+    assert "retry-after" in response.headers
+    assert admission.gates["listing"].stats()["timed_out"] == 1
+
+
+def test_disabled_admits_everything(client, monkeypatch):
+    monkeypatch.setitem(admission.gates, "listing", _Gate("listing", concurrency=0, queue=0))
+    monkeypatch.setattr(config, "ADMISSION_ENABLED", False)
+
+    assert client.get("/students_full/").status_code == 200
+
+
+def test_queue_time_is_reported_in_server_timing(client):
+    timing = client.get("/students_full/").headers["server-timing"]
+
+    assert "queue;dur=" in timing
@@ -0,0 +1,90 @@
+import aggregates
+import database
+from conftest import student_payload
+from models import DepartmentSemesterStats, DepartmentStats, StudentData
+
+
+def _charts_and_counters():
+    db = database.SessionLocal()
+    try:
+        return aggregates.chart_data(db), aggregates.counters(db)
+    finally:
+        db.close()
+
+
+def _rebuilt():
+    db = database.SessionLocal()
+    try:
+        aggregates.rebuild(db)
+    finally:
+        db.close()
+    return _charts_and_counters()
+
+
+def test_charts_count_students_and_results(client, make_students):
+    make_students(client, 2, department="CSE", mark=90)
+    make_students(client, 1, start=3, department="ECE", mark=30)
+
+    charts = client.get("/graph/all-charts").json()
+
+    assert charts["pie_chart"] == {"passed": 2, "failed": 1}
+    assert charts["bar_chart"] == [
+        {"department": "CSE", "passed": 2, "failed": 0},
+        {"department": "ECE", "passed": 0, "failed": 1},
+    ]
+    assert charts["horizontal_bar_chart"] == {"departments": ["CSE", "ECE"], "student_counts": [2, 1]}
+    assert charts["line_chart"]["semesters"] == ["Sem 1"]
+
+
+def test_incremental_summaries_match_a_rebuild(client, make_students):
+    make_students(client, 4, department="CSE", mark=80)
+    make_students(client, 2, start=5, department="ECE", mark=40, semester=2)
+    bulk = [student_payload(n, department="IT", mark=65) for n in range(7, 10)]
+    assert client.post("/students/bulk/", json=bulk).status_code == 201
+
+    updated = student_payload(2, department="MECH", mark=20, semester=3)
+    assert client.put("/students/2", json=updated).status_code == 200
+    assert client.patch("/students/3", json={"student": {"department": "ECE"}}).status_code == 200
+    marks = {"items": [{"student_id": 5, "subject": "Maths", "mark": 99}, {"student_id": 6, "subject": "Maths", "mark": 10}]}
+    assert client.patch("/semesters/2/marks", json=marks).status_code == 200
+    assert client.delete("/students/1").status_code == 200
+    assert client.delete("/student_data/4").status_code == 200
+
+    incremental = _charts_and_counters()
+
+    assert incremental == _rebuilt()
+    assert incremental[0]["horizontal_bar_chart"] == {"departments": ["ECE", "IT", "MECH"], "student_counts": [3, 3, 1]}
+
+
+def test_retract_then_apply_moves_a_student_between_summaries(client, make_students):
+    [student_id] = make_students(client, 1, department="CSE", mark=80)
+
+    db = database.SessionLocal()
+    try:
+        aggregates.retract(db, [student_id])
+        db.get(StudentData, student_id).department = "ECE"
+        db.flush()
+        aggregates.apply(db, [student_id])
+        db.commit()
+    finally:
+        db.close()
+
+    charts, counters = _charts_and_counters()
+    assert charts["horizontal_bar_chart"] == {"departments": ["ECE"], "student_counts": [1]}
+    assert counters["departments"] == {"ECE": {"students": 1, "passed": 1, "failed": 0}}
+    assert (charts, counters) == _rebuilt()
+
+
+def test_missing_summaries_are_built_at_startup_not_on_read(client, make_students):
+    make_students(client, 2, department="CSE", mark=90)
+    charts, counters = _charts_and_counters()
+    with database.engine.begin() as connection:
+        connection.execute(DepartmentSemesterStats.__table__.delete())
+        connection.execute(DepartmentStats.__table__.delete())
+
+    # A read never writes the summaries
+    assert client.get("/graph/all-charts").json()["pie_chart"] == {"passed": 0, "failed": 0}
+
+    database.init_db()
+
+    assert _charts_and_counters() == (charts, counters)
@@ -0,0 +1,71 @@
+import pytest
+
+import database
+from analytics import cohort_analytics
+
+
+@pytest.fixture
+def cohort(client, make_students):
+    make_students(client, 1, mark=90)
+    make_students(client, 1, start=2, mark=60)
+    make_students(client, 1, start=3, mark=40)
+    make_students(client, 1, start=4, mark=70, department="ECE", subject="Physics", year=3)
+
+
+def test_grouped_summary(client, cohort):
+    body = client.get("/analytics/summary", params={"percentiles": "50"}).json()
+
+    assert body["groups"] == [
+        {"department": "CSE", "count": 3, "mean": 63.333, "std": 20.548, "min": 40.0, "max": 90.0, "p50": 60.0,
+         "rows": 3, "pass_rate": 0.6667},
+        {"department": "ECE", "count": 1, "mean": 70.0, "std": 0.0, "min": 70.0, "max": 70.0, "p50": 70.0,
+         "rows": 1, "pass_rate": 1.0},
+    ]
+
+
+def test_summary_filters(client, cohort):
+    body = client.get("/analytics/summary", params={"metric": "cgpa", "year": 3, "percentiles": "50"}).json()
+
+    assert [(group["department"], group["count"], group["mean"]) for group in body["groups"]] == [("ECE", 1, 7.0)]
+
+
+def test_histogram(client, cohort):
+    body = client.get("/analytics/histogram", params={"bins": 5, "by": "department"}).json()
+
+    assert body["edges"] == [0.0, 20.0, 40.0, 60.0, 80.0, 100.0]
+    assert body["groups"] == [
+        {"department": "CSE", "counts": [0, 0, 1, 1, 1]},
+        {"department": "ECE", "counts": [0, 0, 0, 1, 0]},
+    ]
+
+
+def test_pass_rates(client, cohort):
+    body = client.get("/analytics/pass-rates", params=[("by", "department"), ("by", "subject")]).json()
+
+    assert body == [
+        {"department": "CSE", "subject": "Maths", "rows": 3, "pass_rate": 0.6667},
+        {"department": "ECE", "subject": "Physics", "rows": 1, "pass_rate": 1.0},
+    ]
+
+
+def test_bad_parameters(client):
+    assert client.get("/analytics/summary", params={"percentiles": "150"}).status_code == 400
+    assert client.get("/analytics/summary", params=[("by", "year"), ("by", "year")]).status_code == 400
+    assert client.get("/analytics/histogram", params={"low": 5}).status_code == 400
+
+
+def test_a_write_invalidates_the_cohort(client, cohort):
+    client.get("/analytics/pass-rates")
+    loads = cohort_analytics.stats()["loads"]
+    client.get("/analytics/pass-rates")
+    assert cohort_analytics.stats()["loads"] == loads
+
+    client.patch("/semesters/1/marks", json={"items": [{"student_id": 3, "subject": "Maths", "mark": 85}]})
+
+    assert client.get("/analytics/pass-rates").json()[0]["pass_rate"] == 1.0
+    assert cohort_analytics.stats()["loads"] == loads + 1
+
+
+def test_cohort_is_loaded_from_the_primary():
+    # A lagging replica's arrays would be kept for ANALYTICS_MAX_AGE
+    assert cohort_analytics.session_factory is database.SessionLocal
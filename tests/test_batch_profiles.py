@@ -0,0 +1,33 @@
+def test_batch_returns_profiles_in_request_order(any_client, make_students):
+    ids = make_students(any_client, 3)
+
+    response = any_client.get("/student_full/batch", params={"ids": f"{ids[2]},{ids[0]}"})
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert [item["student"]["student_id"] for item in body["items"]] == [ids[2], ids[0]]
+    assert body["missing"] == []
+
+
+def test_batch_reports_missing_ids(any_client, make_students):
+    ids = make_students(any_client, 1)
+
+    response = any_client.get("/student_full/batch", params=[("ids", str(ids[0])), ("ids", "999999")])
+
+    assert response.status_code == 200, response.text
+    assert [item["student"]["student_id"] for item in response.json()["items"]] == ids
+    assert response.json()["missing"] == [999999]
+
+
+def test_batch_rejects_bad_ids(any_client):
+    assert any_client.get("/student_full/batch", params={"ids": "1,x"}).status_code == 422
+
+
+def test_point_lookup_still_routed_past_batch(any_client, make_students):
+    ids = make_students(any_client, 1)
+
+    response = any_client.get(f"/student_full/{ids[0]}")
+
+    assert response.status_code == 200, response.text
+    assert response.json()["student"]["student_id"] == ids[0]
+    assert any_client.get("/student_full/999999").status_code == 404
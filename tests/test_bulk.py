@@ -0,0 +1,102 @@
+from sqlalchemy.exc import IntegrityError
+
+import aggregates
+import bulk
+import database
+from conftest import student_payload
+from instrumentation import route_metrics
+
+ROUTE = "POST /students/bulk/"
+
+
+def _register_nums(client):
+    return sorted(row["register_num"] for row in client.get("/student_data/").json()["items"])
+
+
+def test_invalid_rows_are_reported_by_index(client):
+    missing_record = student_payload(2)
+    del missing_record["record"]
+    bad_dob = student_payload(3)
+    bad_dob["student"]["dob"] = "not a date"
+
+    response = client.post("/students/bulk/", json=[student_payload(1), missing_record, bad_dob, student_payload(4)])
+
+    assert response.status_code == 201, response.text
+    body = response.json()
+    assert len(body["inserted_student_ids"]) == 2
+    assert [error["index"] for error in body["errors"]] == [1, 2]
+    assert body["errors"][0]["detail"][0]["loc"] == ["record"]
+    assert _register_nums(client) == ["REG00001", "REG00004"]
+
+
+def test_duplicates_within_the_payload_keep_the_first(client):
+    same_register = student_payload(3)
+    same_register["student"]["register_num"] = "REG00001"
+    same_university = student_payload(4)
+    same_university["student"]["university_num"] = 710000002
+
+    payload = [student_payload(1), student_payload(2), same_register, same_university]
+    # Across chunk boundaries too
+    body = client.post("/students/bulk/", params={"chunk_size": 1}, json=payload).json()
+
+    assert len(body["inserted_student_ids"]) == 2
+    assert [(error["index"], error["detail"]) for error in body["errors"]] == [
+        (2, "Duplicate register_num or university_num in payload"),
+        (3, "Duplicate register_num or university_num in payload"),
+    ]
+
+
+def test_students_already_in_the_database_are_rejected(client, make_students):
+    make_students(client, 2)
+    same_university = student_payload(9)
+    same_university["student"]["university_num"] = 710000002
+
+    body = client.post("/students/bulk/", json=[student_payload(1), same_university, student_payload(3)]).json()
+
+    assert len(body["inserted_student_ids"]) == 1
+    assert [(error["index"], error["detail"]) for error in body["errors"]] == [
+        (0, "Student already exists"),
+        (1, "Student already exists"),
+    ]
+    assert _register_nums(client) == ["REG00001", "REG00002", "REG00003"]
+
+
+def test_failing_chunk_is_retried_row_by_row(client, monkeypatch):
+    insert_chunk = bulk._insert_chunk
+    attempts = []
+
+    def failing_on_student_2(db, entries):
+        attempts.append(len(entries))
+        student_ids = insert_chunk(db, entries)
+        if any(entry.student.register_num == "REG00002" for entry in entries):
+            raise IntegrityError("INSERT", {}, Exception("simulated"))
+        return student_ids
+
+    monkeypatch.setattr(bulk, "_insert_chunk", failing_on_student_2)
+
+    body = client.post("/students/bulk/", json=[student_payload(n) for n in range(1, 4)]).json()
+
+    assert attempts == [3, 1, 1, 1]
+    assert body["errors"] == [{"index": 1, "detail": "Database error: simulated"}]
+    # The failed chunk's and row's inserts were rolled back with their savepoints
+    assert _register_nums(client) == ["REG00001", "REG00003"]
+    assert client.get("/graph/all-charts").json()["horizontal_bar_chart"]["student_counts"] == [2]
+
+
+def test_summaries_are_written_once_per_table(client):
+    departments = ["CSE", "ECE", "MECH", "CIVIL"]
+    before = route_metrics.snapshot().get(ROUTE, {}).get("n_plus_one", 0)
+
+    # The first batch creates the summary rows, the second adds to them
+    for start in (1, 41):
+        payload = [student_payload(n, department=departments[n % 4], semester=1 + n % 8) for n in range(start, start + 40)]
+        assert client.post("/students/bulk/", json=payload).status_code == 201
+
+    assert route_metrics.snapshot()[ROUTE]["n_plus_one"] == before
+    db = database.SessionLocal()
+    try:
+        incremental = aggregates.chart_data(db), aggregates.counters(db)
+        aggregates.rebuild(db)
+        assert (aggregates.chart_data(db), aggregates.counters(db)) == incremental
+    finally:
+        db.close()
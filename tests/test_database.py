@@ -0,0 +1,57 @@
+import config
+import database
+from database import TimedQueuePool, make_engine, pool_status
+
+
+def test_engine_is_built_with_the_configured_pool():
+    status = pool_status(database.engine)
+
+    assert status["pool"] == "TimedQueuePool"
+    assert (status["size"], status["max_overflow"]) == (config.DB_POOL_SIZE, config.DB_MAX_OVERFLOW)
+    assert database.engine.pool._timeout == config.DB_POOL_TIMEOUT
+    assert database.engine.pool._recycle == config.DB_POOL_RECYCLE
+
+
+def test_in_memory_sqlite_keeps_its_own_pool():
+    options = database._engine_options("sqlite://", TimedQueuePool)
+
+    assert "poolclass" not in options
+    assert options["connect_args"] == {"check_same_thread": False}
+
+
+def test_reads_use_the_primary_without_a_replica(client):
+    assert database.read_engine is database.engine
+    assert database.ReadSessionLocal.kw["bind"] is database.engine
+    assert list(client.get("/metrics/pool").json()) == ["primary"]
+
+
+def test_pool_metrics_count_checkouts(client, make_students):
+    make_students(client, 1)
+    before = client.get("/metrics/pool").json()["primary"]
+
+    client.get("/students_full/")
+    after = client.get("/metrics/pool").json()["primary"]
+
+    assert after["checkouts"] > before["checkouts"]
+    assert after["checked_out"] == 0
+    assert set(after) >= {"saturation", "idle", "overflow", "timeouts", "slow_checkouts", "avg_wait_ms", "max_wait_ms"}
+
+
+def test_replica_is_reported_when_configured(client, monkeypatch, tmp_path):
+    replica = make_engine(f"sqlite:///{tmp_path}/replica.db")
+    monkeypatch.setattr(database, "read_engine", replica)
+    try:
+        pools = client.get("/metrics/pool").json()
+    finally:
+        replica.dispose()
+
+    assert list(pools) == ["primary", "replica"]
+    assert pools["replica"]["pool"] == "TimedQueuePool"
+
+
+def test_async_engine_is_reported_once_used(any_client, make_students):
+    make_students(any_client, 1)
+
+    pools = any_client.get("/metrics/pool").json()
+
+    assert ("async" in pools) == (any_client.db_mode == "async")
@@ -0,0 +1,42 @@
+import csv
+import io
+import json
+
+from export import CSV_HEADER
+
+
+def test_ndjson_export_streams_every_profile(client, make_students):
+    ids = make_students(client, 3)
+
+    response = client.get("/students_full/export")
+
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == 'attachment; filename="students.ndjson"'
+    profiles = [json.loads(line) for line in response.text.splitlines()]
+    assert [profile["student"]["student_id"] for profile in profiles] == ids
+    assert profiles[0]["record"]["nationality"] == "Indian"
+
+
+def test_csv_export_is_filtered(client, make_students):
+    make_students(client, 2, department="CSE")
+    make_students(client, 1, start=3, department="ECE")
+
+    response = client.get("/students_full/export", params={"format": "csv", "department": "ECE"})
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert list(rows[0]) == list(CSV_HEADER)
+    assert [row["student.register_num"] for row in rows] == ["REG00003"]
+
+
+def test_export_job_writes_a_downloadable_file(client, make_students, wait_for_job):
+    make_students(client, 2)
+
+    submitted = client.post("/jobs", json={"kind": "export", "params": {"format": "csv"}})
+    assert submitted.status_code == 202, submitted.text
+    job = wait_for_job(client, submitted.json()["job_id"])
+
+    assert job["status"] == "completed", job
+    assert job["result"]["rows"] == 2
+    download = client.get(f"/jobs/{job['job_id']}/result")
+    assert download.headers["content-type"].startswith("text/csv")
+    assert len(list(csv.DictReader(io.StringIO(download.text)))) == 2
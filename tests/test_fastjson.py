@@ -0,0 +1,37 @@
+import pytest
+
+from conftest import student_payload
+from schemas import FullStudentPage, StudentDataPage
+
+
+@pytest.fixture
+def students(client, make_students):
+    make_students(client, 1)
+    with_nulls = student_payload(2)
+    with_nulls["info"].update(address=None, mail_id=None)
+    assert client.post("/student_full/", json=with_nulls).status_code == 200
+    # Only the student_data row: no info, sem or record
+    response = client.post("/student_data/", json={**student_payload(3)["student"], "student_id": 3})
+    assert response.status_code == 200, response.text
+
+
+@pytest.mark.parametrize("path, schema", [("/students_full/", FullStudentPage), ("/student_data/", StudentDataPage)])
+def test_pages_match_their_response_schema(any_client, students, path, schema):
+    first = any_client.get(path, params={"limit": 2}).json()
+    last = any_client.get(path, params={"limit": 2, "cursor": first["next_cursor"]}).json()
+
+    for page in (first, last):
+        # Same keys, types and explicit nulls as FastAPI's response_model path
+        assert schema.model_validate(page).model_dump(mode="json") == page
+    assert isinstance(first["next_cursor"], str)
+    assert last["next_cursor"] is None
+
+
+def test_full_listing_items_match_the_single_profile(any_client, students):
+    items = any_client.get("/students_full/").json()["items"]
+
+    assert items[0]["student"]["dob"] == "2004-01-01"
+    assert (items[1]["info"]["address"], items[1]["info"]["mail_id"]) == (None, None)
+    assert (items[2]["info"], items[2]["sem_info"], items[2]["record"]) == (None, None, None)
+    for item in items:
+        assert any_client.get(f"/student_full/{item['student']['student_id']}").json() == item
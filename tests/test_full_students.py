@@ -0,0 +1,36 @@
+from conftest import student_payload
+
+
+def test_create_read_update_delete(any_client):
+    created = any_client.post("/student_full/", json=student_payload(1)).json()
+    student_id = created["student_id"]
+    assert created["message"] == "All records created successfully"
+
+    profile = any_client.get(f"/student_full/{student_id}").json()
+    assert profile["student"]["register_num"] == "REG00001"
+    assert profile["info"]["student_info_id"] == created["student_info_id"]
+    assert profile["sem_info"]["subject"] == "Maths"
+
+    changed = student_payload(1, department="ECE", subject="Physics")
+    response = any_client.put(f"/students/{student_id}", json=changed)
+    assert response.status_code == 200, response.text
+    assert response.json()["student"]["department"] == "ECE"
+    assert any_client.get(f"/student_full/{student_id}").json()["sem_info"]["subject"] == "Physics"
+
+    assert any_client.delete(f"/students/{student_id}").status_code == 200
+    assert any_client.get(f"/student_full/{student_id}").status_code == 404
+    # The info, sem and record rows went with it
+    assert any_client.get(f"/student_info/{created['student_info_id']}").status_code == 404
+
+
+def test_create_returns_the_existing_student_for_a_duplicate(any_client):
+    first = any_client.post("/student_full/", json=student_payload(1)).json()
+    again = any_client.post("/student_full/", json=student_payload(1)).json()
+
+    assert again["student_id"] == first["student_id"]
+    assert again["message"] == "Student already exists, using existing student_id"
+
+
+def test_missing_students_are_404s(any_client):
+    assert any_client.put("/students/999999", json=student_payload(1)).status_code == 404
+    assert any_client.delete("/students/999999").status_code == 404
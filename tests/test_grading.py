@@ -0,0 +1,100 @@
+import pytest
+from sqlalchemy import update
+
+import changes
+import database
+from cache import profile_cache
+from grading import GradingRules
+from models import StudentSemInfo
+from qa import answer_cache
+from ranking import ranking_index
+from search import search_index
+
+
+def _add_sem_row(client, student_id, semester, subject, mark):
+    info_id = client.get(f"/student_full/{student_id}").json()["info"]["student_info_id"]
+    response = client.post("/student_sem_info/", json={
+        "student_id": student_id, "student_info_id": info_id, "semester": semester, "subject": subject,
+        "mark": mark, "cgpa": 0, "pass_fail": "", "grade": "",
+    })
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_rules_need_a_scale_starting_at_zero():
+    with pytest.raises(ValueError):
+        GradingRules(scale=[(50, "C", 5)])
+
+
+def test_grade_and_pass_fail_come_from_the_mark(client, make_students):
+    [student_id] = make_students(client, 1, mark=95)
+
+    sem_info = client.get(f"/student_full/{student_id}").json()["sem_info"]
+    failed = _add_sem_row(client, student_id, 1, "Physics", 40)
+
+    assert (sem_info["grade"], sem_info["pass_fail"], sem_info["cgpa"]) == ("O", "Pass", 10.0)
+    assert (failed["grade"], failed["pass_fail"]) == ("U", "Fail")
+
+
+def test_cgpa_is_the_running_mean_over_semesters(client, make_students):
+    [student_id] = make_students(client, 1, mark=95)
+    _add_sem_row(client, student_id, 1, "Physics", 55)
+    _add_sem_row(client, student_id, 2, "Maths", 75)
+
+    gpa = client.get(f"/students/{student_id}/gpa").json()
+
+    assert gpa["semesters"] == [
+        {"semester": 1, "subjects": 2, "sgpa": 7.5, "cgpa": 7.5},
+        {"semester": 2, "subjects": 1, "sgpa": 8.0, "cgpa": 7.67},
+    ]
+    assert gpa["cgpa"] == 7.67
+
+
+def test_mark_sheet_rederives_grades_and_dashboards(client, make_students):
+    [student_id] = make_students(client, 1, mark=95)
+    _add_sem_row(client, student_id, 1, "Physics", 55)
+    _add_sem_row(client, student_id, 2, "Maths", 75)
+
+    response = client.patch("/semesters/1/marks", json={"items": [{"student_id": student_id, "subject": "Physics", "mark": 40}]})
+    assert response.status_code == 200, response.text
+
+    rows = {(row["semester"], row["subject"]): row for row in client.get("/student_sem_info/").json()}
+    assert (rows[1, "Physics"]["grade"], rows[1, "Physics"]["pass_fail"]) == ("U", "Fail")
+    assert [rows[key]["cgpa"] for key in [(1, "Maths"), (1, "Physics"), (2, "Maths")]] == [5.0, 5.0, 6.0]
+    charts = client.get("/graph/all-charts").json()
+    assert charts["pie_chart"] == {"passed": 2, "failed": 1}
+    assert charts["line_chart"]["average_cgpa"] == [5.0, 6.0]
+
+
+def test_client_sent_grades_are_overridden(client, make_students):
+    [student_id] = make_students(client, 1, mark=30)
+
+    response = client.patch(f"/students/{student_id}", json={"sem_info": {"grade": "O", "pass_fail": "Pass", "cgpa": 9.9}})
+
+    assert response.status_code == 200, response.text
+    sem_info = client.get(f"/student_full/{student_id}").json()["sem_info"]
+    assert (sem_info["grade"], sem_info["pass_fail"], sem_info["cgpa"]) == ("U", "Fail", 0.0)
+
+
+def test_full_recompute_resets_caches_and_indexes(client, make_students, wait_for_job, monkeypatch):
+    ids = make_students(client, 3, mark=95)
+    # Written behind the API's back, so the recompute has rows to fix
+    with database.engine.begin() as connection:
+        connection.execute(update(StudentSemInfo).values(grade="X", pass_fail="Fail"))
+    client.get(f"/student_full/{ids[0]}")
+    client.post("/ask", json={"question": "how many students"})
+    client.get("/students/search", params={"q": "student 1"})
+    client.get("/rankings/CSE/1")
+    per_id = []
+    monkeypatch.setattr(changes, "_listeners", [per_id.append])
+
+    job = wait_for_job(client, client.post("/grades/recompute", json={}).json()["job_id"])
+
+    assert job["result"]["updated"] == 3
+    assert per_id == []
+    assert (profile_cache.stats()["size"], answer_cache.stats()["size"]) == (0, 0)
+    for index in (search_index, ranking_index):
+        assert (index.stats()["pending_rebuild"], index.stats()["pending_refresh"]) == (True, 0)
+    assert client.get(f"/student_full/{ids[0]}").json()["sem_info"]["grade"] == "O"
+    assert client.get("/rankings/CSE/1").json()["students"] == 3
+    assert ranking_index.stats()["pending_rebuild"] is False
@@ -0,0 +1,50 @@
+import json
+
+from conftest import student_payload
+
+
+def _import(client, wait_for_job, content, filename):
+    response = client.post("/students/import", files={"file": (filename, content)}, params={"chunk_size": 2})
+    assert response.status_code == 202, response.text
+    job = wait_for_job(client, response.json()["job_id"])
+    assert job["status"] == "completed", job
+    return job["result"]
+
+
+def test_ndjson_import_reports_bad_lines_by_line_number(client, wait_for_job):
+    lines = [
+        json.dumps(student_payload(1)),
+        "{not json",
+        "",
+        json.dumps(student_payload(2)),
+        json.dumps({**student_payload(3), "student": {"student_name": "No register number"}}),
+        json.dumps(student_payload(4)),
+    ]
+
+    result = _import(client, wait_for_job, "\n".join(lines) + "\n", "students.ndjson")
+
+    assert (result["processed"], result["inserted"], result["rejected"]) == (5, 3, 2)
+    assert [error["index"] for error in result["errors"]] == [2, 5]
+    assert client.get("/graph/all-charts").json()["pie_chart"]["passed"] == 3
+    assert [item["student_name"] for item in client.get("/students/search", params={"q": "student"}).json()["items"]] == [
+        "Student 1", "Student 2", "Student 4",
+    ]
+
+
+def test_csv_export_imports_back(client, make_students, wait_for_job):
+    make_students(client, 3)
+    exported = client.get("/students_full/export", params={"format": "csv"}).text
+    for student_id in (1, 2, 3):
+        client.delete(f"/students/{student_id}")
+
+    result = _import(client, wait_for_job, exported, "students.csv")
+
+    assert (result["inserted"], result["rejected"]) == (3, 0)
+    names = [item["student"]["student_name"] for item in client.get("/students_full/").json()["items"]]
+    assert names == ["Student 1", "Student 2", "Student 3"]
+
+
+def test_import_is_not_submittable_as_a_job(client):
+    response = client.post("/jobs", json={"kind": "import", "params": {"path": "/etc/passwd", "format": "csv"}})
+
+    assert response.status_code == 400
@@ -0,0 +1,70 @@
+import logging
+import re
+
+import instrumentation
+from instrumentation import RequestStats
+
+PROFILE = "GET /student_full/{student_id}"
+
+
+def _timing(response):
+    entries = dict(re.findall(r"(\w+);dur=([\d.]+)", response.headers["server-timing"]))
+    statements = int(re.search(r'desc="(\d+) statements"', response.headers["server-timing"]).group(1))
+    return entries, statements
+
+
+def _route(client, route):
+    return client.get("/metrics/requests").json().get(route, {"requests": 0, "over_budget": 0, "n_plus_one": 0})
+
+
+def test_server_timing_splits_the_request_and_counts_statements(any_client, make_students):
+    [student_id] = make_students(any_client, 1)
+
+    entries, statements = _timing(any_client.get(f"/student_full/{student_id}"))
+    _, cached_statements = _timing(any_client.get(f"/student_full/{student_id}"))
+
+    assert set(entries) == {"db", "app", "serialize", "queue", "total"}
+    assert statements > 0
+    # The second lookup is a profile cache hit
+    assert cached_statements == 0
+
+
+def test_request_metrics_are_kept_per_route(client, make_students):
+    [student_id] = make_students(client, 1)
+    before = _route(client, PROFILE)
+
+    _, statements = _timing(client.get(f"/student_full/{student_id}"))
+    client.get(f"/student_full/{student_id}")
+    after = _route(client, PROFILE)
+
+    assert after["requests"] == before["requests"] + 2
+    assert after["max_statements"] >= statements
+    assert set(after) >= {"avg_statements", "avg_db_ms", "avg_total_ms"}
+
+
+def test_over_budget_and_repeated_statements_are_flagged(client, make_students, monkeypatch, caplog):
+    ids = make_students(client, 3)
+    monkeypatch.setattr(instrumentation, "STATEMENT_BUDGET", 0)
+    monkeypatch.setattr(instrumentation, "N_PLUS_ONE_THRESHOLD", 1)
+    before = _route(client, PROFILE)
+
+    with caplog.at_level(logging.WARNING, logger="instrumentation"):
+        client.get(f"/student_full/{ids[0]}")
+    after = _route(client, PROFILE)
+
+    assert after["over_budget"] == before["over_budget"] + 1
+    assert after["n_plus_one"] == before["n_plus_one"] + 1
+    messages = [record.getMessage() for record in caplog.records]
+    assert any("budget 0" in message for message in messages)
+    assert any("possible N+1" in message for message in messages)
+
+
+def test_repeated_statements_need_the_threshold(monkeypatch):
+    monkeypatch.setattr(instrumentation, "N_PLUS_ONE_THRESHOLD", 3)
+    stats = RequestStats()
+    for _ in range(3):
+        stats.add_statement("SELECT 1", 0.001)
+    stats.add_statement("SELECT 2", 0.001)
+
+    assert stats.repeated_statements() == [("SELECT 1", 3)]
+    assert stats.statements == 4
@@ -0,0 +1,44 @@
+import database
+from models import DepartmentSemesterStats, DepartmentStats
+
+
+def test_rebuild_job_restores_the_summaries(client, make_students, wait_for_job):
+    make_students(client, 3, mark=80)
+    before = client.get("/graph/all-charts").json()
+    with database.engine.begin() as connection:
+        connection.execute(DepartmentStats.__table__.delete())
+        connection.execute(DepartmentSemesterStats.__table__.update().values(passed=0, failed=0))
+
+    submitted = client.post("/jobs", json={"kind": "rebuild_aggregates"})
+    assert submitted.status_code == 202, submitted.text
+    job = wait_for_job(client, submitted.json()["job_id"])
+
+    assert job["status"] == "completed", job
+    assert job["result"] == {"departments": 1, "department_semesters": 1}
+    assert client.get("/graph/all-charts").json() == before
+
+
+def test_job_records_are_listed_and_kept(client, make_students, wait_for_job):
+    make_students(client, 1)
+    job_id = client.post("/jobs", json={"kind": "export"}).json()["job_id"]
+    wait_for_job(client, job_id)
+
+    listed = client.get("/jobs", params={"kind": "export"}).json()["items"]
+
+    assert [job["job_id"] for job in listed] == [job_id]
+    assert listed[0]["params"] == {"format": "ndjson", "department": None, "year": None}
+
+
+def test_bad_submissions(client):
+    assert client.post("/jobs", json={"kind": "nope"}).status_code == 400
+    assert client.post("/jobs", json={"kind": "export", "params": {"format": "xml"}}).status_code == 422
+    assert client.post("/jobs", json={"kind": "rebuild_aggregates", "params": {"x": 1}}).status_code == 422
+
+
+def test_unknown_and_finished_jobs(client, wait_for_job):
+    job_id = client.post("/jobs", json={"kind": "export"}).json()["job_id"]
+    wait_for_job(client, job_id)
+
+    assert client.get("/jobs/0123456789abcdef").status_code == 404
+    assert client.post(f"/jobs/{job_id}/cancel").status_code == 409
+    assert client.get("/jobs/0123456789abcdef/result").status_code == 404
@@ -0,0 +1,157 @@
+import asyncio
+import json
+
+import config
+import database
+import live_routes
+from live import LiveHub, Subscriber
+
+CSE_ONE = {"departments": {"CSE": {"students": 1, "passed": 1, "failed": 0}}}
+CSE_TWO = {"departments": {"CSE": {"students": 2, "passed": 2, "failed": 0}}}
+
+
+def _data(event):
+    name, data = (line.split(":", 1)[1].strip() for line in event.strip().split("\n"))
+    return name, json.loads(data)
+
+
+def test_slow_subscriber_gets_the_batches_merged():
+    subscriber = Subscriber()
+
+    assert subscriber.offer({1: "CSE"}, {}, set(), {"departments": {"CSE": {"passed": 1}}}) is False
+    assert subscriber.offer({2: "CSE"}, {1: "CSE", 4: "ECE"}, set(), {"departments": {"CSE": {"passed": 2}}}) is True
+    assert subscriber.offer({3: "CSE"}, {}, {3, 5}, {}) is True
+
+    # Created then updated is still just created; created then deleted is just deleted
+    assert subscriber.take() == {
+        "created": [1, 2], "updated": [4], "deleted": [3, 5],
+        "charts": {"departments": {"CSE": {"passed": 2}}},
+    }
+    assert not subscriber.wakeup.is_set()
+    assert subscriber.take() == {}
+
+
+def test_subscriber_too_far_behind_is_told_to_resync(monkeypatch):
+    monkeypatch.setattr(config, "LIVE_MAX_PENDING_IDS", 3)
+    subscriber = Subscriber()
+
+    subscriber.offer({1: "CSE", 2: "CSE"}, {}, set(), {})
+    subscriber.offer({}, {3: "CSE", 4: "CSE"}, set(), {})
+    subscriber.offer({5: "CSE"}, {}, set(), {})
+
+    assert subscriber.take() == {"resync": True}
+    subscriber.offer({6: "CSE"}, {}, set(), {})
+    assert subscriber.take() == {"created": [6]}
+
+
+def test_department_filter():
+    subscriber = Subscriber(departments=["CSE"])
+    counters = {"departments": {"CSE": {"passed": 1}, "ECE": {"passed": 2}}, "semesters": {"1": {"average_cgpa": 8.0}}}
+
+    subscriber.offer({1: "CSE", 2: "ECE"}, {3: "ECE"}, {4}, counters)
+
+    # Deleted rows have no department left to filter on
+    assert subscriber.take() == {
+        "created": [1], "deleted": [4],
+        "charts": {"departments": {"CSE": {"passed": 1}}, "semesters": {"1": {"average_cgpa": 8.0}}},
+    }
+    assert subscriber.offer({}, {3: "ECE"}, set(), {"departments": {"ECE": {"passed": 3}}}) is False
+    assert not subscriber.wakeup.is_set()
+
+
+def test_student_filter():
+    subscriber = Subscriber(student_ids=[2, 4], charts=False)
+
+    subscriber.offer({1: "CSE", 2: "CSE"}, {3: "CSE"}, {4, 5}, CSE_ONE)
+
+    assert subscriber.take() == {"created": [2], "deleted": [4]}
+
+
+def test_charts_only_channel():
+    subscriber = Subscriber(students=False)
+
+    assert subscriber.offer({1: "CSE"}, {}, set(), {}) is False
+    assert not subscriber.wakeup.is_set()
+    subscriber.offer({2: "CSE"}, {}, set(), CSE_ONE)
+    assert subscriber.take() == {"charts": CSE_ONE}
+
+
+def test_hub_sends_only_the_counters_that_moved():
+    hub = LiveHub(database.SessionLocal)
+    subscriber = Subscriber()
+    hub._subscribers.add(subscriber)
+    hub.counters = CSE_ONE
+
+    hub._fan_out({2}, {2}, {2: "CSE"}, CSE_TWO)
+    hub._fan_out({1, 3}, set(), {1: "CSE"}, CSE_TWO)
+
+    assert subscriber.take() == {
+        "created": [2], "updated": [1], "deleted": [3],
+        "charts": {"departments": {"CSE": {"students": 2, "passed": 2}}},
+    }
+    assert (hub.seq, hub.batches, hub.coalesced) == (2, 2, 1)
+
+
+def test_committed_writes_reach_a_subscriber(client, make_students, monkeypatch):
+    monkeypatch.setattr(config, "LIVE_FLUSH_MS", 1)
+    [first] = make_students(client, 1, department="CSE", mark=90)
+    [second] = make_students(client, 1, start=2, department="CSE", mark=90)
+
+    async def scenario():
+        hub = LiveHub(database.SessionLocal)
+        stream = hub.events(Subscriber(departments=["CSE"]))
+        snapshot = await stream.__anext__()
+        hub.students_written({first, second, 99}, {second})
+        delta = await asyncio.wait_for(stream.__anext__(), 5)
+        await stream.aclose()
+        return snapshot, delta, hub.stats()["subscribers"]
+
+    snapshot, delta, subscribers = asyncio.run(scenario())
+
+    assert _data(snapshot) == ("snapshot", {"seq": 0, "charts": {
+        "departments": {"CSE": {"students": 2, "passed": 2, "failed": 0}},
+        "semesters": {"1": {"average_cgpa": 9.0}},
+    }})
+    assert _data(delta) == ("delta", {"seq": 1, "created": [second], "updated": [first], "deleted": [99]})
+    assert subscribers == 0
+
+
+def test_subscribers_past_the_limit_get_a_503(client, monkeypatch):
+    monkeypatch.setattr(config, "LIVE_MAX_SUBSCRIBERS", 0)
+
+    response = client.get("/live")
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == str(live_routes.RETRY_AFTER_SECONDS)
+
+
+def test_bad_student_ids_filter_is_a_422(client):
+    assert client.get("/live", params={"student_ids": "1,x"}).status_code == 422
+
+
+def test_whole_table_change_resyncs_every_subscriber_once(client, make_students, monkeypatch):
+    monkeypatch.setattr(config, "LIVE_FLUSH_MS", 1)
+    [student_id] = make_students(client, 1, department="CSE", mark=90)
+
+    async def scenario():
+        hub = LiveHub(database.SessionLocal)
+        streams = [hub.events(Subscriber()), hub.events(Subscriber(charts=False))]
+        for stream in streams:
+            await stream.__anext__()
+        hub.students_written({student_id}, set())
+        hub.all_students_changed()
+        deltas = [await asyncio.wait_for(stream.__anext__(), 5) for stream in streams]
+        for stream in streams:
+            await stream.aclose()
+        return deltas, hub.stats()
+
+    deltas, stats = asyncio.run(scenario())
+
+    assert [_data(delta) for delta in deltas] == [
+        ("delta", {"seq": 1, "resync": True, "charts": {
+            "departments": {"CSE": {"students": 1, "passed": 1, "failed": 0}},
+            "semesters": {"1": {"average_cgpa": 9.0}},
+        }}),
+        ("delta", {"seq": 1, "resync": True}),
+    ]
+    assert (stats["batches"], stats["resyncs"]) == (1, 2)
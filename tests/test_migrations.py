@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect
+
+import database
+from conftest import ROOT
+
+
+def _scripts():
+    return ScriptDirectory(os.path.join(ROOT, "migrations"))
+
+
+def _current_revision():
+    with database.engine.connect() as connection:
+        return MigrationContext.configure(connection).get_current_revision()
+
+
+def test_schema_is_at_head():
+    assert _current_revision() == _scripts().get_current_head()
+
+
+def test_migrating_again_is_a_no_op():
+    database.migrate()
+
+    assert _current_revision() == _scripts().get_current_head()
+
+
+def test_hot_path_indexes_exist():
+    inspector = inspect(database.engine)
+
+    for name, table, columns in _scripts().get_revision("0003").module.INDEXES:
+        indexes = {index["name"]: index["column_names"] for index in inspector.get_indexes(table)}
+        assert indexes.get(name) == columns, name
+
+
+def test_explain_check_finds_no_full_table_scans():
+    result = subprocess.run(
+        [sys.executable, "explain_check.py", "--students", "40"],
+        cwd=ROOT, capture_output=True, text=True, timeout=300,
+    )
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "OK: no full table scans" in result.stdout
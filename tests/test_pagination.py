@@ -0,0 +1,67 @@
+import pytest
+
+from pagination import decode_cursor, encode_cursor
+
+
+def _walk(client, path, **params):
+    """Every page of ``path``; the ids in the order served and the page sizes."""
+    ids, sizes, cursor = [], [], None
+    while True:
+        response = client.get(path, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        page = response.json()
+        items = page["items"]
+        ids += [item["student"]["student_id"] if "student" in item else item["student_id"] for item in items]
+        sizes.append(len(items))
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids, sizes
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(42, "desc"), "desc") == 42
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", encode_cursor(5, "desc")])
+def test_bad_or_mismatched_cursor_is_a_400(client, cursor):
+    assert client.get("/students_full/", params={"cursor": cursor, "order": "asc"}).status_code == 400
+
+
+@pytest.mark.parametrize("path", ["/students_full/", "/student_data/"])
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_pages_cover_every_student_once(any_client, make_students, path, order):
+    ids = make_students(any_client, 7)
+
+    served, sizes = _walk(any_client, path, limit=3, order=order)
+
+    assert served == sorted(ids, reverse=order == "desc")
+    assert sizes == [3, 3, 1]
+
+
+def test_exact_multiple_has_no_empty_last_page(any_client, make_students):
+    make_students(any_client, 4)
+
+    _, sizes = _walk(any_client, "/students_full/", limit=2)
+
+    assert sizes == [2, 2]
+
+
+def test_filters_apply_across_pages(any_client, make_students):
+    cse = make_students(any_client, 3, department="CSE", year=1)
+    make_students(any_client, 2, start=4, department="ECE", year=1)
+    cse += make_students(any_client, 2, start=6, department="CSE", year=3, semester=2)
+
+    assert _walk(any_client, "/students_full/", limit=2, department="CSE")[0] == cse
+    assert _walk(any_client, "/students_full/", limit=2, department="CSE", year=3)[0] == cse[3:]
+    assert _walk(any_client, "/student_data/", limit=2, semester=2)[0] == cse[3:]
+
+
+def test_writes_around_the_cursor_do_not_shift_the_next_page(client, make_students):
+    make_students(client, 4)
+    first = client.get("/students_full/", params={"limit": 2}).json()
+    client.delete("/students/1")
+    make_students(client, 1, start=5)
+
+    second = client.get("/students_full/", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+
+    assert [item["student"]["student_id"] for item in second["items"]] == [3, 4]
@@ -0,0 +1,62 @@
+import pytest
+
+
+@pytest.mark.parametrize("table, section, id_field", [
+    ("student_info", "info", "student_info_id"),
+    ("student_sem_info", "sem_info", "sem_info_id"),
+    ("student_record", "record", "student_record_id"),
+])
+def test_row_patch_violating_a_constraint_is_a_400(client, make_students, table, section, id_field):
+    [student_id] = make_students(client, 1)
+    row_id = client.get(f"/student_full/{student_id}").json()[section][id_field]
+
+    response = client.patch(f"/{table}/{row_id}", json={"student_id": 999999})
+
+    assert response.status_code == 400, response.text
+    # Rolled back: the row still belongs to its student
+    assert client.get(f"/{table}/{row_id}").json()["student_id"] == student_id
+
+
+def test_row_patch_writes_only_sent_columns(client, make_students):
+    [student_id] = make_students(client, 1)
+    info_id = client.get(f"/student_full/{student_id}").json()["info"]["student_info_id"]
+
+    response = client.patch(f"/student_info/{info_id}", json={"address": "Madurai"})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["updated"] == ["address"]
+    info = client.get(f"/student_info/{info_id}").json()
+    assert info["address"] == "Madurai"
+    assert info["blood_grp"] == "O+"
+
+
+def test_row_patch_of_missing_row_is_a_404(client):
+    assert client.patch("/student_record/999999", json={"religion": "None"}).status_code == 404
+
+
+def test_marks_update_many_students_in_one_request(client, make_students):
+    ids = make_students(client, 3, mark=60)
+
+    response = client.patch("/semesters/1/marks", json={"items": [
+        {"student_id": ids[0], "subject": "Maths", "mark": 95},
+        {"student_id": ids[1], "subject": "Maths", "mark": 30},
+        {"student_id": ids[2], "subject": "Art", "mark": 70},
+        {"student_id": ids[0], "subject": "Maths", "mark": 10},
+    ]})
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert (body["updated_rows"], body["students"]) == (2, 2)
+    assert [error["index"] for error in body["errors"]] == [2, 3]
+    marks = {row["student_id"]: row["mark"] for row in client.get("/student_sem_info/").json()}
+    assert marks == {ids[0]: 95, ids[1]: 30, ids[2]: 60}
+    assert client.get("/graph/all-charts").json()["pie_chart"] == {"passed": 2, "failed": 1}
+
+
+def test_marks_update_only_the_semester_given(client, make_students):
+    [student_id] = make_students(client, 1, mark=60, semester=2)
+
+    body = client.patch("/semesters/1/marks", json={"items": [{"student_id": student_id, "subject": "Maths", "mark": 99}]}).json()
+
+    assert body["updated_rows"] == 0
+    assert client.get(f"/student_full/{student_id}").json()["sem_info"]["mark"] == 60
@@ -0,0 +1,57 @@
+import database
+from cache import profile_cache
+from repository import profile_loader
+
+
+def test_etag_and_304(any_client, make_students):
+    [student_id] = make_students(any_client, 1)
+
+    first = any_client.get(f"/student_full/{student_id}")
+    etag = first.headers["etag"]
+    again = any_client.get(f"/student_full/{student_id}", headers={"If-None-Match": etag})
+    weak = any_client.get(f"/student_full/{student_id}", headers={"If-None-Match": f'"other", W/{etag}'})
+    stale = any_client.get(f"/student_full/{student_id}", headers={"If-None-Match": '"other"'})
+
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "no-cache"
+    assert (again.status_code, again.content, again.headers["etag"]) == (304, b"", etag)
+    assert weak.status_code == 304
+    assert stale.status_code == 200
+    assert stale.json() == first.json()
+
+
+def test_repeat_lookups_are_served_from_the_cache(any_client, make_students):
+    [student_id] = make_students(any_client, 1)
+
+    any_client.get(f"/student_full/{student_id}")
+    hits = profile_cache.stats()["hits"]
+    any_client.get(f"/student_full/{student_id}")
+
+    assert profile_cache.stats()["hits"] == hits + 1
+
+
+def test_writes_invalidate_the_cached_profile(any_client, make_students):
+    [student_id] = make_students(any_client, 1)
+    etag = any_client.get(f"/student_full/{student_id}").headers["etag"]
+
+    response = any_client.patch(f"/students/{student_id}", json={"student": {"student_name": "Renamed"}})
+    assert response.status_code == 200, response.text
+
+    after = any_client.get(f"/student_full/{student_id}", headers={"If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.json()["student"]["student_name"] == "Renamed"
+    assert after.headers["etag"] != etag
+
+
+def test_deleted_student_is_not_served_from_the_cache(any_client, make_students):
+    [student_id] = make_students(any_client, 1)
+    any_client.get(f"/student_full/{student_id}")
+
+    assert any_client.delete(f"/students/{student_id}").status_code == 200
+
+    assert any_client.get(f"/student_full/{student_id}").status_code == 404
+
+
+def test_cache_is_filled_from_the_primary():
+    # A lagging replica's copy would be cached for PROFILE_CACHE_TTL
+    assert profile_loader.session_factory is database.SessionLocal
@@ -0,0 +1,49 @@
+import pytest
+from pydantic import ValidationError
+
+import config
+import purge
+from schemas import PurgeJobParams
+
+
+def test_dry_run_counts_matches(client, make_students):
+    make_students(client, 2, department="CSE", year=1)
+    make_students(client, 2, start=3, department="CSE", year=2)
+
+    response = client.post("/students/purge", params={"department": "CSE", "year": 2, "dry_run": True})
+
+    assert response.status_code == 200
+    assert response.json()["matched"] == 2
+    assert len(client.get("/students_full/").json()["items"]) == 4
+
+
+def test_purge_needs_a_filter(client):
+    assert client.post("/students/purge").status_code == 400
+
+
+def test_purge_deletes_matches_in_chunks(client, make_students, wait_for_job):
+    make_students(client, 5, department="CSE")
+    make_students(client, 2, start=6, department="ECE")
+    info_id = client.get("/student_full/1").json()["info"]["student_info_id"]
+
+    response = client.post("/students/purge", params={"department": "CSE", "chunk_size": 2})
+    assert response.status_code == 202, response.text
+    job = wait_for_job(client, response.json()["job_id"])
+
+    assert job["status"] == "completed", job
+    assert job["result"] == {"deleted": 5, "chunks": 3}
+    assert [item["student"]["department"] for item in client.get("/students_full/").json()["items"]] == ["ECE", "ECE"]
+    # Cascaded to the student's other rows
+    assert client.get(f"/student_info/{info_id}").status_code == 404
+    assert client.get("/graph/all-charts").json()["horizontal_bar_chart"] == {"departments": ["ECE"], "student_counts": [2]}
+    assert client.get("/students/search", params={"q": "student 1"}).json()["items"] == []
+
+
+def test_job_and_route_share_the_chunk_size_limits(client):
+    too_big = {"department": "CSE", "chunk_size": config.PURGE_MAX_CHUNK_SIZE + 1}
+
+    assert PurgeJobParams(department="CSE").chunk_size == purge.DEFAULT_CHUNK_SIZE == config.PURGE_CHUNK_SIZE
+    with pytest.raises(ValidationError):
+        PurgeJobParams(**too_big)
+    assert client.post("/jobs", json={"kind": "purge", "params": too_big}).status_code == 422
+    assert client.post("/students/purge", params=too_big).status_code == 422
@@ -0,0 +1,153 @@
+import json
+
+import pytest
+
+import config
+import qa
+from qa import Intent, normalize
+
+
+def _events(text):
+    """(event, data) pairs of a server-sent event stream."""
+    events = []
+    for block in text.strip().split("\n\n"):
+        name, data = (line.split(": ", 1)[1] for line in block.split("\n"))
+        events.append((name, json.loads(data)))
+    return events
+
+
+def _ask(client, question):
+    response = client.post("/ask", json={"question": question})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+@pytest.fixture
+def school(client, make_students):
+    make_students(client, 2, department="CSE", mark=90)
+    make_students(client, 1, start=3, department="CSE", mark=60)
+    make_students(client, 2, start=4, department="ECE", mark=40, semester=2)
+
+
+class BrokenBackend:
+    name = "broken"
+
+    def stream(self, question, facts):
+        yield "Half "
+        raise RuntimeError("model went away")
+
+
+@pytest.fixture
+def broken_backend(monkeypatch):
+    monkeypatch.setitem(qa.BACKENDS, "broken", BrokenBackend)
+    monkeypatch.setattr(qa, "_backends", {})
+    monkeypatch.setattr(config, "QA_BACKEND", "broken")
+
+
+def test_intent_picks_out_department_semester_and_top():
+    intent = Intent(normalize("Who are the top 3 in cse third semester?").split(), ["CSE", "ECE"])
+
+    assert (intent.departments, intent.semester, intent.top) == (["CSE"], 3, 3)
+    assert intent.name == ""
+
+
+def test_intent_keeps_numbers_that_are_not_the_semester():
+    intent = Intent(normalize("marks of 710000004 in sem 2").split(), ["CSE"])
+
+    assert (intent.semester, intent.student_number) == (2, "710000004")
+
+
+def test_top_of_a_department_and_semester(school, client):
+    body = _ask(client, "Who are the top 2 in CSE semester 1?")
+
+    assert body["answer"] == "Top 2 of 3 in CSE semester 1 by CGPA: 1. Student 1 (9.0); 1. Student 2 (9.0)."
+    assert (body["backend"], body["sources"], body["cached"]) == ("stub", ["rankings"], False)
+
+
+@pytest.mark.parametrize("question, answer", [
+    ("What is the pass rate in ECE?", "In ECE: 0 pass and 2 fail results (pass rate 0.0%)."),
+    ("average cgpa in CSE sem 1", "The average CGPA in CSE, semester 1 is 8.00 over 3 results."),
+    ("how many students in ECE", "ECE has 2 students."),
+])
+def test_department_questions_are_answered_from_the_summaries(school, client, question, answer):
+    body = _ask(client, question)
+
+    assert body["answer"] == answer
+    assert body["sources"] == ["aggregates"]
+
+
+@pytest.mark.parametrize("question", ["What is the rank of Student 3?", "details of REG00003", "cgpa of 710000003"])
+def test_student_by_name_register_or_university_number(school, client, question):
+    body = _ask(client, question)
+
+    assert body["answer"] == (
+        "Student 3 (student 3) is in CSE. Their CGPA is 6.0 (semester 1: SGPA 6.0). They rank 3 of 3 in CSE semester 1."
+    )
+    assert body["sources"] == ["grades", "rankings", "search"]
+
+
+def test_unrelated_question_gets_the_head_count_and_help(school, client):
+    body = _ask(client, "hello")
+
+    assert body["answer"] == f"There are 5 students (CSE 3, ECE 2). {qa.HELP}"
+    assert body["sources"] == ["aggregates", "help"]
+
+
+def test_answers_are_cached_until_the_next_write(school, client):
+    first = _ask(client, "How many students in ECE?")
+    # Normalized: case, punctuation and synonyms do not matter
+    again = _ask(client, "how many STUDENT in ece")
+
+    assert (first["cached"], again["cached"]) == (False, True)
+    assert again["answer"] == first["answer"]
+
+    assert client.delete("/students/5").status_code == 200
+    after = _ask(client, "How many students in ECE?")
+
+    assert after["cached"] is False
+    assert after["answer"] == "ECE has 1 students."
+
+
+def test_stream_sends_meta_then_tokens_then_done(school, client):
+    response = client.get("/ask/stream", params={"q": "pass rate in CSE"})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _events(response.text)
+    names = [name for name, _ in events]
+    assert names[0] == "meta" and names[-1] == "done"
+    assert set(names[1:-1]) == {"token"}
+    assert events[0][1] == {"cached": False, "backend": "stub", "sources": ["aggregates"]}
+    assert "".join(data["text"] for name, data in events if name == "token") == (
+        "In CSE: 3 pass and 0 fail results (pass rate 100.0%)."
+    )
+
+    # A finished stream is cached whole
+    cached = _events(client.get("/ask/stream", params={"q": "pass rate in CSE"}).text)
+    assert cached[0][1]["cached"] is True
+    assert [name for name, _ in cached] == ["meta", "token", "done"]
+
+
+def test_unknown_backend_is_a_503(client, monkeypatch):
+    monkeypatch.setattr(config, "QA_BACKEND", "nonesuch")
+
+    response = client.post("/ask", json={"question": "how many students"})
+
+    assert response.status_code == 503
+    assert "nonesuch" in response.json()["detail"]
+    assert client.get("/ask/stream", params={"q": "how many students"}).status_code == 503
+
+
+def test_failing_backend_is_a_502(client, broken_backend):
+    response = client.post("/ask", json={"question": "how many students"})
+
+    assert response.status_code == 502
+    assert response.json()["detail"] == "The broken backend failed: model went away"
+
+
+def test_failing_backend_ends_the_stream_with_an_error_event(client, broken_backend):
+    events = _events(client.get("/ask/stream", params={"q": "how many students"}).text)
+
+    assert [name for name, _ in events] == ["meta", "token", "error"]
+    assert events[-1][1] == {"detail": "The broken backend failed: model went away"}
+    # A broken-off answer is not cached
+    assert qa.answer_cache.stats()["size"] == 0
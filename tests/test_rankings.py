@@ -0,0 +1,53 @@
+from ranking import _Board, ranking_index
+
+
+def test_board_ranks_ties_together_and_lists_them_by_id():
+    board = _Board()
+    board.bulk_load([(3, 8.0), (1, 9.0), (2, 8.0), (4, 7.0)])
+
+    assert board.top(10) == [(1, 1, 9.0), (2, 2, 8.0), (2, 3, 8.0), (4, 4, 7.0)]
+    assert board.rank(8.0) == 2
+    assert board.rank(7.5) == 4
+
+
+def test_board_moves_a_student_whose_cgpa_changed():
+    board = _Board()
+    board.bulk_load([(1, 9.0), (2, 8.0)])
+
+    board.add(2, 9.5)
+    board.remove(1)
+    board.add(3, 6.0)
+
+    assert board.top(2) == [(1, 2, 9.5), (2, 3, 6.0)]
+    assert len(board) == 2
+
+
+def test_top_and_rank(client, make_students):
+    make_students(client, 1, mark=95)
+    make_students(client, 2, start=2, mark=60)
+    make_students(client, 1, start=4, mark=70, department="ECE")
+
+    top = client.get("/rankings/CSE/1").json()
+
+    assert top["students"] == 3
+    assert [(item["rank"], item["student_id"]) for item in top["items"]] == [(1, 1), (2, 2), (2, 3)]
+    assert client.get("/students/3/rank").json()["items"] == [
+        {"department": "CSE", "semester": 1, "rank": 2, "of": 3, "cgpa": 6.0},
+    ]
+    assert client.get("/rankings/MECH/1").json()["items"] == []
+
+
+def test_boards_follow_committed_writes(client, make_students):
+    make_students(client, 3, mark=60)
+    client.get("/rankings/CSE/1")
+
+    response = client.patch("/semesters/1/marks", json={"items": [{"student_id": 3, "subject": "Maths", "mark": 95}]})
+    assert response.status_code == 200, response.text
+    assert client.delete("/students/1").status_code == 200
+    make_students(client, 1, start=4, mark=80)
+
+    top = client.get("/rankings/CSE/1").json()
+    assert [(item["rank"], item["student_id"]) for item in top["items"]] == [(1, 3), (2, 4), (3, 2)]
+    assert client.get("/students/1/rank").status_code == 404
+    assert ranking_index.stats()["pending_refresh"] == 0
+    assert ranking_index.stats()["refreshes"] >= 1
@@ -0,0 +1,57 @@
+from search import edit_distance, search_index
+
+
+def _names(client, query):
+    response = client.get("/students/search", params={"q": query})
+    assert response.status_code == 200, response.text
+    return [item["student_name"] for item in response.json()["items"]]
+
+
+def test_edit_distance_stops_past_the_limit():
+    assert edit_distance("kumar", "kumra", 2) == 2
+    assert edit_distance("kumar", "krishnan", 1) == 2
+
+
+def test_matches_names_by_prefix_and_with_typos(client, make_students):
+    make_students(client, 2)
+    client.patch("/students/1", json={"student": {"student_name": "Lakshmi Narayanan"}})
+    client.patch("/students/2", json={"student": {"student_name": "Lakshman Kumar"}})
+
+    assert _names(client, "laksh") == ["Lakshmi Narayanan", "Lakshman Kumar"]
+    assert _names(client, "narayanen") == ["Lakshmi Narayanan"]
+    assert _names(client, "lakshmi narayanan") == ["Lakshmi Narayanan"]
+
+
+def test_matches_register_and_university_numbers(client, make_students):
+    make_students(client, 12)
+
+    assert [item["student_id"] for item in client.get("/students/search", params={"q": "reg00011"}).json()["items"]] == [11]
+    assert [item["student_id"] for item in client.get("/students/search", params={"q": "710000012"}).json()["items"]] == [12]
+    # Prefix of REG00010 and REG00011 and REG00012
+    assert len(client.get("/students/search", params={"q": "REG0001"}).json()["items"]) == 3
+
+
+def test_follows_committed_writes(client, make_students):
+    make_students(client, 2)
+    assert _names(client, "student") == ["Student 1", "Student 2"]
+
+    client.patch("/students/1", json={"student": {"student_name": "Zara Ali"}})
+    client.delete("/students/2")
+    make_students(client, 1, start=3)
+
+    assert _names(client, "zara") == ["Zara Ali"]
+    assert _names(client, "student") == ["Student 3"]
+    assert search_index.stats()["pending_refresh"] == 0
+
+
+def test_rolled_back_writes_leave_the_index_alone(client, make_students):
+    make_students(client, 1)
+    client.get("/students/search", params={"q": "student"})
+
+    # REG00001 is taken, so the whole update is rolled back
+    make_students(client, 1, start=2)
+    response = client.patch("/students/2", json={"student": {"student_name": "Ghost", "register_num": "REG00001"}})
+
+    assert response.status_code == 409
+    assert _names(client, "ghost") == []
+    assert search_index.stats()["pending_refresh"] == 0
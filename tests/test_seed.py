@@ -0,0 +1,65 @@
+import random
+
+import pytest
+from sqlalchemy import func, select
+
+import aggregates
+import database
+from bench.seed import UNIVERSITY_BASE, generate, register_num, seed, sem_info_ids
+from models import StudentData, StudentInfo, StudentRecord, StudentSemInfo
+
+TABLES = [StudentData, StudentInfo, StudentSemInfo, StudentRecord]
+
+
+def _dump():
+    with database.engine.connect() as connection:
+        return [connection.execute(select(model.__table__).order_by(*model.__table__.primary_key)).all()
+                for model in TABLES]
+
+
+def _seed(students, **options):
+    return seed(database.engine, students, sems=2, subjects=3, log=lambda *args: None, **options)
+
+
+def test_generate_is_deterministic_and_numbered():
+    first = generate(1, 11, 2, 3, random.Random(7))
+
+    assert generate(1, 11, 2, 3, random.Random(7)) == first
+    assert generate(1, 11, 2, 3, random.Random(8)) != first
+    students, infos, sem_rows, records = first
+    assert [row["register_num"] for row in students] == [register_num(n) for n in range(1, 11)]
+    assert students[4]["university_num"] == UNIVERSITY_BASE + 5
+    assert [row["sem_info_id"] for row in sem_rows if row["student_id"] == 5] == list(sem_info_ids(5, 2, 3))
+    assert len(infos) == len(records) == 10
+
+
+def test_seed_gives_the_same_rows_whatever_the_chunk_size():
+    _seed(25, seed_value=3, chunk_size=25)
+    whole = _dump()
+
+    _seed(25, seed_value=3, chunk_size=4, reset=True)
+
+    assert _dump() == whole
+    assert [len(rows) for rows in whole] == [25, 25, 150, 25]
+
+
+def test_seed_rebuilds_the_dashboard_aggregates():
+    _seed(12)
+
+    db = database.SessionLocal()
+    try:
+        counters = aggregates.counters(db)
+        assert sum(totals["students"] for totals in counters["departments"].values()) == 12
+        aggregates.rebuild(db)
+        assert aggregates.counters(db) == counters
+    finally:
+        db.close()
+
+
+def test_seed_refuses_to_overwrite_without_reset():
+    _seed(3)
+
+    with pytest.raises(SystemExit):
+        _seed(3)
+    with database.engine.connect() as connection:
+        assert connection.execute(select(func.count()).select_from(StudentData)).scalar() == 3
@@ -0,0 +1,57 @@
+def _row(n, **fields):
+    return {
+        "student_id": 1000 + n,
+        "student_name": f"Batch {n}",
+        "dob": "2004-01-01",
+        "department": "IT",
+        "register_num": f"BATCH{n:03d}",
+        "university_num": 720000000 + n,
+        **fields,
+    }
+
+
+def test_get_batch_reports_missing_ids(any_client, make_students):
+    ids = make_students(any_client, 2)
+
+    body = any_client.get("/student_data/batch", params={"ids": f"{ids[1]},{ids[0]},999999"}).json()
+
+    assert sorted(item["student_id"] for item in body["items"]) == sorted(ids)
+    assert body["missing"] == [999999]
+
+
+def test_create_batch_reports_each_item(any_client, make_students):
+    make_students(any_client, 1)
+
+    response = any_client.post("/student_data/batch", json=[
+        _row(1),
+        _row(2, register_num="REG00001"),  # taken by student 1
+        {"student_name": "No id"},
+    ])
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert [result["status"] for result in body["results"]] == ["created", "conflict", "invalid"]
+    assert (body["succeeded"], body["failed"]) == (1, 2)
+    assert any_client.get("/student_data/1001").json()["student_name"] == "Batch 1"
+
+
+def test_update_and_delete_batches(any_client, make_students):
+    ids = make_students(any_client, 2)
+    rows = [any_client.get(f"/student_data/{student_id}").json() for student_id in ids]
+
+    updated = any_client.put("/student_data/batch", json=[{**rows[0], "department": "MECH"}, {**rows[1], "student_id": 999999}])
+    assert [result["status"] for result in updated.json()["results"]] == ["updated", "not_found"]
+    assert any_client.get(f"/student_data/{ids[0]}").json()["department"] == "MECH"
+
+    deleted = any_client.delete("/student_data/batch", params={"ids": f"{ids[1]},999999"})
+    assert [result["status"] for result in deleted.json()["results"]] == ["deleted", "not_found"]
+    assert any_client.get(f"/student_full/{ids[1]}").status_code == 404
+    assert any_client.get("/graph/all-charts").json()["horizontal_bar_chart"] == {
+        "departments": ["MECH"], "student_counts": [1],
+    }
+
+
+def test_batch_size_is_capped(any_client):
+    ids = ",".join(str(n) for n in range(1, 1002))
+
+    assert any_client.get("/student_data/batch", params={"ids": ids}).status_code == 422